@@ -0,0 +1,16 @@
+from typing import Dict, Type
+
+from algorithm.main import ShabzakEngine
+from algorithm.matching import MatchingShabzakEngine
+from algorithm.vectorized import VectorizedShabzakEngine
+from utils import enums
+
+ENGINES_BY_PLANNING_MODE: Dict[enums.PlanningMode, Type[ShabzakEngine]] = {
+    enums.PlanningMode.Greedy: ShabzakEngine,
+    enums.PlanningMode.Matching: MatchingShabzakEngine,
+    enums.PlanningMode.Vectorized: VectorizedShabzakEngine,
+}
+
+
+def get_engine_class(planning_mode: enums.PlanningMode) -> Type[ShabzakEngine]:
+    return ENGINES_BY_PLANNING_MODE[planning_mode]
@@ -1,14 +1,31 @@
-from datetime import date, datetime, timedelta
-from typing import List
+import uuid
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-from sqlalchemy import desc
+import numpy as np
+from sqlalchemy.orm import Session as SessionType
 
-from db import DBSession
-from db.models import BCPDay, BCPTimetable, Day, DaySoldierAssignment, Soldier, Team, Timetable
-from utils import enums, model_actions
+from algorithm import profiling
+from algorithm.main import ShabzakEngine
+from algorithm.scoring import SoldierScoreQueue
+from algorithm.snapshot import TeamSnapshot
+from db import DBSession, history
+from db.history import NO_ASSIGNMENT, AssignmentHistory
+from db.models import BCPDay, BCPTimetable, Soldier, Team, Timetable
+from db.records import DayRecord, SoldierRecord
+from utils import enums, exceptions
 
 
 class BCPEngine:
+    """
+    Plans a BCP morning and night soldier per day. The whole window is loaded up front in one
+    session: the BCP days of the lookback and the main timetable's stored assignment history
+    for the horizon. Rotation fairness is a SoldierScoreQueue keyed by when each soldier last
+    served, so a day takes the two least recently served soldiers whose main assignment
+    allows BCP, at O(log n) per soldier looked at. Planned jointly with a main engine, it
+    reads the main assignments from the engine's snapshot instead, prospective days included.
+    """
+
     timetable_lookback_days = 7
     assignments_allowing_bcp = [
         enums.Assignment.WeekendHome,
@@ -18,72 +35,147 @@ class BCPEngine:
         enums.Assignment.BCPHome,
     ]
 
-    def __init__(self, team: Team, prev_bcp_days: List[BCPDay] = []):
+    def __init__(self, team: Team, prev_bcp_days: Optional[List[BCPDay]] = None) -> None:
         self.team: Team = team
-        self.prev_bcp_days: List[BCPDay] = prev_bcp_days
-        self.timetable: Timetable = model_actions.get_timetable_for_team(self.team)
-        self.soldiers: List[Soldier] = BCPEngine.filter_soldiers_close_to_base(
-            model_actions.get_soldiers_for_team(self.team)
-        )
+        self.prev_bcp_days: List[BCPDay] = list(prev_bcp_days or [])
+        self.profile: Union[profiling.EngineProfile, profiling.NullProfile] = profiling.NULL_PROFILE
 
     @staticmethod
-    def filter_soldiers_close_to_base(soldiers: List[Soldier]) -> List[Soldier]:
+    def filter_soldiers_close_to_base(soldiers: List[SoldierRecord]) -> List[SoldierRecord]:
         return [soldier for soldier in soldiers if soldier.is_close_to_base]
 
-    def calculate_bcp_days(self, start_day: date, num_days: int) -> List[BCPDay]:
-        calculated_days: List[BCPDay] = self.prev_bcp_days
-        for days_passed in range(num_days):
-            day_to_calculate = start_day + timedelta(days=days_passed)
-            calculated_days.append(self.calculate_bcp_day(day_to_calculate, calculated_days))
-        return calculated_days
-
-    def calculate_bcp_day(self, day_to_calculate: date, prev_bcp_days: List[BCPDay] = []) -> BCPDay:
-        main_day_soldier_assignments: List[DaySoldierAssignment] = []
-        eligible_soldiers: List[Soldier] = []
-        soldiers_ordered_by_fairness: List[Soldier] = []
+    def load_horizon(
+        self, start_day: date, num_days: int, snapshot: Optional[TeamSnapshot] = None
+    ) -> None:
+        lookback_start_day = start_day - timedelta(days=BCPEngine.timetable_lookback_days)
         with DBSession() as session:
-            prev_bcp_days += (
+            bcp_timetable = (
+                session.query(BCPTimetable).filter(BCPTimetable.team_id == self.team.id).first()
+            )
+            if not bcp_timetable:
+                raise exceptions.NotFound(f"Cannot find BCP timetable for team ID {self.team.id}")
+            lookback_bcp_days = (
                 session.query(BCPDay)
                 .filter(
-                    BCPDay.timetable_id == self.timetable.id,
-                    BCPDay.created_at >= BCPEngine.timetable_lookback_days,
+                    BCPDay.timetable_id == bcp_timetable.id,
+                    BCPDay.date >= lookback_start_day,
+                    BCPDay.date < start_day,
                 )
-                .order_by(desc(BCPDay.created_at))
+                .order_by(BCPDay.date)
                 .all()
-            ) or []
-            main_day = session.query(Day).filter(Day.date == day_to_calculate).first()
-            if main_day:
-                main_day_soldier_assignments = (
-                    session.query(DaySoldierAssignment)
-                    .filter(DaySoldierAssignment.day_id == main_day.id)
-                    .all()
+            )
+            if snapshot:
+                soldiers = snapshot.soldiers
+                main_history = snapshot.history
+            else:
+                soldiers, main_history = self.load_main_timetable(
+                    session, start_day, start_day + timedelta(days=num_days)
                 )
-        eligible_soldiers = self.filter_soldiers_with_allowing_assignments(
-            main_day_soldier_assignments, self.soldiers
+            session.expunge_all()
+        self.bcp_timetable: BCPTimetable = bcp_timetable
+        self.soldiers: List[SoldierRecord] = BCPEngine.filter_soldiers_close_to_base(soldiers)
+        self.soldier_indexes: Dict[str, int] = {
+            soldier.id: index for index, soldier in enumerate(self.soldiers)
+        }
+        self.main_history: AssignmentHistory = main_history
+        self.main_columns = np.array(
+            [main_history.soldier_indexes[soldier.id] for soldier in self.soldiers], dtype=np.intp
         )
-        for bcp_day in prev_bcp_days:
-            bcp_day_soldiers = [bcp_day.morning_soldier, bcp_day.night_soldier]
-            soldiers_ordered_by_fairness.extend(bcp_day_soldiers)
-        soldiers_ordered_by_fairness = [
-            soldier for soldier in eligible_soldiers if soldier not in soldiers_ordered_by_fairness
-        ] + soldiers_ordered_by_fairness
-        return BCPDay(
-            timetable_id=self.timetable.id,
-            morning_soldier_id=soldiers_ordered_by_fairness[1].id,
-            night_soldier_id=soldiers_ordered_by_fairness[0].id,
+        self.allowing_bcp_codes = history.to_codes(BCPEngine.assignments_allowing_bcp)
+        # Soldiers who never served rank first, in roster order, then by when they last served
+        self.rotation = SoldierScoreQueue(
+            {soldier.id: index - len(self.soldiers) for index, soldier in enumerate(self.soldiers)}
         )
+        self.served_count = 0
+        for bcp_day in lookback_bcp_days + self.prev_bcp_days:
+            self.record_served(bcp_day.morning_soldier_id)
+            self.record_served(bcp_day.night_soldier_id)
 
-    def filter_soldiers_with_allowing_assignments(
-        self, day_soldier_assignments: List[DaySoldierAssignment], soldiers: List[Soldier]
-    ) -> List[Soldier]:
-        if not day_soldier_assignments:
-            return soldiers
-        soldier_assignments = {
-            assignment.soldier_id: assignment for assignment in day_soldier_assignments
-        }
-        filtered_soldiers = []
-        for soldier in soldiers:
-            assignment = soldier_assignments.get(soldier.id)
-            if not assignment or assignment.assignment in BCPEngine.assignments_allowing_bcp:
-                filtered_soldiers.append(soldier)
-        return filtered_soldiers
+    def load_main_timetable(
+        self, session: SessionType, start_day: date, end_day: date
+    ) -> Tuple[List[SoldierRecord], AssignmentHistory]:
+        timetable = session.query(Timetable).filter(Timetable.team_id == self.team.id).first()
+        if not timetable:
+            raise exceptions.NotFound(f"Cannot find timetable for team ID {self.team.id}")
+        soldiers = [
+            SoldierRecord.from_model(soldier)
+            for soldier in session.query(Soldier).filter(Soldier.team_id == self.team.id).all()
+        ]
+        main_history = history.load_history(session, timetable.id).get_window(
+            start_day, end_day, [soldier.id for soldier in soldiers]
+        )
+        return soldiers, main_history
+
+    def record_served(self, soldier_id: Optional[str]) -> None:
+        if soldier_id in self.soldier_indexes:
+            self.rotation.push(soldier_id, self.served_count)
+        self.served_count += 1
+
+    def calculate_bcp_days(self, start_day: date, num_days: int) -> List[BCPDay]:
+        self.profile = profiling.start_profile(type(self).__name__, self.team.id)
+        try:
+            with self.profile.phase("load_snapshot"):
+                self.load_horizon(start_day, num_days)
+            return [
+                self.calculate_bcp_day(start_day + timedelta(days=days_passed))
+                for days_passed in range(num_days)
+            ]
+        finally:
+            self.profile.finish()
+
+    def iter_joint_days(
+        self, engine: ShabzakEngine, start_day: date, num_days: int
+    ) -> Iterator[Tuple[DayRecord, BCPDay]]:
+        """
+        Plans the main timetable with `engine` and the BCP pair of each day in the same pass,
+        over the engine's snapshot, so every BCP day sees that day's prospective main
+        assignments.
+        """
+        self.profile = profiling.start_profile(type(self).__name__, self.team.id)
+        try:
+            for days_passed, day in enumerate(engine.iter_days(start_day, num_days)):
+                if not days_passed:
+                    with self.profile.phase("load_snapshot"):
+                        self.load_horizon(start_day, num_days, engine.get_snapshot())
+                yield day, self.calculate_bcp_day(day.date)
+        finally:
+            self.profile.finish()
+
+    def calculate_bcp_day(self, day_to_calculate: date) -> BCPDay:
+        with self.profile.phase("available_assignments"):
+            allowed = self.get_allowed_soldiers(day_to_calculate)
+        with self.profile.phase("sort_soldiers"):
+            night_soldier_id, morning_soldier_id = self.get_least_recently_served(allowed, 2)
+        with self.profile.phase("object_construction"):
+            bcp_day = BCPDay(
+                id=str(uuid.uuid4()),
+                date=day_to_calculate,
+                timetable_id=self.bcp_timetable.id,
+                morning_soldier_id=morning_soldier_id,
+                night_soldier_id=night_soldier_id,
+            )
+        self.record_served(morning_soldier_id)
+        self.record_served(night_soldier_id)
+        return bcp_day
+
+    def get_allowed_soldiers(self, day_to_calculate: date) -> np.ndarray:
+        """Per soldier, whether their main assignment on the day allows BCP."""
+        codes = self.main_history.get_codes_for_date(day_to_calculate)[self.main_columns]
+        return (codes == NO_ASSIGNMENT) | np.isin(codes, self.allowing_bcp_codes)
+
+    def get_least_recently_served(self, allowed: np.ndarray, count: int) -> List[Optional[str]]:
+        """
+        The `count` least recently served soldiers allowed BCP on the day, padded with None
+        when there are too few. Soldiers keep their place in the rotation until they serve.
+        """
+        chosen: List[Tuple[str, int]] = []
+        skipped: List[Tuple[str, int]] = []
+        while len(chosen) < count and len(self.rotation):
+            soldier_id, last_served = self.rotation.pop()
+            if allowed[self.soldier_indexes[soldier_id]]:
+                chosen.append((soldier_id, last_served))
+            else:
+                skipped.append((soldier_id, last_served))
+        for soldier_id, last_served in skipped + chosen:
+            self.rotation.push(soldier_id, last_served)
+        return [soldier_id for soldier_id, _ in chosen] + [None] * (count - len(chosen))
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional
+
+from algorithm.scoring import SoldierScoreQueue
+from db.records import DayRecord, SoldierRecord
+
+
+@dataclass
+class EngineCheckpoint:
+    """ShabzakEngine state right before `date` is planned."""
+
+    date: date
+    consecutive_nights: int
+    last_night_soldier: Optional[SoldierRecord]
+    running_scores: Dict[str, int]
+    soldier_queue: SoldierScoreQueue
+    calculated_days: List[DayRecord]
@@ -0,0 +1,135 @@
+from typing import Dict, Iterable, List, Tuple
+
+import utils
+from db.models import Team
+from db.records import AssignmentRecord, SoldierRecord
+from utils import enums
+
+ASSIGNMENT_BITS: Dict[enums.Assignment, int] = {
+    assignment: 1 << index for index, assignment in enumerate(enums.Assignment)
+}
+ALL_ASSIGNMENTS_MASK = (1 << len(ASSIGNMENT_BITS)) - 1
+GUARD_SHIFTS_MASK = (
+    ASSIGNMENT_BITS[enums.Assignment.GuardDuty] | ASSIGNMENT_BITS[enums.Assignment.Tashtiot]
+)
+GUARD_HELD_SHIFTS_MASKS = {
+    enums.WeekDayType.Weekday: ASSIGNMENT_BITS[enums.Assignment.Night],
+    enums.WeekDayType.Weekend: ASSIGNMENT_BITS[enums.Assignment.Day]
+    | ASSIGNMENT_BITS[enums.Assignment.Night],
+}
+
+
+def to_mask(assignments: Iterable[enums.Assignment]) -> int:
+    mask = 0
+    for assignment in assignments:
+        mask |= ASSIGNMENT_BITS[assignment]
+    return mask
+
+
+def from_mask(mask: int) -> List[enums.Assignment]:
+    return [assignment for assignment, bit in ASSIGNMENT_BITS.items() if mask & bit]
+
+
+class EligibilityMasks:
+    """
+    Team assignment rules compiled into integer masks over enums.Assignment, once per run.
+    A day's state is a single `filled_mask` of the assignments already taken (including the
+    ones they contain), and a soldier's available assignments are a few bitwise operations
+    against it.
+    """
+
+    def __init__(
+        self,
+        team: Team,
+        soldiers: List[SoldierRecord],
+        starting_assignments: Dict[enums.WeekDayType, List[enums.Assignment]],
+        assignments_containing_others: Dict[enums.Assignment, List[enums.Assignment]],
+    ) -> None:
+        self.starting_masks: Dict[enums.WeekDayType, int] = {
+            weekend_or_weekday: to_mask(assignments)
+            for weekend_or_weekday, assignments in starting_assignments.items()
+        }
+        self.filled_masks: Dict[enums.Assignment, int] = {
+            assignment: EligibilityMasks.get_contained_mask(
+                assignment, assignments_containing_others
+            )
+            for assignment in enums.Assignment
+        }
+        self.guard_holds_shift = bool(team.allow_guard_to_hold_shift)
+        self.allowed_masks: Dict[Tuple[str, enums.WeekDayType], int] = {}
+        self.fallback_masks: Dict[Tuple[str, enums.WeekDayType], int] = {}
+        for soldier in soldiers:
+            for weekend_or_weekday in enums.WeekDayType:
+                key = (soldier.id, weekend_or_weekday)
+                self.allowed_masks[key] = EligibilityMasks.get_allowed_mask(
+                    team, soldier, weekend_or_weekday
+                )
+                self.fallback_masks[key] = (
+                    ASSIGNMENT_BITS[enums.Assignment.DayAndNight]
+                    if not soldier.is_close_to_base
+                    and weekend_or_weekday == enums.WeekDayType.Weekend
+                    else 0
+                )
+
+    @staticmethod
+    def get_contained_mask(
+        assignment: enums.Assignment,
+        assignments_containing_others: Dict[enums.Assignment, List[enums.Assignment]],
+    ) -> int:
+        mask = ASSIGNMENT_BITS[assignment]
+        for contained_assignment in assignments_containing_others.get(assignment, []):
+            mask |= EligibilityMasks.get_contained_mask(
+                contained_assignment, assignments_containing_others
+            )
+        return mask
+
+    @staticmethod
+    def get_allowed_mask(
+        team: Team, soldier: SoldierRecord, weekend_or_weekday: enums.WeekDayType
+    ) -> int:
+        mask = ALL_ASSIGNMENTS_MASK
+        if soldier.is_commander:
+            if not team.commanders_do_nights:
+                mask &= ~ASSIGNMENT_BITS[enums.Assignment.Night]
+            if not team.commanders_do_weekends and weekend_or_weekday == enums.WeekDayType.Weekend:
+                mask &= ~ASSIGNMENT_BITS[enums.Assignment.Day]
+        return mask
+
+    def allows(
+        self, soldier_id: str, assignment: enums.Assignment, weekend_or_weekday: enums.WeekDayType
+    ) -> bool:
+        return bool(
+            self.allowed_masks[(soldier_id, weekend_or_weekday)] & ASSIGNMENT_BITS[assignment]
+        )
+
+    def get_filled_mask(self, assignments: Iterable[AssignmentRecord]) -> int:
+        mask = 0
+        for assignment in assignments:
+            mask |= self.filled_masks[utils.get_assignment(assignment.assignment)]
+        return mask
+
+    def fill(self, filled_mask: int, assignment: enums.Assignment) -> int:
+        return filled_mask | self.filled_masks[assignment]
+
+    def get_open_mask(self, filled_mask: int, weekend_or_weekday: enums.WeekDayType) -> int:
+        return self.starting_masks[weekend_or_weekday] & ~filled_mask
+
+    def get_shifts_to_fill(self, filled_mask: int, weekend_or_weekday: enums.WeekDayType) -> int:
+        """The open shifts of the day, without the ones a guard shift already holds."""
+        open_mask = self.get_open_mask(filled_mask, weekend_or_weekday)
+        if self.guard_holds_shift and filled_mask & GUARD_SHIFTS_MASK:
+            open_mask &= ~GUARD_HELD_SHIFTS_MASKS[weekend_or_weekday]
+        return open_mask
+
+    def get_available_mask(
+        self, soldier_id: str, filled_mask: int, weekend_or_weekday: enums.WeekDayType
+    ) -> int:
+        key = (soldier_id, weekend_or_weekday)
+        available_mask = self.get_open_mask(filled_mask, weekend_or_weekday)
+        available_mask &= self.allowed_masks[key]
+        fallback_mask = self.fallback_masks[key]
+        if fallback_mask and not available_mask & ASSIGNMENT_BITS[enums.Assignment.Day]:
+            available_mask = fallback_mask
+        if self.guard_holds_shift and filled_mask & GUARD_SHIFTS_MASK:
+            available_mask &= ~GUARD_HELD_SHIFTS_MASKS[weekend_or_weekday]
+        return available_mask
@@ -0,0 +1,309 @@
+import math
+import random
+import time
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import utils
+from algorithm import eligibility
+from algorithm.main import ShabzakEngine
+from algorithm.scoring import SoldierScoreQueue
+from utils import enums
+
+Move = Tuple[int, int, int, int]  # (soldier index, soldier index, first day, end day)
+
+TIME_CHECK_INTERVAL = 128
+TRACE_INTERVAL_MS = 100
+FINAL_TEMPERATURE_RATIO = 0.001
+
+
+@dataclass
+class LocalSearchReport:
+    initial_stdev: float
+    final_stdev: float
+    elapsed_ms: float
+    iterations: int
+    accepted_moves: int
+    improvement_per_100ms: float
+    trace: List[Tuple[float, float]] = field(default_factory=list)  # (elapsed ms, best stdev)
+
+
+class LocalSearchOptimizer:
+    """
+    Simulated annealing over a planned horizon that lowers the spread of the soldiers'
+    running scores. A move exchanges the assignments of two soldiers over a block of days:
+    a single day (swap) or up to `max_block_days` days, which moves whole night runs along
+    with their Afters. Pre-existing assignments never move, every shift a soldier receives
+    must be allowed for them, and both soldiers must be in the same state at the block
+    edges (same After obligation, no night run cut in half), so minimum consecutive nights
+    and After hold exactly as planned. Fairness is the population variance of the scores;
+    the sum of scores never changes, so a move's effect is computed from the two soldiers
+    involved without re-scoring the roster.
+    """
+
+    def __init__(
+        self, engine: ShabzakEngine, max_block_days: int = 7, seed: Optional[int] = None
+    ) -> None:
+        snapshot = engine.get_snapshot()
+        self.engine = engine
+        self.max_block_days = max_block_days
+        self.random = random.Random(seed)
+        self.dates = sorted(engine.planned_days)
+        self.soldier_ids = [soldier.id for soldier in snapshot.soldiers]
+        self.weekday_types = [utils.get_weekend_or_weekday(day_date) for day_date in self.dates]
+        self.weights: Dict[enums.Assignment, int] = {
+            assignment: int(assignment_score.score or 0)
+            for assignment, assignment_score in engine.assignment_scores_by_assignment.items()
+        }
+        self.night_assignments: Set[enums.Assignment] = {
+            enums.Assignment.Night,
+            enums.Assignment.DayAndNight,
+        }
+        if engine.team.allow_guard_to_hold_shift:
+            self.night_assignments |= {enums.Assignment.GuardDuty, enums.Assignment.Tashtiot}
+        fixed_soldier_ids = [
+            {
+                assignment.soldier_id
+                for assignment in engine.fixed_assignments_by_date.get(day_date, [])
+            }
+            for day_date in self.dates
+        ]
+        self.assignments: List[List[Optional[enums.Assignment]]] = [
+            [self.get_stored_assignment(day_date, soldier_id) for day_date in self.dates]
+            for soldier_id in self.soldier_ids
+        ]
+        self.movable: List[List[bool]] = [
+            [
+                self.assignments[soldier_index][day_index] is not None
+                and soldier_id not in fixed_soldier_ids[day_index]
+                for day_index in range(len(self.dates))
+            ]
+            for soldier_index, soldier_id in enumerate(self.soldier_ids)
+        ]
+        self.original_assignments = [list(row) for row in self.assignments]
+        previous_date = self.dates[0] - timedelta(days=1) if self.dates else None
+        self.previous_weekday_type = (
+            utils.get_weekend_or_weekday(previous_date) if previous_date else None
+        )
+        self.previous_assignments: List[Optional[enums.Assignment]] = [
+            self.get_stored_assignment(previous_date, soldier_id) if previous_date else None
+            for soldier_id in self.soldier_ids
+        ]
+        self.scores: List[int] = [
+            engine.running_scores[soldier_id] for soldier_id in self.soldier_ids
+        ]
+        self.sum_of_squares = sum(score * score for score in self.scores)
+
+    def get_stored_assignment(self, day_date: date, soldier_id: str) -> Optional[enums.Assignment]:
+        assignment = self.engine.get_snapshot().get_soldier_assignment(day_date, soldier_id)
+        return utils.get_assignment(assignment.assignment) if assignment else None
+
+    def get_weight(self, assignment: Optional[enums.Assignment]) -> int:
+        return self.weights.get(assignment, 0) if assignment is not None else 0
+
+    def get_stdev(self, sum_of_squares: int) -> float:
+        num_soldiers = len(self.scores)
+        mean = sum(self.scores) / num_soldiers
+        return math.sqrt(max(sum_of_squares / num_soldiers - mean * mean, 0.0))
+
+    def get_assignment(self, soldier_index: int, day_index: int) -> Optional[enums.Assignment]:
+        if day_index < 0:
+            return self.previous_assignments[soldier_index]
+        return self.assignments[soldier_index][day_index]
+
+    def is_neutral_edge(self, first_soldier: int, second_soldier: int, day_index: int) -> bool:
+        """
+        Whether the two soldiers can trade the days after `day_index`: neither is in a night
+        run, and both or neither owe an After the next day.
+        """
+        weekend_or_weekday = (
+            self.weekday_types[day_index] if day_index >= 0 else self.previous_weekday_type
+        )
+        # The edge before the first planned day is only checked when there are planned days
+        assert weekend_or_weekday is not None
+        allowing_after = ShabzakEngine.assigments_allowing_after[weekend_or_weekday]
+        first_assignment = self.get_assignment(first_soldier, day_index)
+        second_assignment = self.get_assignment(second_soldier, day_index)
+        if (
+            first_assignment in self.night_assignments
+            or second_assignment in self.night_assignments
+        ):
+            return False
+        return (first_assignment in allowing_after) == (second_assignment in allowing_after)
+
+    def is_allowed(
+        self, soldier_index: int, assignment: Optional[enums.Assignment], day_index: int
+    ) -> bool:
+        """
+        Whether the soldier may receive `assignment` on the day. DayAndNight holds a night and
+        is only ever the weekend fallback of soldiers far from base, and a soldier with that
+        fallback never gets the day's default assignment.
+        """
+        if assignment is None:
+            return False
+        weekend_or_weekday = self.weekday_types[day_index]
+        soldier_id = self.soldier_ids[soldier_index]
+        masks = self.engine.eligibility_masks
+        has_fallback = bool(masks.fallback_masks[(soldier_id, weekend_or_weekday)])
+        if assignment == enums.Assignment.DayAndNight:
+            return has_fallback and masks.allows(
+                soldier_id, enums.Assignment.Night, weekend_or_weekday
+            )
+        if masks.starting_masks[weekend_or_weekday] & eligibility.ASSIGNMENT_BITS[assignment]:
+            return masks.allows(soldier_id, assignment, weekend_or_weekday)
+        if has_fallback:
+            return assignment != ShabzakEngine.default_assignment[weekend_or_weekday]
+        return True
+
+    def get_move_delta(self, move: Move) -> Optional[int]:
+        """
+        Score the first soldier gains (and the second loses) by exchanging the block, or None
+        when the exchange would break a rule or change nothing.
+        """
+        first_soldier, second_soldier, first_day, end_day = move
+        first_row = self.assignments[first_soldier]
+        second_row = self.assignments[second_soldier]
+        delta = 0
+        for day_index in range(first_day, end_day):
+            if not (
+                self.movable[first_soldier][day_index] and self.movable[second_soldier][day_index]
+            ):
+                return None
+            delta += self.get_weight(second_row[day_index]) - self.get_weight(first_row[day_index])
+        if not delta:
+            return None
+        if not self.is_neutral_edge(first_soldier, second_soldier, first_day - 1):
+            return None
+        if end_day < len(self.dates) and not self.is_neutral_edge(
+            first_soldier, second_soldier, end_day - 1
+        ):
+            return None
+        for day_index in range(first_day, end_day):
+            if not self.is_allowed(
+                first_soldier, second_row[day_index], day_index
+            ) or not self.is_allowed(second_soldier, first_row[day_index], day_index):
+                return None
+        return delta
+
+    def apply_move(self, move: Move, delta: int) -> None:
+        first_soldier, second_soldier, first_day, end_day = move
+        first_row = self.assignments[first_soldier]
+        second_row = self.assignments[second_soldier]
+        first_row[first_day:end_day], second_row[first_day:end_day] = (
+            second_row[first_day:end_day],
+            first_row[first_day:end_day],
+        )
+        self.sum_of_squares += self.get_sum_of_squares_change(first_soldier, second_soldier, delta)
+        self.scores[first_soldier] += delta
+        self.scores[second_soldier] -= delta
+
+    def get_sum_of_squares_change(self, first_soldier: int, second_soldier: int, delta: int) -> int:
+        return 2 * delta * (self.scores[first_soldier] - self.scores[second_soldier]) + 2 * delta**2
+
+    def propose_move(self) -> Move:
+        first_soldier, second_soldier = self.random.sample(range(len(self.soldier_ids)), 2)
+        block_days = 1
+        if self.random.random() < 0.5:
+            block_days = self.random.randint(1, min(self.max_block_days, len(self.dates)))
+        first_day = self.random.randrange(len(self.dates) - block_days + 1)
+        return first_soldier, second_soldier, first_day, first_day + block_days
+
+    def optimize(self, time_budget_ms: float) -> LocalSearchReport:
+        started_at = time.perf_counter()
+        initial_stdev = self.get_stdev(self.sum_of_squares)
+        report = LocalSearchReport(initial_stdev, initial_stdev, 0.0, 0, 0, 0.0)
+        if len(self.soldier_ids) < 2 or not self.dates or time_budget_ms <= 0:
+            return report
+        max_weight = max((abs(weight) for weight in self.weights.values()), default=1) or 1
+        initial_temperature = 2 * max_weight * max(initial_stdev, 1.0)
+        temperature = initial_temperature
+        best_sum_of_squares = self.sum_of_squares
+        moves_since_best: List[Tuple[Move, int]] = []
+        next_trace_ms = float(TRACE_INTERVAL_MS)
+        elapsed_ms = 0.0
+        while True:
+            if report.iterations % TIME_CHECK_INTERVAL == 0:
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                if elapsed_ms >= time_budget_ms:
+                    break
+                while elapsed_ms >= next_trace_ms:
+                    report.trace.append((next_trace_ms, self.get_stdev(best_sum_of_squares)))
+                    next_trace_ms += TRACE_INTERVAL_MS
+                temperature = initial_temperature * FINAL_TEMPERATURE_RATIO ** (
+                    elapsed_ms / time_budget_ms
+                )
+            report.iterations += 1
+            move = self.propose_move()
+            delta = self.get_move_delta(move)
+            if delta is None:
+                continue
+            change = self.get_sum_of_squares_change(move[0], move[1], delta)
+            if change > 0 and self.random.random() >= math.exp(-change / temperature):
+                continue
+            self.apply_move(move, delta)
+            report.accepted_moves += 1
+            moves_since_best.append((move, delta))
+            if self.sum_of_squares < best_sum_of_squares:
+                best_sum_of_squares = self.sum_of_squares
+                moves_since_best = []
+        for move, delta in reversed(moves_since_best):
+            self.apply_move(move, -delta)
+        self.write_back()
+        report.elapsed_ms = (time.perf_counter() - started_at) * 1000
+        report.final_stdev = self.get_stdev(self.sum_of_squares)
+        report.improvement_per_100ms = (
+            (report.initial_stdev - report.final_stdev) * TRACE_INTERVAL_MS / report.elapsed_ms
+        )
+        report.trace.append((report.elapsed_ms, report.final_stdev))
+        return report
+
+    def write_back(self) -> None:
+        """
+        Stores the exchanged assignments in the engine's snapshot and brings its running
+        scores and per-day checkpoints up to date, so the plan can still be re-planned.
+        """
+        engine = self.engine
+        snapshot = engine.get_snapshot()
+        score_deltas: Dict[str, int] = {}
+        changed = False
+        for day_index, day_date in enumerate(self.dates):
+            checkpoint = engine.checkpoints.get(day_date)
+            if checkpoint and changed:
+                for soldier_id, score_delta in score_deltas.items():
+                    checkpoint.running_scores[soldier_id] += score_delta
+                checkpoint.soldier_queue = SoldierScoreQueue(checkpoint.running_scores)
+                if checkpoint.calculated_days:
+                    checkpoint.last_night_soldier = engine.get_night_soldier(
+                        checkpoint.calculated_days[0]
+                    )
+                    checkpoint.consecutive_nights = engine.get_initial_consecutive_night_streak(
+                        checkpoint.calculated_days
+                    )
+            for soldier_index, soldier_id in enumerate(self.soldier_ids):
+                assignment = self.assignments[soldier_index][day_index]
+                original_assignment = self.original_assignments[soldier_index][day_index]
+                if assignment is None or assignment == original_assignment:
+                    continue
+                # Only stored assignments are movable, so the changed cell has a stored row
+                stored_assignment = snapshot.get_soldier_assignment(day_date, soldier_id)
+                assert stored_assignment is not None
+                snapshot.replace_soldier_assignment(
+                    day_date, replace(stored_assignment, assignment=assignment)
+                )
+                changed = True
+                score_deltas[soldier_id] = (
+                    score_deltas.get(soldier_id, 0)
+                    + self.get_weight(assignment)
+                    - self.get_weight(original_assignment)
+                )
+        for soldier_id, score_delta in score_deltas.items():
+            engine.add_to_running_score(soldier_id, score_delta)
+        if changed:
+            recent_days = [
+                engine.planned_days[day_date]
+                for day_date in reversed(self.dates[-ShabzakEngine.timetable_lookback_days :])
+            ]
+            engine.last_night_soldier = engine.get_night_soldier(recent_days[0])
+            engine.consecutive_nights = engine.get_initial_consecutive_night_streak(recent_days)
+        self.original_assignments = [list(row) for row in self.assignments]
@@ -1,24 +1,22 @@
-from copy import deepcopy
+import uuid
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional, Self
+from typing import Dict, Iterator, List, Optional, Self, Tuple, Union
 
 import utils
-from db import DBSession
-from db.models import (
-    AssignmentScore,
-    BCPDay,
-    Day,
-    DaySoldierAssignment,
-    Score,
-    Soldier,
-    Team,
-    Timetable,
-)
-from utils import enums, model_actions
+from algorithm import eligibility, profiling
+from algorithm.checkpoint import EngineCheckpoint
+from algorithm.eligibility import EligibilityMasks
+from algorithm.scoring import SoldierScoreQueue
+from algorithm.snapshot import TeamSnapshot
+from db import DBSession, history
+from db.models import AssignmentScore, BCPDay, Score, Team, Timetable
+from db.records import AssignmentRecord, DayRecord, SoldierRecord
+from utils import enums, exceptions
 
 
 class ShabzakEngine:
     timetable_lookback_days = 7
+    replannable = True
     default_assignment = {
         enums.WeekDayType.Weekday: enums.Assignment.Morning,
         enums.WeekDayType.Weekend: enums.Assignment.WeekendHome,
@@ -62,34 +60,109 @@ class ShabzakEngine:
         enums.Assignment.Afternoon,
     ]
 
-    def __init__(self, team: Team) -> None:
+    def __init__(self, team: Team, snapshot: Optional[TeamSnapshot] = None) -> None:
         self.consecutive_nights: int = 0
         self.start_date: Optional[date] = None
         self.team: Team = team
-        self.timetable: Timetable = model_actions.get_timetable_for_team(self.team)
-        self.soldiers: List[Soldier] = model_actions.get_soldiers_for_team(self.team)
-        self.last_night_soldier: Optional[Soldier] = None
-        self.scores: List[Score] = model_actions.get_scores_for_team(self.team)
-        self.assignment_scores: List[AssignmentScore] = model_actions.get_assignment_scores()
+        self.last_night_soldier: Optional[SoldierRecord] = None
+        self.snapshot: Optional[TeamSnapshot] = None
+        self.checkpoints: Dict[date, EngineCheckpoint] = {}
+        self.planned_days: Dict[date, DayRecord] = {}
+        self.fixed_assignments_by_date: Dict[date, List[AssignmentRecord]] = {}
+        self.score_adjustments_by_date: Dict[date, Dict[str, int]] = {}
+        self.profile: Union[profiling.EngineProfile, profiling.NullProfile] = profiling.NULL_PROFILE
+        if snapshot:
+            self.load_snapshot(snapshot)
+
+    def load_snapshot(self, snapshot: TeamSnapshot) -> None:
+        self.snapshot = snapshot
+        self.timetable: Timetable = snapshot.timetable
+        self.soldiers: List[SoldierRecord] = snapshot.soldiers
+        self.scores: List[Score] = snapshot.scores
+        self.assignment_scores: List[AssignmentScore] = snapshot.assignment_scores
+        self.scores_by_id: Dict[str, Score] = {score.id: score for score in self.scores}
+        self.assignment_scores_by_assignment: Dict[enums.Assignment, AssignmentScore] = {
+            utils.get_assignment(assignment_score.assignment): assignment_score
+            for assignment_score in self.assignment_scores
+        }
+        self.running_scores: Dict[str, int] = {
+            soldier.id: self.get_initial_score_for_soldier(soldier) for soldier in self.soldiers
+        }
+        self.soldier_queue = SoldierScoreQueue(self.running_scores)
+        self.eligibility_masks = EligibilityMasks(
+            self.team,
+            self.soldiers,
+            ShabzakEngine.default_starting_assignments,
+            ShabzakEngine.assignments_containing_others,
+        )
+        self.assignments_by_descending_score: List[Tuple[int, enums.Assignment]] = [
+            (eligibility.ASSIGNMENT_BITS[assignment], assignment)
+            for assignment in self.sort_assignments_by_score(
+                [
+                    assignment
+                    for assignment in enums.Assignment
+                    if assignment in self.assignment_scores_by_assignment
+                ]
+            )
+        ]
+        self.night_codes = history.to_codes(self.get_shifts_including_nights())
 
     @staticmethod
     def filter_preexisting_assignments(
-        assignments_to_fill: List[enums.Assignment], filled_assignments: List[DaySoldierAssignment]
+        assignments_to_fill: List[enums.Assignment], filled_assignments: List[AssignmentRecord]
     ) -> List[enums.Assignment]:
-        filled_assignment_names: List[enums.Assignment] = [
-            enums.Assignment[assignment.assignment] for assignment in filled_assignments
-        ]
-        for filled_assignment in filled_assignment_names:
-            filled_assignment_names.extend(
-                ShabzakEngine.assignments_containing_others.get(filled_assignment, [])
+        filled_mask = 0
+        for assignment in filled_assignments:
+            filled_mask |= EligibilityMasks.get_contained_mask(
+                utils.get_assignment(assignment.assignment),
+                ShabzakEngine.assignments_containing_others,
             )
-        return [item for item in assignments_to_fill if item not in filled_assignment_names]
+        return [
+            item
+            for item in assignments_to_fill
+            if not filled_mask & eligibility.ASSIGNMENT_BITS[item]
+        ]
+
+    def get_score_for_soldier(self, soldier: SoldierRecord) -> Score:
+        score = self.scores_by_id.get(soldier.score_id)
+        if not score:
+            raise exceptions.NotFound(f"Score for soldier with ID {soldier.id} not found")
+        return score
+
+    def get_initial_score_for_soldier(self, soldier: SoldierRecord) -> int:
+        score = self.scores_by_id.get(soldier.score_id)
+        if not score or score.score is None:
+            return 0
+        return score.score
+
+    def get_running_score(self, soldier: SoldierRecord) -> int:
+        return self.running_scores[soldier.id]
 
-    def get_score_for_soldier(self, soldier: Soldier) -> Score:
-        return next((score for score in self.scores if soldier.score_id == score.id))
+    def get_assignment_weight(self, assignment: AssignmentRecord) -> int:
+        assignment_score = self.assignment_scores_by_assignment.get(
+            utils.get_assignment(assignment.assignment)
+        )
+        return assignment_score.score if assignment_score else 0
+
+    def add_assignment_to_running_score(
+        self, soldier: SoldierRecord, assignment: AssignmentRecord
+    ) -> None:
+        self.add_to_running_score(soldier.id, self.get_assignment_weight(assignment))
 
-    def sort_soldiers_by_score(self) -> List[Soldier]:
-        return sorted(self.soldiers, key=lambda soldier: self.get_score_for_soldier(soldier).score)
+    def add_to_running_score(self, soldier_id: str, score_delta: int) -> None:
+        if not score_delta or soldier_id not in self.running_scores:
+            return
+        self.running_scores[soldier_id] += score_delta
+        self.soldier_queue.push(soldier_id, self.running_scores[soldier_id])
+
+    def sort_soldiers_by_score(self) -> List[SoldierRecord]:
+        snapshot = self.get_snapshot()
+        sorted_soldiers = [
+            snapshot.soldiers_by_id[soldier_id] for soldier_id in self.soldier_queue.drain()
+        ]
+        for soldier in sorted_soldiers:
+            self.soldier_queue.push(soldier.id, self.running_scores[soldier.id])
+        return sorted_soldiers
 
     def sort_assignments_by_score(
         self, assignments: List[enums.Assignment], reverse: bool = True
@@ -101,128 +174,298 @@ class ShabzakEngine:
         )
 
     def get_score_for_assignment(self, assignment: enums.Assignment) -> AssignmentScore:
-        return next(
-            (
-                assignment_score
-                for assignment_score in self.assignment_scores
-                if assignment_score.assignment == assignment
-            ),
-        )
+        assignment_score = self.assignment_scores_by_assignment.get(assignment)
+        if not assignment_score:
+            raise exceptions.NotFound(f"Score for assignment {assignment} not found")
+        return assignment_score
 
-    def get_initial_consecutive_night_streak(self, days: List[Day]) -> int:
+    def get_initial_consecutive_night_streak(self, days: List[DayRecord]) -> int:
+        """Nights held in a row by the night soldier of `days[0]`, looking back len(days) days."""
         if not days:
             return 0
-        last_found_soldier: Optional[Soldier] = self.get_night_soldier(days[0])
-        streak = 1
-        for day in days[1:]:
-            if self.get_night_soldier(day) != last_found_soldier:
-                return streak
-            streak += 1
+        _, streak = self.get_snapshot().history.get_night_streak(
+            days[0].date, len(days), self.night_codes
+        )
         return streak
 
     def get_soldier_assignment_for_day(
-        self, day: Day, soldier: Soldier
-    ) -> Optional[DaySoldierAssignment]:
-        day_assignments = model_actions.get_assignments_for_day(day)
-        if not day_assignments:
-            return None
-        soldier_assignment = next(
-            (assignment for assignment in day_assignments if assignment.soldier_id == soldier.id),
-            None,
-        )
-        return soldier_assignment
+        self, day: DayRecord, soldier: SoldierRecord
+    ) -> Optional[AssignmentRecord]:
+        return self.get_snapshot().get_soldier_assignment(day.date, soldier.id)
 
-    def get_night_soldier(self, day: Day) -> Soldier:
-        assignments = model_actions.get_assignments_for_day(day)
+    def get_shifts_including_nights(self) -> List[enums.Assignment]:
         shifts_including_nights = [enums.Assignment.Night, enums.Assignment.DayAndNight]
         if self.team.allow_guard_to_hold_shift:
             shifts_including_nights.extend([enums.Assignment.GuardDuty, enums.Assignment.Tashtiot])
-        night_assignment = next(
-            (
-                assignment
-                for assignment in assignments
-                if assignment.assignment in shifts_including_nights
-            ),
-        )
-        return model_actions.get_soldier_from_assignment(night_assignment)
+        return shifts_including_nights
 
-    def calculate_days(self, start_date: date, num_days_to_calculate: int) -> List[Day]:
-        new_calculated_days: List[Day] = []
-        self.calculated_days: List[Day] = model_actions.get_lookback_days_from_timetable(
-            self.timetable, start_date, ShabzakEngine.timetable_lookback_days
-        )
+    def get_night_soldier(self, day: DayRecord) -> Optional[SoldierRecord]:
+        snapshot = self.get_snapshot()
+        night_soldier_id = snapshot.history.get_night_soldier_id(day.date, self.night_codes)
+        if not night_soldier_id:
+            return None
+        return snapshot.soldiers_by_id.get(night_soldier_id)
+
+    def get_snapshot(self) -> TeamSnapshot:
+        if not self.snapshot:
+            raise exceptions.NotFound(f"No snapshot loaded for team ID {self.team.id}")
+        return self.snapshot
+
+    def get_day_assignments(self, day: DayRecord) -> List[AssignmentRecord]:
+        return self.get_snapshot().get_assignments_for_date(day.date)
+
+    def calculate_days(self, start_date: date, num_days_to_calculate: int) -> List[DayRecord]:
+        return list(self.iter_days(start_date, num_days_to_calculate))
+
+    def iter_days(self, start_date: date, num_days_to_calculate: int) -> Iterator[DayRecord]:
+        """
+        Yields each day as soon as it is planned, with its assignments available through
+        get_day_assignments. Stopping early leaves the engine consistent up to the last day
+        yielded.
+        """
+        self.profile = profiling.start_profile(type(self).__name__, self.team.id)
+        try:
+            self.prepare_horizon(start_date, num_days_to_calculate)
+            for days_passed in range(num_days_to_calculate):
+                yield self.calculate_day(start_date + timedelta(days=days_passed))
+        finally:
+            self.profile.finish()
+
+    def prepare_horizon(self, start_date: date, num_days_to_calculate: int) -> None:
+        with self.profile.phase("load_snapshot"):
+            if self.snapshot and self.snapshot.covers(start_date, num_days_to_calculate):
+                # A previous run left its plan in the snapshot and in the running scores
+                self.snapshot.reset()
+                self.load_snapshot(self.snapshot)
+            else:
+                self.load_snapshot(
+                    TeamSnapshot.load(
+                        self.team,
+                        start_date,
+                        num_days_to_calculate,
+                        ShabzakEngine.timetable_lookback_days,
+                    )
+                )
+        snapshot = self.get_snapshot()
+        self.calculated_days: List[DayRecord] = snapshot.get_lookback_days(start_date)
+        self.last_night_soldier = None
+        self.consecutive_nights = 0
         if self.calculated_days:
             self.last_night_soldier = self.get_night_soldier(self.calculated_days[0])
             self.consecutive_nights = self.get_initial_consecutive_night_streak(
                 self.calculated_days
             )
         self.start_date = start_date
-        for days_passed in range(num_days_to_calculate):
-            date_to_calculate = self.start_date + timedelta(days=days_passed)
-            day_to_calculate = Day(date=date_to_calculate, timetable_id=self.timetable.id)
-            existing_assignments = model_actions.get_existing_assignments_for_date(
+        self.checkpoints = {}
+        self.planned_days = {}
+        self.fixed_assignments_by_date = {}
+        self.score_adjustments_by_date = {}
+
+    def calculate_day(self, date_to_calculate: date) -> DayRecord:
+        snapshot = self.get_snapshot()
+        with self.profile.phase("checkpoint"):
+            self.checkpoints[date_to_calculate] = self.create_checkpoint(date_to_calculate)
+        if date_to_calculate not in self.fixed_assignments_by_date:
+            self.fixed_assignments_by_date[date_to_calculate] = snapshot.get_assignments_for_date(
                 date_to_calculate
             )
-            self.soldiers = self.sort_soldiers_by_score()
-            day_assignments = self.get_new_day_assignments(day_to_calculate, existing_assignments)
-            new_day = Day(
-                date=date_to_calculate,
-                timetable_id=self.timetable.id,
+        with self.profile.phase("object_construction"):
+            new_day = self.get_planned_day(date_to_calculate)
+        day_assignments = self.get_new_day_assignments(
+            new_day, self.fixed_assignments_by_date[date_to_calculate]
+        )
+        snapshot.set_assignments_for_date(date_to_calculate, day_assignments)
+        for soldier_id, score_delta in self.score_adjustments_by_date.get(
+            date_to_calculate, {}
+        ).items():
+            self.add_to_running_score(soldier_id, score_delta)
+        self.calculated_days.insert(0, new_day)
+        self.planned_days[date_to_calculate] = new_day
+        return new_day
+
+    def get_planned_day(self, date_to_calculate: date) -> DayRecord:
+        planned_day = self.planned_days.get(date_to_calculate)
+        if planned_day:
+            return planned_day
+        existing_day = self.get_snapshot().get_day(date_to_calculate)
+        return DayRecord(
+            id=existing_day.id if existing_day else str(uuid.uuid4()),
+            date=date_to_calculate,
+            timetable_id=self.timetable.id,
+        )
+
+    def create_checkpoint(self, date_to_calculate: date) -> EngineCheckpoint:
+        return EngineCheckpoint(
+            date=date_to_calculate,
+            consecutive_nights=self.consecutive_nights,
+            last_night_soldier=self.last_night_soldier,
+            running_scores=dict(self.running_scores),
+            soldier_queue=self.soldier_queue.copy(),
+            calculated_days=self.calculated_days[: ShabzakEngine.timetable_lookback_days],
+        )
+
+    def restore_checkpoint(self, checkpoint: EngineCheckpoint) -> None:
+        self.consecutive_nights = checkpoint.consecutive_nights
+        self.last_night_soldier = checkpoint.last_night_soldier
+        self.running_scores = dict(checkpoint.running_scores)
+        self.soldier_queue = checkpoint.soldier_queue.copy()
+        self.calculated_days = list(checkpoint.calculated_days)
+
+    def get_assignments_by_soldier(self, day_date: date) -> Dict[str, enums.Assignment]:
+        return {
+            assignment.soldier_id: utils.get_assignment(assignment.assignment)
+            for assignment in self.get_snapshot().get_assignments_for_date(day_date)
+        }
+
+    def replan_from(
+        self, changed_date: date, changed_assignments: List[AssignmentRecord]
+    ) -> List[DayRecord]:
+        """
+        Applies planner edits on `changed_date` as fixed assignments and re-plans from the
+        checkpoint taken right before that date to the end of the horizon. Returns only the
+        days whose assignments differ from the previous plan. Stored assignments are already
+        part of the soldiers' scores, so only the difference an edit makes is added.
+        """
+        checkpoint = self.checkpoints.get(changed_date)
+        if not checkpoint:
+            raise exceptions.NotFound(f"Date {changed_date} is not part of the planned horizon")
+        dates_to_replan = sorted(
+            planned_date for planned_date in self.planned_days if planned_date >= changed_date
+        )
+        previous_assignments = {
+            planned_date: self.get_assignments_by_soldier(planned_date)
+            for planned_date in dates_to_replan
+        }
+        fixed_assignments = {
+            assignment.soldier_id: assignment
+            for assignment in self.fixed_assignments_by_date[changed_date]
+        }
+        score_adjustments = self.score_adjustments_by_date.setdefault(changed_date, {})
+        for assignment in changed_assignments:
+            previous_assignment = fixed_assignments.get(assignment.soldier_id)
+            score_adjustments[assignment.soldier_id] = (
+                score_adjustments.get(assignment.soldier_id, 0)
+                + self.get_assignment_weight(assignment)
+                - (self.get_assignment_weight(previous_assignment) if previous_assignment else 0)
             )
-            for day_assignment in day_assignments:
-                day_assignment.day = new_day
-            self.calculated_days.append(new_day)
-            new_calculated_days.append(new_day)
-        return new_calculated_days
+            fixed_assignments[assignment.soldier_id] = assignment
+        self.fixed_assignments_by_date[changed_date] = list(fixed_assignments.values())
+        self.restore_checkpoint(checkpoint)
+        changed_days: List[DayRecord] = []
+        for date_to_calculate in dates_to_replan:
+            day = self.calculate_day(date_to_calculate)
+            if (
+                self.get_assignments_by_soldier(date_to_calculate)
+                != previous_assignments[date_to_calculate]
+            ):
+                changed_days.append(day)
+        return changed_days
 
     def get_new_day_assignments(
-        self, day: Day, existing_assignments: List[DaySoldierAssignment]
-    ) -> List[DaySoldierAssignment]:
-        prev_day: Optional[Day] = self.calculated_days[0] if self.calculated_days else None
-        new_assignments = deepcopy(existing_assignments)
+        self, day: DayRecord, existing_assignments: List[AssignmentRecord]
+    ) -> List[AssignmentRecord]:
+        """
+        Pops soldiers off the score queue, lowest running score first, only while the day
+        still has shifts to fill. Everyone after that gets an edge case, fallback or default
+        assignment whatever their rank, so they are assigned in roster order without being
+        ranked. Popped soldiers whose score did not change are pushed back, the others were
+        already pushed with their new score.
+        """
+        snapshot = self.get_snapshot()
+        prev_day: Optional[DayRecord] = self.calculated_days[0] if self.calculated_days else None
+        weekend_or_weekday = utils.get_weekend_or_weekday(day.date)
+        with self.profile.phase("object_construction"):
+            new_assignments = list(existing_assignments)
+        assigned_soldier_ids = {assignment.soldier_id for assignment in new_assignments}
+        filled_mask = self.eligibility_masks.get_filled_mask(new_assignments)
+        popped_soldier_ids: List[str] = []
+        while self.soldier_queue and self.eligibility_masks.get_shifts_to_fill(
+            filled_mask, weekend_or_weekday
+        ):
+            with self.profile.phase("sort_soldiers"):
+                soldier_id, _ = self.soldier_queue.pop()
+            popped_soldier_ids.append(soldier_id)
+            if soldier_id in assigned_soldier_ids:
+                continue
+            assigned_soldier_ids.add(soldier_id)
+            filled_mask = self.add_new_day_assignment(
+                snapshot.soldiers_by_id[soldier_id],
+                day,
+                prev_day,
+                existing_assignments,
+                new_assignments,
+                filled_mask,
+            )
         for soldier in self.soldiers:
-            prospective_assignment = self.create_new_assignment_for_soldier(
-                soldier, day, prev_day, new_assignments
+            if soldier.id in assigned_soldier_ids:
+                continue
+            filled_mask = self.add_new_day_assignment(
+                soldier, day, prev_day, existing_assignments, new_assignments, filled_mask
             )
-            if prospective_assignment:
-                new_assignments.append(prospective_assignment)
+        for soldier_id in popped_soldier_ids:
+            if soldier_id not in self.soldier_queue:
+                self.soldier_queue.push(soldier_id, self.running_scores[soldier_id])
         return new_assignments
 
+    def add_new_day_assignment(
+        self,
+        soldier: SoldierRecord,
+        day: DayRecord,
+        prev_day: Optional[DayRecord],
+        existing_assignments: List[AssignmentRecord],
+        new_assignments: List[AssignmentRecord],
+        filled_mask: int,
+    ) -> int:
+        prospective_assignment = self.create_new_assignment_for_soldier(
+            soldier, day, prev_day, existing_assignments, filled_mask
+        )
+        if not prospective_assignment:
+            return filled_mask
+        new_assignments.append(prospective_assignment)
+        self.add_assignment_to_running_score(soldier, prospective_assignment)
+        return self.eligibility_masks.fill(
+            filled_mask, utils.get_assignment(prospective_assignment.assignment)
+        )
+
     def create_new_assignment_for_soldier(
         self,
-        soldier: Soldier,
-        day: Day,
-        prev_day: Optional[Day],
-        existing_assignments: List[DaySoldierAssignment],
-    ) -> Optional[DaySoldierAssignment]:
+        soldier: SoldierRecord,
+        day: DayRecord,
+        prev_day: Optional[DayRecord],
+        existing_assignments: List[AssignmentRecord],
+        filled_mask: Optional[int] = None,
+    ) -> Optional[AssignmentRecord]:
         weekend_or_weekday: enums.WeekDayType = utils.get_weekend_or_weekday(day.date)
-        edge_case_assignment = self.handle_day_assignment_edge_cases(
-            soldier, existing_assignments, day, prev_day
-        )
+        with self.profile.phase("edge_cases"):
+            edge_case_assignment = self.handle_day_assignment_edge_cases(
+                soldier, existing_assignments, day, prev_day
+            )
         if edge_case_assignment:
             return edge_case_assignment
-        available_assignments = self.sort_assignments_by_score(
-            self.get_available_assignments(soldier, existing_assignments, day.date)
-        )
-        selected_assignment = (
-            available_assignments[0]
-            if available_assignments
-            else ShabzakEngine.default_assignment[weekend_or_weekday]
-        )
+        with self.profile.phase("available_assignments"):
+            if filled_mask is None:
+                filled_mask = self.eligibility_masks.get_filled_mask(existing_assignments)
+            selected_assignment = self.select_assignment(
+                self.eligibility_masks.get_available_mask(
+                    soldier.id, filled_mask, weekend_or_weekday
+                ),
+                weekend_or_weekday,
+            )
         if selected_assignment == enums.Assignment.Night:
             self.last_night_soldier = soldier
             self.consecutive_nights = 1
-        return DaySoldierAssignment(
-            soldier_id=soldier.id, day_id=day.id, assignment=selected_assignment.name
-        )
+        with self.profile.phase("object_construction"):
+            return AssignmentRecord(
+                soldier_id=soldier.id, day_id=day.id, assignment=selected_assignment
+            )
 
     def handle_day_assignment_edge_cases(
         self,
-        soldier: Soldier,
-        existing_assignments: List[DaySoldierAssignment],
-        day: Day,
-        prev_day: Optional[Day],
-    ) -> Optional[DaySoldierAssignment]:
+        soldier: SoldierRecord,
+        existing_assignments: List[AssignmentRecord],
+        day: DayRecord,
+        prev_day: Optional[DayRecord],
+    ) -> Optional[AssignmentRecord]:
         if [
             assignment for assignment in existing_assignments if assignment.soldier_id == soldier.id
         ]:  # Soldier already has an assignment
@@ -230,75 +473,42 @@ class ShabzakEngine:
         if (
             soldier == self.last_night_soldier
             and self.team.min_consecutive_nights > self.consecutive_nights
+            and self.eligibility_masks.allows(
+                soldier.id, enums.Assignment.Night, utils.get_weekend_or_weekday(day.date)
+            )
         ):  # Handling mininum consecutive nights
             self.consecutive_nights += 1
-            return DaySoldierAssignment(
-                soldier_id=soldier.id, day_id=day.id, assignment=enums.Assignment.Night.name
+            return AssignmentRecord(
+                soldier_id=soldier.id, day_id=day.id, assignment=enums.Assignment.Night
             )
         if prev_day:  # After-assignment calculation if applicable
             previous_soldier_assignment = self.get_soldier_assignment_for_day(prev_day, soldier)
             previous_weekend_or_weekday = utils.get_weekend_or_weekday(prev_day.date)
             if (
                 previous_soldier_assignment
-                and enums.Assignment[previous_soldier_assignment.assignment]
+                and utils.get_assignment(previous_soldier_assignment.assignment)
                 in ShabzakEngine.assigments_allowing_after[previous_weekend_or_weekday]
             ):
-                return DaySoldierAssignment(
-                    soldier_id=soldier.id,
-                    day_id=day.id,
-                    assignment=enums.Assignment.After.name,
+                return AssignmentRecord(
+                    soldier_id=soldier.id, day_id=day.id, assignment=enums.Assignment.After
                 )
         return None
 
+    def select_assignment(
+        self, available_mask: int, weekend_or_weekday: enums.WeekDayType
+    ) -> enums.Assignment:
+        for assignment_bit, assignment in self.assignments_by_descending_score:
+            if available_mask & assignment_bit:
+                return assignment
+        return ShabzakEngine.default_assignment[weekend_or_weekday]
+
     def get_available_assignments(
-        self, soldier: Soldier, existing_assignments: List[DaySoldierAssignment], date: date
+        self, soldier: SoldierRecord, existing_assignments: List[AssignmentRecord], date: date
     ) -> List[enums.Assignment]:
-        weekend_or_weekday = utils.get_weekend_or_weekday(date)
-        available_assignments = ShabzakEngine.filter_preexisting_assignments(
-            ShabzakEngine.default_starting_assignments[weekend_or_weekday], existing_assignments
-        )
-        if soldier.is_commander:
-            if not self.team.commanders_do_nights:
-                available_assignments = [
-                    assignment
-                    for assignment in enums.Assignment
-                    if assignment != enums.Assignment.Night
-                ]
-            if (
-                not self.team.commanders_do_weekends
-                and weekend_or_weekday == enums.WeekDayType.Weekend
-            ):
-                available_assignments = [
-                    assignment
-                    for assignment in enums.Assignment
-                    if assignment != enums.Assignment.Day
-                ]
-        if (
-            not soldier.is_close_to_base
-            and weekend_or_weekday == enums.WeekDayType.Weekend
-            and enums.Assignment.Day not in available_assignments
-        ):
-            available_assignments = [enums.Assignment.DayAndNight]
-
-        if self.team.allow_guard_to_hold_shift:
-            available_assignments = self.filter_guard_shifts(
-                available_assignments, weekend_or_weekday
+        return eligibility.from_mask(
+            self.eligibility_masks.get_available_mask(
+                soldier.id,
+                self.eligibility_masks.get_filled_mask(existing_assignments),
+                utils.get_weekend_or_weekday(date),
             )
-        return available_assignments
-
-    def filter_guard_shifts(
-        self, initial_assignments: List[enums.Assignment], weekend_or_weekday: enums.WeekDayType
-    ) -> List[enums.Assignment]:
-        available_assignments = [*initial_assignments]
-        eligible_guard_shift_types = [enums.Assignment.GuardDuty, enums.Assignment.Tashtiot]
-        shifts_to_remove = {
-            enums.WeekDayType.Weekday: [enums.Assignment.Night],
-            enums.WeekDayType.Weekend: [enums.Assignment.Day, enums.Assignment.Night],
-        }
-        if eligible_guard_shift_types in initial_assignments:
-            available_assignments = [
-                assignment
-                for assignment in available_assignments
-                if assignment not in shifts_to_remove[weekend_or_weekday]
-            ]
-        return available_assignments
+        )
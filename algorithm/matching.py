@@ -0,0 +1,186 @@
+from typing import List, Optional, Sequence, Tuple
+
+import utils
+from algorithm import eligibility
+from algorithm.main import ShabzakEngine
+from db.records import AssignmentRecord, DayRecord, SoldierRecord
+from utils import enums
+
+INELIGIBLE_COST = float("inf")
+
+
+def solve_min_cost_assignment(costs: Sequence[Sequence[float]]) -> List[Optional[int]]:
+    """
+    Hungarian algorithm for a rectangular cost matrix with no more rows than columns.
+    Returns the column matched to each row, or None when a row can only be matched at
+    INELIGIBLE_COST. Runs in O(rows^2 * columns).
+    """
+    num_rows = len(costs)
+    if not num_rows:
+        return []
+    num_columns = len(costs[0])
+    if num_rows > num_columns:
+        raise ValueError("Cost matrix must not have more rows than columns")
+    big_cost = (
+        sum(abs(cost) for row in costs for cost in row if cost != INELIGIBLE_COST) + 1
+    ) * num_rows
+    row_potentials = [0.0] * (num_rows + 1)
+    column_potentials = [0.0] * (num_columns + 1)
+    column_matches = [0] * (num_columns + 1)
+    previous_columns = [0] * (num_columns + 1)
+    for row in range(1, num_rows + 1):
+        column_matches[0] = row
+        current_column = 0
+        min_slack = [float("inf")] * (num_columns + 1)
+        used = [False] * (num_columns + 1)
+        while True:
+            used[current_column] = True
+            current_row = column_matches[current_column]
+            row_costs = costs[current_row - 1]
+            delta = float("inf")
+            next_column = 0
+            for column in range(1, num_columns + 1):
+                if used[column]:
+                    continue
+                cost = row_costs[column - 1]
+                if cost == INELIGIBLE_COST:
+                    cost = big_cost
+                slack = cost - row_potentials[current_row] - column_potentials[column]
+                if slack < min_slack[column]:
+                    min_slack[column] = slack
+                    previous_columns[column] = current_column
+                if min_slack[column] < delta:
+                    delta = min_slack[column]
+                    next_column = column
+            for column in range(num_columns + 1):
+                if used[column]:
+                    row_potentials[column_matches[column]] += delta
+                    column_potentials[column] -= delta
+                else:
+                    min_slack[column] -= delta
+            current_column = next_column
+            if not column_matches[current_column]:
+                break
+        while current_column:
+            previous_column = previous_columns[current_column]
+            column_matches[current_column] = column_matches[previous_column]
+            current_column = previous_column
+    row_matches: List[Optional[int]] = [None] * num_rows
+    for column in range(1, num_columns + 1):
+        row = column_matches[column]
+        if row and costs[row - 1][column - 1] != INELIGIBLE_COST:
+            row_matches[row - 1] = column - 1
+    return row_matches
+
+
+class MatchingShabzakEngine(ShabzakEngine):
+    """
+    Fills each day's open shifts with a minimum-cost bipartite matching between shifts and
+    soldiers instead of the greedy pass in soldier order. Edge cases (pre-existing
+    assignments, minimum consecutive nights, After) are resolved first, exactly as in the
+    greedy engine, and soldiers left without a shift fall back to the greedy choice.
+    """
+
+    def get_new_day_assignments(
+        self, day: DayRecord, existing_assignments: List[AssignmentRecord]
+    ) -> List[AssignmentRecord]:
+        prev_day: Optional[DayRecord] = self.calculated_days[0] if self.calculated_days else None
+        weekend_or_weekday = utils.get_weekend_or_weekday(day.date)
+        with self.profile.phase("object_construction"):
+            new_assignments = list(existing_assignments)
+        assigned_soldier_ids = {assignment.soldier_id for assignment in new_assignments}
+        candidates: List[SoldierRecord] = []
+        with self.profile.phase("sort_soldiers"):
+            sorted_soldiers = self.sort_soldiers_by_score()
+        for soldier in sorted_soldiers:
+            if soldier.id in assigned_soldier_ids:
+                continue
+            with self.profile.phase("edge_cases"):
+                edge_case_assignment = self.handle_day_assignment_edge_cases(
+                    soldier, existing_assignments, day, prev_day
+                )
+            if edge_case_assignment:
+                self.add_new_assignment(soldier, edge_case_assignment, new_assignments)
+            else:
+                candidates.append(soldier)
+
+        filled_mask = self.eligibility_masks.get_filled_mask(new_assignments)
+        matched_soldier_ids = set()
+        with self.profile.phase("matching"):
+            matches = self.match_soldiers_to_shifts(candidates, filled_mask, weekend_or_weekday)
+        for shift, soldier in matches:
+            if shift == enums.Assignment.Night:
+                self.last_night_soldier = soldier
+                self.consecutive_nights = 1
+            matched_soldier_ids.add(soldier.id)
+            filled_mask = self.eligibility_masks.fill(filled_mask, shift)
+            self.add_new_assignment(
+                soldier,
+                AssignmentRecord(soldier_id=soldier.id, day_id=day.id, assignment=shift),
+                new_assignments,
+            )
+
+        for soldier in candidates:
+            if soldier.id in matched_soldier_ids:
+                continue
+            with self.profile.phase("available_assignments"):
+                selected_assignment = self.select_assignment(
+                    self.eligibility_masks.get_available_mask(
+                        soldier.id, filled_mask, weekend_or_weekday
+                    ),
+                    weekend_or_weekday,
+                )
+            self.add_new_assignment(
+                soldier,
+                AssignmentRecord(
+                    soldier_id=soldier.id, day_id=day.id, assignment=selected_assignment
+                ),
+                new_assignments,
+            )
+        return new_assignments
+
+    def add_new_assignment(
+        self,
+        soldier: SoldierRecord,
+        assignment: AssignmentRecord,
+        new_assignments: List[AssignmentRecord],
+    ) -> None:
+        new_assignments.append(assignment)
+        self.add_assignment_to_running_score(soldier, assignment)
+
+    def match_soldiers_to_shifts(
+        self,
+        soldiers: List[SoldierRecord],
+        filled_mask: int,
+        weekend_or_weekday: enums.WeekDayType,
+    ) -> List[Tuple[enums.Assignment, SoldierRecord]]:
+        shifts = eligibility.from_mask(
+            self.eligibility_masks.get_open_mask(filled_mask, weekend_or_weekday)
+        )
+        if not soldiers or not shifts:
+            return []
+        lowest_score = min(self.get_running_score(soldier) for soldier in soldiers)
+        soldier_costs = [self.get_running_score(soldier) - lowest_score + 1 for soldier in soldiers]
+        available_masks = [
+            self.eligibility_masks.get_available_mask(soldier.id, filled_mask, weekend_or_weekday)
+            for soldier in soldiers
+        ]
+        costs: List[List[float]] = []
+        for shift in shifts:
+            shift_bit = eligibility.ASSIGNMENT_BITS[shift]
+            shift_score = self.get_score_for_assignment(shift).score
+            costs.append(
+                [
+                    shift_score * soldier_cost if available_mask & shift_bit else INELIGIBLE_COST
+                    for soldier_cost, available_mask in zip(soldier_costs, available_masks)
+                ]
+            )
+        if len(shifts) > len(soldiers):
+            for row in costs:
+                row.extend([INELIGIBLE_COST] * (len(shifts) - len(soldiers)))
+        matches = solve_min_cost_assignment(costs)
+        return [
+            (shift, soldiers[soldier_index])
+            for shift, soldier_index in zip(shifts, matches)
+            if soldier_index is not None and soldier_index < len(soldiers)
+        ]
@@ -0,0 +1,65 @@
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from algorithm import get_engine_class
+from db import DBSession
+from db.models import Team
+from utils import enums, exceptions
+from utils.model_to_dict import day_to_dict
+
+TeamPlanResult = Dict[str, Any]
+
+
+def plan_team(
+    team_id: str, start_date: date, num_days: int, planning_mode: enums.PlanningMode
+) -> TeamPlanResult:
+    started_at = time.perf_counter()
+    with DBSession() as session:
+        team = session.query(Team).filter(Team.id == team_id).first()
+        if not team:
+            raise exceptions.NotFound(f"Team not found with ID {team_id}")
+        shabzak_engine = get_engine_class(planning_mode)(team)
+        days = shabzak_engine.calculate_days(start_date, num_days)
+        result = [day_to_dict(day, shabzak_engine.get_day_assignments(day)) for day in days]
+    return {
+        "team_id": team_id,
+        "status": "success",
+        "result": result,
+        "elapsed_seconds": time.perf_counter() - started_at,
+    }
+
+
+def plan_teams(
+    team_ids: List[str],
+    start_date: date,
+    num_days: int,
+    planning_mode: enums.PlanningMode = enums.PlanningMode.Greedy,
+    max_workers: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    poll_interval: float = 0.01,
+) -> Iterator[TeamPlanResult]:
+    """
+    Plans every team in its own worker process and yields each team's result as soon as it
+    finishes. Completion is polled through `sleep` so callers running inside Eel can pass
+    `eel.sleep` and keep the gevent loop serving other requests while they wait.
+    """
+    if not team_ids:
+        return
+    max_workers = max_workers or min(len(team_ids), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending: Dict[Future, str] = {
+            executor.submit(plan_team, team_id, start_date, num_days, planning_mode): team_id
+            for team_id in team_ids
+        }
+        while pending:
+            for future in [future for future in pending if future.done()]:
+                team_id = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield {"team_id": team_id, "status": "error", "error": str(e)}
+            if pending:
+                sleep(poll_interval)
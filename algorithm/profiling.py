@@ -0,0 +1,125 @@
+import os
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, ContextManager, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import db
+
+MAX_PROFILES = 50
+UNPHASED = "unphased"
+
+profiling_enabled = os.environ.get("SHABZAK_PROFILE") == "1"
+profiles: Deque[Dict[str, Any]] = deque(maxlen=MAX_PROFILES)
+# Profiles running in the current thread or greenlet; Eel serves every call as a greenlet on
+# one thread, so a thread ID alone would count other calls' statements against a run
+running_profiles: ContextVar[Tuple["EngineProfile", ...]] = ContextVar(
+    "running_profiles", default=()
+)
+
+
+@dataclass
+class PhaseStats:
+    seconds: float = 0.0
+    calls: int = 0
+    queries: int = 0
+
+
+class EngineProfile:
+    """
+    Wall time, call count and SQL statements per phase of one engine run. Phases may nest;
+    time is inclusive, and every statement is counted once, under the innermost phase open
+    in the thread or greenlet that started the run.
+    """
+
+    def __init__(self, engine_name: str, team_id: str) -> None:
+        self.engine_name = engine_name
+        self.team_id = team_id
+        self.phases: Dict[str, PhaseStats] = {}
+        self.phase_stack: List[str] = []
+        self.created_at = time.time()
+        self.started_at = time.perf_counter()
+        self.db_engine: Optional[Engine] = db.db_engine
+        running_profiles.set(running_profiles.get() + (self,))
+        event.listen(self.db_engine, "before_cursor_execute", self.on_execute)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.phase_stack.append(name)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.get_phase_stats(name)
+            stats.seconds += time.perf_counter() - started_at
+            stats.calls += 1
+            self.phase_stack.pop()
+
+    def get_phase_stats(self, name: str) -> PhaseStats:
+        stats = self.phases.get(name)
+        if not stats:
+            stats = self.phases[name] = PhaseStats()
+        return stats
+
+    def on_execute(self, *_: Any) -> None:
+        if self in running_profiles.get():
+            self.get_phase_stats(
+                self.phase_stack[-1] if self.phase_stack else UNPHASED
+            ).queries += 1
+
+    def finish(self) -> None:
+        if not self.db_engine:
+            return
+        event.remove(self.db_engine, "before_cursor_execute", self.on_execute)
+        self.db_engine = None
+        running_profiles.set(
+            tuple(profile for profile in running_profiles.get() if profile is not self)
+        )
+        profiles.append(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "engine": self.engine_name,
+            "team_id": self.team_id,
+            "created_at": self.created_at,
+            "total_seconds": time.perf_counter() - self.started_at,
+            "total_queries": sum(stats.queries for stats in self.phases.values()),
+            "phases": {name: asdict(stats) for name, stats in self.phases.items()},
+        }
+
+
+class NullProfile:
+    """Stands in for EngineProfile while profiling is disabled, at the cost of a no-op."""
+
+    null_phase = nullcontext()
+
+    def phase(self, name: str) -> ContextManager[None]:
+        return self.null_phase
+
+    def finish(self) -> None:
+        pass
+
+
+NULL_PROFILE = NullProfile()
+
+
+def start_profile(engine_name: str, team_id: str) -> Union[EngineProfile, NullProfile]:
+    if not profiling_enabled:
+        return NULL_PROFILE
+    return EngineProfile(engine_name, team_id)
+
+
+def set_profiling_enabled(enabled: bool) -> None:
+    global profiling_enabled
+    profiling_enabled = enabled
+
+
+def get_profiles(limit: int) -> List[Dict[str, Any]]:
+    if limit <= 0:
+        return []
+    return list(profiles)[-limit:][::-1]
@@ -0,0 +1,54 @@
+import heapq
+import itertools
+from typing import Dict, Iterator, List, Optional, Tuple
+
+HeapEntry = Tuple[int, int, str]
+
+
+class SoldierScoreQueue:
+    """
+    Min-heap of soldier IDs keyed by running score. Updating a soldier pushes a new entry and
+    leaves the old one to be skipped on pop, so every operation costs O(log n). The heap is
+    rebuilt from the live entries once stale ones outnumber them.
+    """
+
+    def __init__(self, scores: Optional[Dict[str, int]] = None) -> None:
+        self.heap: List[HeapEntry] = []
+        self.entries: Dict[str, HeapEntry] = {}
+        self.counter: Iterator[int] = itertools.count()
+        for soldier_id, score in (scores or {}).items():
+            self.push(soldier_id, score)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, soldier_id: str) -> bool:
+        return soldier_id in self.entries
+
+    def push(self, soldier_id: str, score: int) -> None:
+        entry = (score, next(self.counter), soldier_id)
+        self.entries[soldier_id] = entry
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * len(self.entries) + 1:
+            self.heap = list(self.entries.values())
+            heapq.heapify(self.heap)
+
+    def pop(self) -> Tuple[str, int]:
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            score, _, soldier_id = entry
+            if self.entries.get(soldier_id) is entry:
+                del self.entries[soldier_id]
+                return soldier_id, score
+        raise KeyError("pop from an empty SoldierScoreQueue")
+
+    def copy(self) -> "SoldierScoreQueue":
+        queue = SoldierScoreQueue()
+        queue.entries = dict(self.entries)
+        queue.heap = list(self.entries.values())
+        heapq.heapify(queue.heap)
+        queue.counter = itertools.count(max((entry[1] for entry in queue.heap), default=-1) + 1)
+        return queue
+
+    def drain(self) -> List[str]:
+        return [self.pop()[0] for _ in range(len(self))]
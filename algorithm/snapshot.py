@@ -0,0 +1,197 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import desc
+
+import utils
+from db import DBSession
+from db.history import AssignmentHistory, load_history
+from db.models import AssignmentScore, Day, DaySoldierAssignment, Score, Soldier, Team, Timetable
+from db.records import AssignmentRecord, DayRecord, SoldierRecord
+from utils import exceptions
+
+
+class TeamSnapshot:
+    """
+    Team data for one planning window, loaded with a fixed number of queries and detached
+    from the session, so the engine plans against in-memory indexes only. Soldiers, days and
+    assignments are kept as immutable records rather than mapped instances. Lookback
+    assignments come from the timetable's stored AssignmentHistory, and `history` keeps the
+    whole window, lookback and horizon, as a code matrix in step with the records.
+    """
+
+    def __init__(
+        self,
+        team: Team,
+        timetable: Timetable,
+        soldiers: List[SoldierRecord],
+        scores: List[Score],
+        assignment_scores: List[AssignmentScore],
+        days: List[DayRecord],
+        assignments: List[AssignmentRecord],
+        start_date: date,
+        num_days: int,
+        lookback_days: int,
+        history: Optional[AssignmentHistory] = None,
+    ) -> None:
+        self.team: Team = team
+        self.timetable: Timetable = timetable
+        self.soldiers: List[SoldierRecord] = soldiers
+        self.scores: List[Score] = scores
+        self.assignment_scores: List[AssignmentScore] = assignment_scores
+        self.start_date: date = start_date
+        self.end_date: date = start_date + timedelta(days=num_days)
+        self.lookback_days: int = lookback_days
+        self.lookback_start_date: date = start_date - timedelta(days=lookback_days)
+        self.soldiers_by_id: Dict[str, SoldierRecord] = {
+            soldier.id: soldier for soldier in soldiers
+        }
+        self.days_by_date: Dict[date, DayRecord] = {day.date: day for day in days}
+        self.assignments_by_date: Dict[date, List[AssignmentRecord]] = defaultdict(list)
+        self.assignments_by_date_and_soldier: Dict[Tuple[date, str], AssignmentRecord] = {}
+        self.history: AssignmentHistory = (
+            history or AssignmentHistory.empty(timetable.id, self.lookback_start_date)
+        ).get_window(self.lookback_start_date, self.end_date, [soldier.id for soldier in soldiers])
+        days_by_id = {day.id: day for day in days}
+        for assignment in assignments:
+            self.add_assignment(days_by_id[assignment.day_id].date, assignment)
+        # What was loaded, for reset to go back to once a plan has been set over it
+        self.stored_assignments_by_date: Dict[date, List[AssignmentRecord]] = {
+            day_date: list(day_assignments)
+            for day_date, day_assignments in self.assignments_by_date.items()
+        }
+        self.stored_history: AssignmentHistory = self.history.get_window(
+            self.lookback_start_date, self.end_date, list(self.history.soldier_ids)
+        )
+
+    @classmethod
+    def load(
+        cls, team: Team, start_date: date, num_days: int, lookback_days: int
+    ) -> "TeamSnapshot":
+        lookback_start_date = start_date - timedelta(days=lookback_days)
+        end_date = start_date + timedelta(days=num_days)
+        with DBSession() as session:
+            timetable = session.query(Timetable).filter(Timetable.team_id == team.id).first()
+            if not timetable:
+                raise exceptions.NotFound(f"Cannot find timetable for team ID {team.id}")
+            soldiers = session.query(Soldier).filter(Soldier.team_id == team.id).all()
+            scores = session.query(Score).filter(Score.team_id == team.id).all()
+            assignment_scores = session.query(AssignmentScore).all()
+            history = load_history(session, timetable.id)
+            days = (
+                session.query(Day)
+                .filter(
+                    Day.timetable_id == timetable.id,
+                    Day.date >= lookback_start_date,
+                    Day.date < end_date,
+                )
+                .order_by(desc(Day.date))
+                .all()
+            )
+            assignments = (
+                session.query(DaySoldierAssignment)
+                .join(Day, DaySoldierAssignment.day_id == Day.id)
+                .filter(
+                    Day.timetable_id == timetable.id,
+                    Day.date >= start_date,
+                    Day.date < end_date,
+                )
+                .all()
+            )
+            session.expunge_all()
+        day_records = [DayRecord.from_model(day) for day in days]
+        return cls(
+            team,
+            timetable,
+            [SoldierRecord.from_model(soldier) for soldier in soldiers],
+            scores,
+            assignment_scores,
+            day_records,
+            [
+                assignment
+                for day in day_records
+                if day.date < start_date
+                for assignment in history.get_assignment_records(day)
+            ]
+            + [AssignmentRecord.from_model(assignment) for assignment in assignments],
+            start_date,
+            num_days,
+            lookback_days,
+            history,
+        )
+
+    def reset(self) -> None:
+        """Drops every assignment set since the snapshot was loaded, keeping the loaded ones."""
+        self.assignments_by_date = defaultdict(list)
+        self.assignments_by_date_and_soldier = {}
+        for day_date, day_assignments in self.stored_assignments_by_date.items():
+            self.assignments_by_date[day_date] = list(day_assignments)
+            for assignment in day_assignments:
+                self.assignments_by_date_and_soldier[(day_date, assignment.soldier_id)] = assignment
+        self.history = self.stored_history.get_window(
+            self.lookback_start_date, self.end_date, list(self.stored_history.soldier_ids)
+        )
+
+    def covers(self, start_date: date, num_days: int) -> bool:
+        return (
+            self.lookback_start_date <= start_date
+            and start_date + timedelta(days=num_days) <= self.end_date
+        )
+
+    def get_lookback_days(self, start_date: date) -> List[DayRecord]:
+        """Stored days in the lookback before `start_date`, most recent first."""
+        lookback_start_date = max(
+            self.lookback_start_date, start_date - timedelta(days=self.lookback_days)
+        )
+        return [
+            day
+            for day_date, day in self.days_by_date.items()
+            if lookback_start_date <= day_date < start_date
+        ]
+
+    def get_day(self, day_date: date) -> Optional[DayRecord]:
+        return self.days_by_date.get(day_date)
+
+    def get_assignments_for_date(self, day_date: date) -> List[AssignmentRecord]:
+        return self.assignments_by_date.get(day_date, [])
+
+    def get_soldier_assignment(self, day_date: date, soldier_id: str) -> Optional[AssignmentRecord]:
+        return self.assignments_by_date_and_soldier.get((day_date, soldier_id))
+
+    def add_assignment(self, day_date: date, assignment: AssignmentRecord) -> None:
+        self.assignments_by_date[day_date].append(assignment)
+        self.assignments_by_date_and_soldier[(day_date, assignment.soldier_id)] = assignment
+        self.history.set_assignment(
+            day_date, assignment.soldier_id, utils.get_assignment(assignment.assignment)
+        )
+
+    def set_assignments_for_date(self, day_date: date, assignments: List[AssignmentRecord]) -> None:
+        for assignment in self.assignments_by_date.pop(day_date, []):
+            self.assignments_by_date_and_soldier.pop((day_date, assignment.soldier_id), None)
+        if assignments:
+            self.assignments_by_date[day_date] = list(assignments)
+        for assignment in assignments:
+            self.assignments_by_date_and_soldier[(day_date, assignment.soldier_id)] = assignment
+        self.history.set_assignments_for_date(
+            day_date,
+            [
+                (assignment.soldier_id, utils.get_assignment(assignment.assignment))
+                for assignment in assignments
+            ],
+        )
+
+    def replace_soldier_assignment(self, day_date: date, assignment: AssignmentRecord) -> None:
+        """Swaps the soldier's stored assignment on `day_date` for `assignment`, in place."""
+        day_assignments = self.assignments_by_date[day_date]
+        previous_assignment = self.assignments_by_date_and_soldier.get(
+            (day_date, assignment.soldier_id)
+        )
+        if previous_assignment is None:
+            self.add_assignment(day_date, assignment)
+            return
+        day_assignments[day_assignments.index(previous_assignment)] = assignment
+        self.assignments_by_date_and_soldier[(day_date, assignment.soldier_id)] = assignment
+        self.history.set_assignment(
+            day_date, assignment.soldier_id, utils.get_assignment(assignment.assignment)
+        )
@@ -0,0 +1,254 @@
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+import utils
+from algorithm import eligibility, profiling
+from algorithm.main import ShabzakEngine
+from algorithm.snapshot import TeamSnapshot
+from db.history import ASSIGNMENT_CODES, ASSIGNMENTS, NO_ASSIGNMENT
+from db.records import AssignmentRecord, DayRecord
+from utils import enums, exceptions
+
+WEEKDAY_TYPES: List[enums.WeekDayType] = list(enums.WeekDayType)
+WEEKDAY_TYPE_INDEXES: Dict[enums.WeekDayType, int] = {
+    weekend_or_weekday: index for index, weekend_or_weekday in enumerate(WEEKDAY_TYPES)
+}
+
+
+class HorizonArrays:
+    """
+    The planning horizon of one team as dense arrays: a soldiers x days matrix of assignment
+    codes (ordinals of enums.Assignment, NO_ASSIGNMENT where nothing is set), which of them
+    were pre-existing, the running score vector and a soldiers x weekday-type x assignment
+    eligibility tensor compiled from the team rules.
+    """
+
+    def __init__(
+        self,
+        snapshot: TeamSnapshot,
+        eligibility_masks: eligibility.EligibilityMasks,
+        running_scores: Dict[str, int],
+        assignment_weights: Dict[enums.Assignment, int],
+        start_date: date,
+        num_days: int,
+    ) -> None:
+        self.soldiers = snapshot.soldiers
+        self.soldier_indexes: Dict[str, int] = {
+            soldier.id: index for index, soldier in enumerate(self.soldiers)
+        }
+        self.dates: List[date] = [start_date + timedelta(days=days) for days in range(num_days)]
+        self.assignments = np.full((len(self.soldiers), num_days), NO_ASSIGNMENT, dtype=np.int8)
+        for day_index, day_date in enumerate(self.dates):
+            self.assignments[:, day_index] = self.get_codes_for_date(snapshot, day_date)
+        self.fixed = self.assignments != NO_ASSIGNMENT
+        self.scores = np.array(
+            [running_scores[soldier.id] for soldier in self.soldiers], dtype=np.int64
+        )
+        self.weights = np.array(
+            [assignment_weights.get(assignment, 0) for assignment in ASSIGNMENTS], dtype=np.int64
+        )
+        assignment_bits = np.array(
+            [eligibility.ASSIGNMENT_BITS[assignment] for assignment in ASSIGNMENTS],
+            dtype=np.int64,
+        )
+        self.allowed = np.zeros((len(self.soldiers), len(WEEKDAY_TYPES), len(ASSIGNMENTS)), bool)
+        self.has_fallback = np.zeros((len(self.soldiers), len(WEEKDAY_TYPES)), bool)
+        for soldier_index, soldier in enumerate(self.soldiers):
+            for weekday_type_index, weekend_or_weekday in enumerate(WEEKDAY_TYPES):
+                key = (soldier.id, weekend_or_weekday)
+                self.allowed[soldier_index, weekday_type_index] = (
+                    eligibility_masks.allowed_masks[key] & assignment_bits
+                ) != 0
+                self.has_fallback[soldier_index, weekday_type_index] = bool(
+                    eligibility_masks.fallback_masks[key]
+                )
+
+    def get_codes_for_date(self, snapshot: TeamSnapshot, day_date: date) -> np.ndarray:
+        return snapshot.history.get_codes_for_date(day_date)[: len(self.soldiers)].copy()
+
+
+class VectorizedShabzakEngine(ShabzakEngine):
+    """
+    Plans the horizon on HorizonArrays. Each day is decided with masking and a stable
+    argsort by score instead of per-soldier Python loops: edge cases (minimum consecutive
+    nights, After) are applied as masks, every open shift goes to the lowest-scored eligible
+    soldier, and everyone left gets the fallback or default assignment. The rules match the
+    greedy engine, but soldiers are ranked by score with ties kept in the previous day's
+    order, so ties can resolve differently. Each day is converted to DayRecord and
+    AssignmentRecord objects so the routes can use it like any other engine. No per-day
+    checkpoints are kept, so its plans cannot be re-planned.
+    """
+
+    replannable = False
+
+    def calculate_days(self, start_date: date, num_days_to_calculate: int) -> List[DayRecord]:
+        return list(self.iter_days(start_date, num_days_to_calculate))
+
+    def iter_days(self, start_date: date, num_days_to_calculate: int) -> Iterator[DayRecord]:
+        self.profile = profiling.start_profile(type(self).__name__, self.team.id)
+        try:
+            yield from self.iter_horizon_days(start_date, num_days_to_calculate)
+        finally:
+            self.profile.finish()
+
+    def iter_horizon_days(
+        self, start_date: date, num_days_to_calculate: int
+    ) -> Iterator[DayRecord]:
+        self.prepare_horizon(start_date, num_days_to_calculate)
+        snapshot = self.get_snapshot()
+        with self.profile.phase("build_arrays"):
+            self.horizon = HorizonArrays(
+                snapshot,
+                self.eligibility_masks,
+                self.running_scores,
+                {
+                    assignment: assignment_score.score
+                    for assignment, assignment_score in (
+                        self.assignment_scores_by_assignment.items()
+                    )
+                },
+                start_date,
+                num_days_to_calculate,
+            )
+        previous_codes: Optional[np.ndarray] = None
+        previous_weekend_or_weekday: Optional[enums.WeekDayType] = None
+        if self.calculated_days:
+            previous_codes = self.horizon.get_codes_for_date(snapshot, self.calculated_days[0].date)
+            previous_weekend_or_weekday = utils.get_weekend_or_weekday(self.calculated_days[0].date)
+        last_night_index: Optional[int] = (
+            self.horizon.soldier_indexes.get(self.last_night_soldier.id)
+            if self.last_night_soldier
+            else None
+        )
+        order = np.argsort(self.horizon.scores, kind="stable")
+        try:
+            for day_index, day_date in enumerate(self.horizon.dates):
+                with self.profile.phase("sort_soldiers"):
+                    order = order[np.argsort(self.horizon.scores[order], kind="stable")]
+                with self.profile.phase("plan_day"):
+                    last_night_index = self.plan_day(
+                        day_index,
+                        order,
+                        last_night_index,
+                        previous_codes,
+                        previous_weekend_or_weekday,
+                    )
+                previous_codes = self.horizon.assignments[:, day_index]
+                previous_weekend_or_weekday = utils.get_weekend_or_weekday(day_date)
+                with self.profile.phase("object_construction"):
+                    day = self.to_day(day_index)
+                yield day
+        finally:
+            self.last_night_soldier = (
+                self.horizon.soldiers[last_night_index] if last_night_index is not None else None
+            )
+            for soldier, score in zip(self.horizon.soldiers, self.horizon.scores.tolist()):
+                self.running_scores[soldier.id] = score
+                self.soldier_queue.push(soldier.id, score)
+
+    def plan_day(
+        self,
+        day_index: int,
+        order: np.ndarray,
+        last_night_index: Optional[int],
+        previous_codes: Optional[np.ndarray],
+        previous_weekend_or_weekday: Optional[enums.WeekDayType],
+    ) -> Optional[int]:
+        horizon = self.horizon
+        codes = horizon.assignments[:, day_index]
+        weekend_or_weekday = utils.get_weekend_or_weekday(horizon.dates[day_index])
+        weekday_type_index = WEEKDAY_TYPE_INDEXES[weekend_or_weekday]
+
+        if (
+            last_night_index is not None
+            and codes[last_night_index] == NO_ASSIGNMENT
+            and self.team.min_consecutive_nights > self.consecutive_nights
+            and horizon.allowed[
+                last_night_index, weekday_type_index, ASSIGNMENT_CODES[enums.Assignment.Night]
+            ]
+        ):
+            codes[last_night_index] = ASSIGNMENT_CODES[enums.Assignment.Night]
+            self.consecutive_nights += 1
+        if previous_codes is not None and previous_weekend_or_weekday is not None:
+            allowing_after_codes = [
+                ASSIGNMENT_CODES[assignment]
+                for assignment in ShabzakEngine.assigments_allowing_after[
+                    previous_weekend_or_weekday
+                ]
+            ]
+            codes[np.isin(previous_codes, allowing_after_codes) & (codes == NO_ASSIGNMENT)] = (
+                ASSIGNMENT_CODES[enums.Assignment.After]
+            )
+
+        filled_mask = self.get_filled_mask(codes)
+        open_mask = self.eligibility_masks.get_shifts_to_fill(filled_mask, weekend_or_weekday)
+        ranked_candidates = order[codes[order] == NO_ASSIGNMENT]
+        for assignment_bit, shift in self.assignments_by_descending_score:
+            if not open_mask & assignment_bit or not ranked_candidates.size:
+                continue
+            shift_code = ASSIGNMENT_CODES[shift]
+            eligible = np.flatnonzero(
+                horizon.allowed[ranked_candidates, weekday_type_index, shift_code]
+            )
+            if not eligible.size:
+                continue
+            soldier_index = int(ranked_candidates[eligible[0]])
+            codes[soldier_index] = shift_code
+            ranked_candidates = np.delete(ranked_candidates, eligible[0])
+            filled_mask = self.eligibility_masks.fill(filled_mask, shift)
+            if shift == enums.Assignment.Night:
+                last_night_index = soldier_index
+                self.consecutive_nights = 1
+
+        remaining = codes == NO_ASSIGNMENT
+        day_still_open = not filled_mask & eligibility.ASSIGNMENT_BITS[enums.Assignment.Day]
+        gets_fallback = (
+            remaining
+            & horizon.has_fallback[:, weekday_type_index]
+            & ~(
+                horizon.allowed[:, weekday_type_index, ASSIGNMENT_CODES[enums.Assignment.Day]]
+                & day_still_open
+            )
+        )
+        codes[gets_fallback] = ASSIGNMENT_CODES[enums.Assignment.DayAndNight]
+        codes[remaining & ~gets_fallback] = ASSIGNMENT_CODES[
+            ShabzakEngine.default_assignment[weekend_or_weekday]
+        ]
+        new_codes = codes[~horizon.fixed[:, day_index]].astype(np.int64)
+        horizon.scores[~horizon.fixed[:, day_index]] += horizon.weights[new_codes]
+        return last_night_index
+
+    def get_filled_mask(self, codes: np.ndarray) -> int:
+        filled_mask = 0
+        for code in np.unique(codes[codes != NO_ASSIGNMENT]).tolist():
+            filled_mask = self.eligibility_masks.fill(filled_mask, ASSIGNMENTS[code])
+        return filled_mask
+
+    def to_day(self, day_index: int) -> DayRecord:
+        snapshot = self.get_snapshot()
+        horizon = self.horizon
+        day_date = horizon.dates[day_index]
+        day = self.get_planned_day(day_date)
+        stored_assignments = snapshot.get_assignments_for_date(day_date)
+        self.fixed_assignments_by_date[day_date] = stored_assignments
+        new_assignments = [
+            AssignmentRecord(
+                soldier_id=horizon.soldiers[soldier_index].id,
+                day_id=day.id,
+                assignment=ASSIGNMENTS[code],
+            )
+            for soldier_index, code in enumerate(horizon.assignments[:, day_index].tolist())
+            if not horizon.fixed[soldier_index, day_index]
+        ]
+        snapshot.set_assignments_for_date(day_date, stored_assignments + new_assignments)
+        self.planned_days[day_date] = day
+        return day
+
+    def replan_from(
+        self, changed_date: date, changed_assignments: List[AssignmentRecord]
+    ) -> List[DayRecord]:
+        raise exceptions.NotReplannable(
+            "Plans of the vectorized planner cannot be re-planned, it keeps no per-day checkpoints"
+        )
@@ -0,0 +1,120 @@
+"""
+Compares the database profiles on commit-heavy and read-heavy workloads, each in its own
+throwaway SQLite file seeded with the same synthetic roster.
+
+    python -m benchmarks.db_profiles --soldiers 200 --days 30 --reads 200
+
+The commit workloads plan `--days` days and commit them through
+commit_prospective_assignments, once as a single plan and once a day per call, and override
+every soldier's score one transaction at a time. The read workload cycles through the read
+routes the UI refreshes most. Echo logging is left out
+unless `--with-echo` is given, so the numbers compare the storage settings.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from dataclasses import replace
+from datetime import timedelta
+from typing import Any, Callable, Dict, List
+
+import db
+from benchmarks.suite import START_DATE, SyntheticTeam, generate_team
+from db.init_db import init_db
+from db.profiles import PROFILES
+from routes import day_soldier_assignment as day_soldier_assignment_routes
+from routes import score as score_routes
+from routes import shabzak_engine as shabzak_engine_routes
+from routes import soldier as soldier_routes
+from routes import team as team_routes
+
+
+def plan_days(synthetic_team: SyntheticTeam, offset_days: int, num_days: int) -> List[Dict]:
+    start_date = START_DATE + timedelta(days=offset_days)
+    response = shabzak_engine_routes.get_prospective_future_assignments(
+        synthetic_team.team_id, start_date.isoformat(), num_days
+    )
+    if response["status"] != "success":
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
+def commit(days: List[Dict]) -> None:
+    response = shabzak_engine_routes.commit_prospective_assignments({"days": days})
+    if response["status"] != "success":
+        raise RuntimeError(response["error"])
+
+
+def override_scores(synthetic_team: SyntheticTeam) -> None:
+    response = soldier_routes.get_soldiers_for_team(synthetic_team.team_id)
+    for index, soldier in enumerate(response["data"]):
+        score_routes.override_score_for_soldier(soldier["id"], index)
+
+
+def read_routes(synthetic_team: SyntheticTeam) -> List[Callable[[], Any]]:
+    return [
+        team_routes.get_teams,
+        lambda: team_routes.get_team(synthetic_team.team_id),
+        lambda: soldier_routes.get_soldiers_for_team(synthetic_team.team_id),
+        lambda: score_routes.get_scores_for_team(synthetic_team.team_id),
+        lambda: day_soldier_assignment_routes.get_day_soldier_assignments(
+            synthetic_team.history_day_id
+        ),
+    ]
+
+
+def timed(run: Callable[[], Any]) -> float:
+    started_at = time.perf_counter()
+    run()
+    return (time.perf_counter() - started_at) * 1000
+
+
+def benchmark_profile(profile_name: str, args: argparse.Namespace) -> Dict[str, float]:
+    profile = PROFILES[profile_name]
+    if not args.with_echo:
+        profile = replace(profile, echo=False)
+    with tempfile.TemporaryDirectory(prefix="shabzak-db-profile-") as directory:
+        db.bind_database(os.path.join(directory, "benchmark.db"), profile)
+        init_db()
+        synthetic_team = generate_team(args.soldiers, args.history_days, random.Random(args.seed))
+        plan = plan_days(synthetic_team, 0, args.days)
+        daily_plan = plan_days(synthetic_team, args.days, args.days)
+        routes = read_routes(synthetic_team)
+        results = {
+            "commit_plan_ms": timed(lambda: commit(plan)),
+            "commit_daily_ms": timed(lambda: [commit([day]) for day in daily_plan]),
+            "score_edits_ms": timed(lambda: override_scores(synthetic_team)),
+            "reads_ms": timed(
+                lambda: [routes[index % len(routes)]() for index in range(args.reads)]
+            ),
+        }
+        db.db_engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--soldiers", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--history-days", type=int, default=90)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--with-echo", action="store_true")
+    args = parser.parse_args()
+    for profile_name in args.profiles:
+        results = benchmark_profile(profile_name, args)
+        print(
+            f"{profile_name:>10}: commit plan {results['commit_plan_ms']:8.1f} ms, "
+            f"commit {args.days} days one by one {results['commit_daily_ms']:8.1f} ms, "
+            f"{args.soldiers} score edits {results['score_edits_ms']:8.1f} ms, "
+            f"{args.reads} reads {results['reads_ms']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compares the planning modes of ShabzakEngine on a synthetic in-memory team.
+
+    python -m benchmarks.engine_modes --soldiers 200 --days 30
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import date
+from typing import Dict, List
+
+from algorithm import get_engine_class
+from algorithm.snapshot import TeamSnapshot
+from db.models import AssignmentScore, Score, Soldier, Team, Timetable
+from db.records import SoldierRecord
+from utils import enums
+
+
+def build_snapshot(num_soldiers: int, num_days: int, start_date: date, seed: int) -> TeamSnapshot:
+    rng = random.Random(seed)
+    team = Team(id=str(uuid.uuid4()), name="Benchmark", min_consecutive_nights=2)
+    timetable = Timetable(id=str(uuid.uuid4()), team_id=team.id)
+    soldiers: List[SoldierRecord] = []
+    scores: List[Score] = []
+    for index in range(num_soldiers):
+        score = Score(id=str(uuid.uuid4()), team_id=team.id, score=rng.randint(0, 50))
+        soldiers.append(
+            SoldierRecord.from_model(
+                Soldier(
+                    id=str(uuid.uuid4()),
+                    first_name=f"Soldier{index}",
+                    last_name="Benchmark",
+                    team_id=team.id,
+                    is_commander=rng.random() < 0.1,
+                    is_close_to_base=rng.random() < 0.7,
+                    score_id=score.id,
+                    score=score,
+                )
+            )
+        )
+        scores.append(score)
+    assignment_scores = [
+        AssignmentScore(id=str(uuid.uuid4()), assignment=assignment, score=score)
+        for assignment, score in enums.DEFAULT_ASSIGNMENT_SCORES.items()
+    ]
+    return TeamSnapshot(
+        team, timetable, soldiers, scores, assignment_scores, [], [], start_date, num_days, 0
+    )
+
+
+def run_mode(
+    planning_mode: enums.PlanningMode, num_soldiers: int, num_days: int, seed: int
+) -> Dict[str, float]:
+    start_date = date(2025, 1, 5)
+    snapshot = build_snapshot(num_soldiers, num_days, start_date, seed)
+    engine = get_engine_class(planning_mode)(snapshot.team, snapshot)
+    started_at = time.perf_counter()
+    engine.calculate_days(start_date, num_days)
+    elapsed = time.perf_counter() - started_at
+    running_scores = list(engine.running_scores.values())
+    return {
+        "total_ms": elapsed * 1000,
+        "ms_per_day": elapsed * 1000 / num_days,
+        "score_stdev": statistics.pstdev(running_scores),
+        "score_spread": max(running_scores) - min(running_scores),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--soldiers", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for planning_mode in enums.PlanningMode:
+        result = run_mode(planning_mode, args.soldiers, args.days, args.seed)
+        print(
+            f"{planning_mode.value:>10}: {result['total_ms']:9.1f} ms total, "
+            f"{result['ms_per_day']:7.2f} ms/day, "
+            f"score stdev {result['score_stdev']:6.2f}, spread {result['score_spread']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures how much the local-search pass improves score fairness for several time budgets.
+
+    python -m benchmarks.local_search --soldiers 200 --days 30 --budgets 100 250 500 1000
+
+Exits with an error if the pass gave any soldier an assignment they may not hold.
+"""
+
+import argparse
+import sys
+from datetime import date
+from typing import Set, Tuple
+
+import utils
+from algorithm import get_engine_class
+from algorithm.local_search import LocalSearchOptimizer
+from algorithm.main import ShabzakEngine
+from benchmarks.engine_modes import build_snapshot
+from utils import enums
+
+NIGHT_ASSIGNMENTS = [enums.Assignment.Night, enums.Assignment.DayAndNight]
+
+
+def get_rule_violations(engine: ShabzakEngine) -> Set[Tuple[str, date]]:
+    """
+    The planned (soldier ID, date) cells that break an eligibility rule: a night for a
+    commander whose team keeps commanders off nights, or DayAndNight for a soldier close to
+    base.
+    """
+    snapshot = engine.get_snapshot()
+    violations = set()
+    for day_date in engine.planned_days:
+        for soldier in snapshot.soldiers:
+            assignment_record = snapshot.get_soldier_assignment(day_date, soldier.id)
+            if not assignment_record:
+                continue
+            assignment = utils.get_assignment(assignment_record.assignment)
+            if (
+                soldier.is_commander
+                and not engine.team.commanders_do_nights
+                and assignment in NIGHT_ASSIGNMENTS
+            ) or (soldier.is_close_to_base and assignment == enums.Assignment.DayAndNight):
+                violations.add((soldier.id, day_date))
+    return violations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--soldiers", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument(
+        "--mode", choices=[mode.value for mode in enums.PlanningMode], default="greedy"
+    )
+    args = parser.parse_args()
+    start_date = date(2025, 1, 5)
+    num_new_violations = 0
+    for budget_ms in args.budgets:
+        snapshot = build_snapshot(args.soldiers, args.days, start_date, args.seed)
+        engine = get_engine_class(enums.PlanningMode(args.mode))(snapshot.team, snapshot)
+        engine.calculate_days(start_date, args.days)
+        planned_violations = get_rule_violations(engine)
+        report = LocalSearchOptimizer(engine, seed=args.seed).optimize(budget_ms)
+        new_violations = get_rule_violations(engine) - planned_violations
+        num_new_violations += len(new_violations)
+        print(
+            f"{budget_ms:>6} ms budget: stdev {report.initial_stdev:6.2f} -> "
+            f"{report.final_stdev:6.2f}, {report.improvement_per_100ms:5.2f} per 100 ms, "
+            f"{report.accepted_moves} of {report.iterations} moves accepted, "
+            f"{len(new_violations)} rule violations introduced"
+        )
+    if num_new_violations:
+        sys.exit(f"Local search introduced {num_new_violations} rule violations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares the compiled model serializers with the reflective model_to_dict they replaced,
+on rows loaded from a throwaway SQLite file seeded with a synthetic roster.
+
+    python -m benchmarks.serializers --soldiers 200 --history-days 30 --repeat 5
+
+Each mode serializes every loaded soldier, score and day assignment: `reflective` inspects
+the mapper for every row, `compiled` calls model_to_dict per row and `batch` serializes each
+result set with models_to_dicts. Rows are loaded once up front, so only serialization is
+timed.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy.inspection import inspect
+
+import db
+from benchmarks.suite import generate_team
+from db import DBSession
+from db.init_db import init_db
+from db.models import DaySoldierAssignment, Score, Soldier
+from utils.model_to_dict import model_to_dict, models_to_dicts
+
+
+def reflective_model_to_dict(model: Any) -> Dict[str, Any]:
+    """The previous model_to_dict, kept here as the baseline."""
+
+    def process_field(field: Any) -> Any:
+        if isinstance(field, list):
+            return [process_field(item) for item in field]
+        elif hasattr(field, "__table__"):
+            return reflective_model_to_dict(field)
+        return field
+
+    return {
+        column.key: process_field(getattr(model, column.key))
+        for column in inspect(model).mapper.column_attrs
+    }
+
+
+MODES: Dict[str, Callable[[List[Any]], List[Dict[str, Any]]]] = {
+    "reflective": lambda models: [reflective_model_to_dict(model) for model in models],
+    "compiled": lambda models: [model_to_dict(model) for model in models],
+    "batch": models_to_dicts,
+}
+
+
+def load_result_sets() -> List[List[Any]]:
+    with DBSession() as session:
+        result_sets = [
+            session.query(Soldier).all(),
+            session.query(Score).all(),
+            session.query(DaySoldierAssignment).all(),
+        ]
+        # Loaded attributes stay readable once the objects are detached
+        session.expunge_all()
+    return result_sets
+
+
+def benchmark(args: argparse.Namespace) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="shabzak-serializers-") as directory:
+        db.bind_database(os.path.join(directory, "benchmark.db"))
+        init_db()
+        generate_team(args.soldiers, args.history_days, random.Random(args.seed))
+        result_sets = load_result_sets()
+        db.db_engine.dispose()
+    num_rows = sum(len(result_set) for result_set in result_sets)
+    print(f"{num_rows} rows")
+    results = {}
+    for mode, serialize in MODES.items():
+        timings = []
+        for _ in range(args.repeat):
+            started_at = time.perf_counter()
+            for result_set in result_sets:
+                serialize(result_set)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        results[mode] = statistics.median(timings)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--soldiers", type=int, default=200)
+    parser.add_argument("--history-days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    results = benchmark(args)
+    for mode, elapsed_ms in results.items():
+        print(
+            f"{mode:>10}: {elapsed_ms:8.1f} ms "
+            f"({results['reflective'] / elapsed_ms:4.1f}x the reflective serializer)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Benchmarks the planning engines and the hot Eel routes on a seeded synthetic roster written
+into a throwaway SQLite file, across a matrix of team sizes and horizons.
+
+    python -m benchmarks.suite run --output benchmarks/baseline.json
+    python -m benchmarks.suite compare benchmarks/baseline.json benchmarks/current.json
+
+Every case records its best wall time over `--repeat` runs, plus the SQL statements and the
+peak Python memory of one extra traced run. `compare` exits with status 1 when a case got
+slower or hungrier than `--threshold` allows, or issues more queries than before.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, insert
+
+import db
+import utils
+from algorithm import get_engine_class
+from algorithm.bcp import BCPEngine
+from db import DBSession
+from db.init_db import init_db
+from db.models import BCPDay, Day, DaySoldierAssignment, Score, Soldier, Team
+from routes import day_soldier_assignment as day_soldier_assignment_routes
+from routes import shabzak_engine as shabzak_engine_routes
+from routes import soldier as soldier_routes
+from utils import enums
+
+START_DATE = date(2025, 1, 5)
+DEFAULT_SOLDIERS = [10, 50, 200, 500]
+DEFAULT_DAYS = [7, 30, 365]
+DEFAULT_HISTORY_DAYS = 365
+DEFAULT_THRESHOLD = 0.2
+SHIFTS = {
+    enums.WeekDayType.Weekday: [
+        enums.Assignment.Morning,
+        enums.Assignment.Afternoon,
+        enums.Assignment.Night,
+    ],
+    enums.WeekDayType.Weekend: [enums.Assignment.Day, enums.Assignment.Night],
+}
+DEFAULT_ASSIGNMENTS = {
+    enums.WeekDayType.Weekday: enums.Assignment.Morning,
+    enums.WeekDayType.Weekend: enums.Assignment.WeekendHome,
+}
+
+
+@dataclass
+class SyntheticTeam:
+    team_id: str
+    num_soldiers: int
+    history_day_id: str
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    run: Callable[[SyntheticTeam, int], Any]
+    uses_days: bool = True
+
+
+def new_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+
+def generate_team(num_soldiers: int, history_days: int, rng: random.Random) -> SyntheticTeam:
+    """
+    Writes a team with `num_soldiers` soldiers and `history_days` days of main and BCP
+    history before START_DATE, one assignment per soldier per day.
+    """
+    with DBSession() as session:
+        team = Team(id=new_id(rng), name=f"Benchmark {num_soldiers}", min_consecutive_nights=2)
+        session.add(team)
+        soldiers = []
+        for index in range(num_soldiers):
+            score = Score(id=new_id(rng), team_id=team.id, score=rng.randint(0, 50))
+            soldiers.append(
+                Soldier(
+                    id=new_id(rng),
+                    first_name=f"Soldier{index}",
+                    last_name="Benchmark",
+                    team_id=team.id,
+                    is_commander=rng.random() < 0.1,
+                    is_close_to_base=rng.random() < 0.7,
+                    score=score,
+                )
+            )
+        session.add_all(soldiers)
+        session.flush()
+        soldier_ids = [soldier.id for soldier in soldiers]
+        close_soldier_ids = [soldier.id for soldier in soldiers if soldier.is_close_to_base]
+        day_rows: List[Dict[str, Any]] = []
+        assignment_rows: List[Dict[str, Any]] = []
+        bcp_day_rows: List[Dict[str, Any]] = []
+        for days_before in range(history_days, 0, -1):
+            day_date = START_DATE - timedelta(days=days_before)
+            weekend_or_weekday = utils.get_weekend_or_weekday(day_date)
+            day_id = new_id(rng)
+            day_rows.append({"id": day_id, "date": day_date, "timetable_id": team.timetable.id})
+            shuffled_soldier_ids = rng.sample(soldier_ids, len(soldier_ids))
+            shifts = SHIFTS[weekend_or_weekday]
+            for index, soldier_id in enumerate(shuffled_soldier_ids):
+                assignment = (
+                    shifts[index]
+                    if index < len(shifts)
+                    else DEFAULT_ASSIGNMENTS[weekend_or_weekday]
+                )
+                assignment_rows.append(
+                    {
+                        "id": new_id(rng),
+                        "soldier_id": soldier_id,
+                        "day_id": day_id,
+                        "assignment": assignment,
+                    }
+                )
+            if len(close_soldier_ids) >= 2:
+                morning_soldier_id, night_soldier_id = rng.sample(close_soldier_ids, 2)
+                bcp_day_rows.append(
+                    {
+                        "id": new_id(rng),
+                        "date": day_date,
+                        "timetable_id": team.bcp_timetable.id,
+                        "morning_soldier_id": morning_soldier_id,
+                        "night_soldier_id": night_soldier_id,
+                    }
+                )
+        if day_rows:
+            session.execute(insert(Day), day_rows)
+            session.execute(insert(DaySoldierAssignment), assignment_rows)
+        if bcp_day_rows:
+            session.execute(insert(BCPDay), bcp_day_rows)
+        return SyntheticTeam(team.id, num_soldiers, day_rows[-1]["id"] if day_rows else "")
+
+
+def plan_with_engine(planning_mode: enums.PlanningMode) -> Callable[[SyntheticTeam, int], Any]:
+    def run(synthetic_team: SyntheticTeam, num_days: int) -> Any:
+        with DBSession() as session:
+            team = session.query(Team).filter(Team.id == synthetic_team.team_id).one()
+            return get_engine_class(planning_mode)(team).calculate_days(START_DATE, num_days)
+
+    return run
+
+
+def plan_bcp(synthetic_team: SyntheticTeam, num_days: int) -> Any:
+    with DBSession() as session:
+        team = session.query(Team).filter(Team.id == synthetic_team.team_id).one()
+        return BCPEngine(team).calculate_bcp_days(START_DATE, num_days)
+
+
+CASES = [
+    *[
+        BenchmarkCase(f"engine.{planning_mode.value}", plan_with_engine(planning_mode))
+        for planning_mode in enums.PlanningMode
+    ],
+    BenchmarkCase("engine.bcp", plan_bcp),
+    BenchmarkCase(
+        "route.get_prospective_future_assignments",
+        lambda synthetic_team, num_days: shabzak_engine_routes.get_prospective_future_assignments(
+            synthetic_team.team_id, START_DATE.isoformat(), num_days
+        ),
+    ),
+    BenchmarkCase(
+        "route.get_prospective_bcp_future_assignments",
+        lambda synthetic_team, num_days: (
+            shabzak_engine_routes.get_prospective_bcp_future_assignments(
+                synthetic_team.team_id, START_DATE.isoformat(), num_days
+            )
+        ),
+    ),
+    BenchmarkCase(
+        "route.get_prospective_joint_assignments",
+        lambda synthetic_team, num_days: shabzak_engine_routes.get_prospective_joint_assignments(
+            synthetic_team.team_id, START_DATE.isoformat(), num_days
+        ),
+    ),
+    BenchmarkCase(
+        "route.get_soldiers_for_team",
+        lambda synthetic_team, _: soldier_routes.get_soldiers_for_team(synthetic_team.team_id),
+        uses_days=False,
+    ),
+    BenchmarkCase(
+        "route.get_day_soldier_assignments",
+        lambda synthetic_team, _: day_soldier_assignment_routes.get_day_soldier_assignments(
+            synthetic_team.history_day_id
+        ),
+        uses_days=False,
+    ),
+]
+
+
+class QueryCounter:
+    """Counts the SQL statements db.db_engine executes while active."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def on_execute(self, *_: Any) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(db.db_engine, "before_cursor_execute", self.on_execute)
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        event.remove(db.db_engine, "before_cursor_execute", self.on_execute)
+
+
+def get_status(result: Any) -> str:
+    if isinstance(result, dict) and result.get("status") == "error":
+        return f"error: {result.get('error')}"
+    return "success"
+
+
+def measure(
+    case: BenchmarkCase, synthetic_team: SyntheticTeam, num_days: int, repeat: int
+) -> Dict[str, Any]:
+    status = "success"
+    wall_times: List[float] = []
+    try:
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            result = case.run(synthetic_team, num_days)
+            wall_times.append(time.perf_counter() - started_at)
+            status = get_status(result)
+        tracemalloc.start()
+        with QueryCounter() as query_counter:
+            case.run(synthetic_team, num_days)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    except Exception as e:
+        return {"status": f"error: {e}"}
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return {
+        "status": status,
+        "wall_ms": min(wall_times) * 1000,
+        "queries": query_counter.count,
+        "peak_kb": peak_memory / 1024,
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="shabzak-benchmark-") as directory:
+        db.bind_database(os.path.join(directory, "benchmark.db"))
+        init_db()
+        for num_soldiers in args.soldiers:
+            synthetic_team = generate_team(num_soldiers, args.history_days, rng)
+            for case in CASES:
+                if args.cases and not any(name in case.name for name in args.cases):
+                    continue
+                for num_days in args.days if case.uses_days else [0]:
+                    key = f"{case.name}|soldiers={num_soldiers}|days={num_days}"
+                    results[key] = measure(case, synthetic_team, num_days, args.repeat)
+                    print(format_result(key, results[key]), file=sys.stderr)
+    baseline = {
+        "meta": {
+            "seed": args.seed,
+            "history_days": args.history_days,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(baseline, output_file, indent=2, sort_keys=True)
+
+
+def format_result(key: str, result: Dict[str, Any]) -> str:
+    if "wall_ms" not in result:
+        return f"{key}: {result['status']}"
+    return (
+        f"{key}: {result['wall_ms']:.1f} ms, {result['queries']} queries, "
+        f"{result['peak_kb']:.0f} KiB peak ({result['status']})"
+    )
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    regressions: List[str] = []
+    for key, current_result in sorted(current["results"].items()):
+        baseline_result: Optional[Dict[str, Any]] = baseline["results"].get(key)
+        if not baseline_result or "wall_ms" not in baseline_result:
+            continue
+        if "wall_ms" not in current_result:
+            regressions.append(f"{key}: now fails with {current_result['status']}")
+            continue
+        for metric in ("wall_ms", "peak_kb"):
+            if current_result[metric] > baseline_result[metric] * (1 + threshold):
+                regressions.append(
+                    f"{key}: {metric} {baseline_result[metric]:.1f} -> {current_result[metric]:.1f}"
+                )
+        if current_result["queries"] > baseline_result["queries"]:
+            regressions.append(
+                f"{key}: queries {baseline_result['queries']} -> {current_result['queries']}"
+            )
+    return regressions
+
+
+def compare(args: argparse.Namespace) -> None:
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        regressions = compare_results(
+            json.load(baseline_file), json.load(current_file), args.threshold
+        )
+    for regression in regressions:
+        print(regression)
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the benchmark matrix")
+    run_parser.add_argument("--output", default="benchmarks/current.json")
+    run_parser.add_argument("--soldiers", type=int, nargs="+", default=DEFAULT_SOLDIERS)
+    run_parser.add_argument("--days", type=int, nargs="+", default=DEFAULT_DAYS)
+    run_parser.add_argument("--history-days", type=int, default=DEFAULT_HISTORY_DAYS)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--cases", nargs="+", help="Only run cases whose name contains one")
+    run_parser.set_defaults(handler=run)
+    compare_parser = subparsers.add_parser("compare", help="Flag regressions against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.set_defaults(handler=compare)
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
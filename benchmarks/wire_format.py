@@ -0,0 +1,85 @@
+"""
+Compares the wire formats of a prospective plan on a synthetic in-memory team: payload size
+and the time to build and JSON-encode it on the Python side and to JSON-decode it again.
+
+    python -m benchmarks.wire_format --soldiers 200 --days 30
+
+Decoding is JSON parsing, plus inflating for the compressed format, which is what the
+browser does before web/columnar.js walks the matrix.
+"""
+
+import argparse
+import base64
+import json
+import statistics
+import time
+import zlib
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+from algorithm import get_engine_class
+from benchmarks.engine_modes import build_snapshot
+from utils import columnar, enums
+
+
+def time_ms(run: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    start_date = date(2025, 1, 5)
+    snapshot = build_snapshot(args.soldiers, args.days, start_date, args.seed)
+    engine = get_engine_class(enums.PlanningMode.Vectorized)(snapshot.team, snapshot)
+    days = [
+        (day, engine.get_day_assignments(day))
+        for day in engine.calculate_days(start_date, args.days)
+    ]
+    soldier_ids = [soldier.id for soldier in snapshot.soldiers]
+
+    def encode(wire_format: enums.WireFormat) -> str:
+        return json.dumps(columnar.encode_days_as(wire_format, days, soldier_ids))
+
+    def decode(encoded: str) -> List[Dict]:
+        payload = json.loads(encoded)
+        # Payloads under the compression threshold are sent uncompressed
+        if (
+            isinstance(payload, dict)
+            and payload["format"] == enums.WireFormat.CompressedColumnar.value
+        ):
+            payload = json.loads(zlib.decompress(base64.b64decode(payload["data"])))
+        return payload
+
+    results = {}
+    for wire_format in enums.WireFormat:
+        encoded = encode(wire_format)
+        results[wire_format.value] = {
+            "bytes": len(encoded),
+            "encode_ms": time_ms(lambda: encode(wire_format), args.repeat),
+            "decode_ms": time_ms(lambda: decode(encoded), args.repeat),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--soldiers", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for wire_format, result in benchmark(args).items():
+        print(
+            f"{wire_format:>16}: {result['bytes'] / 1024:9.1f} KiB, "
+            f"encode {result['encode_ms']:7.1f} ms, decode {result['decode_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,34 +3,91 @@ from contextlib import AbstractContextManager, ContextDecorator
 from types import TracebackType
 from typing import Any, Optional, Type, TypeVar
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import Session as SessionType
 from sqlalchemy.orm import scoped_session, sessionmaker
 
+import db.migrations as db_migrations
 import db.models as db_models
+from db.profiles import DatabaseProfile, create_database_engine, get_database_profile
+from utils.read_cache import read_cache
 
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shabzak.db")
-print("Database path:", DB_PATH)
-db_engine = create_engine(f"sqlite:///{DB_PATH}", echo=True)
+DB_PATH_ENV_VAR = "SHABZAK_DB_PATH"
+DB_PATH = os.environ.get(DB_PATH_ENV_VAR) or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "shabzak.db"
+)
+database_profile = get_database_profile()
+if database_profile.echo:
+    print("Database path:", DB_PATH)
+db_engine = create_database_engine(DB_PATH, database_profile)
 db_models.Base.metadata.create_all(db_engine)
+db_migrations.migrate(db_engine)
 
 T = TypeVar("T", bound=Optional[Type[BaseException]])
 
+SHARED_READ_SESSION_KEY = "shared_read"
+
 SessionFactory = sessionmaker(bind=db_engine)
 Session = scoped_session(SessionFactory)
 
 
+def bind_database(db_path: str, profile: Optional[DatabaseProfile] = None) -> None:
+    """
+    Points DBSession at another SQLite file and creates its tables, e.g. for benchmarks. The
+    current database profile is kept unless another one is given.
+    """
+    global db_engine
+    Session.remove()
+    db_engine.dispose()
+    db_engine = create_database_engine(db_path, profile or database_profile)
+    db_models.Base.metadata.create_all(db_engine)
+    db_migrations.migrate(db_engine)
+    SessionFactory.configure(bind=db_engine)
+    read_cache.clear()
+
+
 class DBSession(ContextDecorator, AbstractContextManager[SessionType]):
 
     def __enter__(self) -> SessionType:
         self.session = Session()
+        self.is_shared = self.session.info.get(SHARED_READ_SESSION_KEY, False)
         return self.session
 
     def __exit__(
         self, exc_type: T, exc_value: Optional[BaseException], traceback: Optional[TracebackType]
     ) -> None:
+        if self.is_shared:
+            # The enclosing SharedReadSession ends the transaction
+            return
         if exc_type:
             self.session.rollback()
         else:
             self.session.commit()
         Session.remove()
+
+
+class SharedReadSession(ContextDecorator, AbstractContextManager[SessionType]):
+    """
+    One session and one read transaction for every DBSession opened in this thread until it
+    exits, so a series of read routes sees a single consistent snapshot of the database and
+    shares one identity map. Nothing is committed: the transaction is rolled back on exit.
+    The read cache is bypassed meanwhile, as its entries may be newer than the snapshot and
+    entries read from the snapshot may be older than the current versions.
+    """
+
+    def __enter__(self) -> SessionType:
+        self.session = Session()
+        self.session.info[SHARED_READ_SESSION_KEY] = True
+        # pysqlite only opens transactions before writes, so reads would each see the latest
+        # commit; the snapshot is taken at the first read after an explicit BEGIN
+        self.session.connection().exec_driver_sql("BEGIN")
+        self.cache_bypass = read_cache.bypassed()
+        self.cache_bypass.__enter__()
+        return self.session
+
+    def __exit__(
+        self, exc_type: T, exc_value: Optional[BaseException], traceback: Optional[TracebackType]
+    ) -> None:
+        self.session.info.pop(SHARED_READ_SESSION_KEY, None)
+        self.session.rollback()
+        Session.remove()
+        self.cache_bypass.__exit__(exc_type, exc_value, traceback)
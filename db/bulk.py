@@ -0,0 +1,114 @@
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, replace
+from typing import Any, Dict, Iterable, List, Tuple, Type
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as SessionType
+
+from db import history, scores
+from db.models import Base, Day, DaySoldierAssignment
+from db.records import AssignmentRecord, DayRecord
+from utils import enums
+
+# Well under SQLite's bound parameter limit, including the 999 of older builds
+MAX_IN_CLAUSE_IDS = 500
+
+PreviousAssignment = Tuple[str, enums.Assignment, DayRecord]
+
+
+def chunked(ids: List[str], size: int = MAX_IN_CLAUSE_IDS) -> Iterable[List[str]]:
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+def upsert_rows(
+    session: SessionType,
+    model: Type[Base],
+    rows: List[Dict[str, Any]],
+    update_columns: List[str],
+) -> None:
+    """
+    Inserts `rows` of `model` with one executemany INSERT ... ON CONFLICT DO UPDATE, updating
+    `update_columns` of the rows whose ID already exists.
+    """
+    if not rows:
+        return
+    statement = sqlite_insert(model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=[model.__table__.c.id],
+        set_={
+            **{column: statement.excluded[column] for column in update_columns},
+            "modified_at": func.now(),
+        },
+    )
+    session.execute(statement, rows)
+
+
+def get_previous_assignments(
+    session: SessionType, assignment_ids: List[str]
+) -> Dict[str, PreviousAssignment]:
+    """The stored soldier, assignment and day of each of `assignment_ids` that already exists."""
+    previous_assignments: Dict[str, PreviousAssignment] = {}
+    for ids in chunked(assignment_ids):
+        rows = (
+            session.query(
+                DaySoldierAssignment.id,
+                DaySoldierAssignment.soldier_id,
+                DaySoldierAssignment.assignment,
+                Day.id,
+                Day.date,
+                Day.timetable_id,
+            )
+            .join(Day, DaySoldierAssignment.day_id == Day.id)
+            .filter(DaySoldierAssignment.id.in_(ids))
+        )
+        for assignment_id, soldier_id, assignment, day_id, day_date, timetable_id in rows:
+            previous_assignments[assignment_id] = (
+                soldier_id,
+                assignment,
+                DayRecord(id=day_id, date=day_date, timetable_id=timetable_id),
+            )
+    return previous_assignments
+
+
+def upsert_day_assignments(
+    session: SessionType, days: List[DayRecord], assignments: List[AssignmentRecord]
+) -> None:
+    """
+    Commits planned days and their assignments: both are upserted by ID, soldiers' scores
+    move by the weight of every assignment added, replaced or moved to another soldier, and
+    the timetables' histories are updated, all in the caller's transaction. Assignments
+    without an ID are inserted as new rows.
+    """
+    days_by_id = {day.id: day for day in days}
+    assignments = [
+        assignment if assignment.id else replace(assignment, id=str(uuid.uuid4()))
+        for assignment in assignments
+    ]
+    previous_assignments = get_previous_assignments(
+        session, [assignment.id for assignment in assignments]
+    )
+    weights = scores.get_assignment_weights(session)
+    score_deltas: Dict[str, int] = defaultdict(int)
+    history_changes: List[history.AssignmentChange] = []
+    for assignment in assignments:
+        if assignment.id in previous_assignments:
+            soldier_id, previous_assignment, previous_day = previous_assignments[assignment.id]
+            score_deltas[soldier_id] -= weights.get(previous_assignment, 0)
+            history_changes.append((previous_day, soldier_id, None))
+        score_deltas[assignment.soldier_id] += weights.get(assignment.assignment, 0)
+        history_changes.append(
+            (days_by_id[assignment.day_id], assignment.soldier_id, assignment.assignment)
+        )
+
+    upsert_rows(session, Day, [asdict(day) for day in days], ["date", "timetable_id"])
+    upsert_rows(
+        session,
+        DaySoldierAssignment,
+        [asdict(assignment) for assignment in assignments],
+        ["soldier_id", "day_id", "assignment"],
+    )
+    scores.add_to_scores(session, score_deltas)
+    history.record_assignments(session, history_changes)
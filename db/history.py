@@ -0,0 +1,324 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session as SessionType
+
+import utils
+from db.models import Day, DaySoldierAssignment, TimetableHistory
+from db.records import AssignmentRecord, DayRecord
+from utils import enums
+
+NO_ASSIGNMENT = -1
+ASSIGNMENTS: List[enums.Assignment] = list(enums.Assignment)
+ASSIGNMENT_CODES: Dict[enums.Assignment, int] = {
+    assignment: code for code, assignment in enumerate(ASSIGNMENTS)
+}
+SOLDIER_ID_SEPARATOR = ","
+
+AssignmentChange = Tuple[Union[Day, DayRecord], str, Optional[Union[enums.Assignment, str]]]
+
+
+class AssignmentHistory:
+    """
+    Assignments of one timetable as a days x soldiers matrix of int8 codes (ordinals of
+    enums.Assignment, NO_ASSIGNMENT where nothing is set), with row 0 at `start_date`.
+    Stored as a single TimetableHistory BLOB and read back with np.frombuffer, so loading a
+    year of a large team is one row and no per-assignment parsing. Rows and columns are
+    added as days and soldiers appear.
+    """
+
+    def __init__(
+        self, timetable_id: str, start_date: date, soldier_ids: List[str], codes: np.ndarray
+    ) -> None:
+        self.timetable_id = timetable_id
+        self.start_date = start_date
+        self.soldier_ids = soldier_ids
+        self.soldier_indexes: Dict[str, int] = {
+            soldier_id: index for index, soldier_id in enumerate(soldier_ids)
+        }
+        self.codes = codes
+
+    @classmethod
+    def empty(cls, timetable_id: str, start_date: date) -> "AssignmentHistory":
+        return cls(timetable_id, start_date, [], np.empty((0, 0), dtype=np.int8))
+
+    @classmethod
+    def from_model(cls, model: TimetableHistory) -> "AssignmentHistory":
+        soldier_ids = model.soldier_ids.split(SOLDIER_ID_SEPARATOR) if model.soldier_ids else []
+        codes = np.frombuffer(model.codes, dtype=np.int8).reshape(model.num_days, len(soldier_ids))
+        return cls(model.timetable_id, model.start_date, soldier_ids, codes)
+
+    @classmethod
+    def from_assignments(
+        cls,
+        timetable_id: str,
+        assignments: Iterable[Tuple[date, str, Union[enums.Assignment, str]]],
+    ) -> "AssignmentHistory":
+        assignments = list(assignments)
+        if not assignments:
+            return cls.empty(timetable_id, date.today())
+        start_date = min(day_date for day_date, _, _ in assignments)
+        num_days = (max(day_date for day_date, _, _ in assignments) - start_date).days + 1
+        soldier_ids = list(dict.fromkeys(soldier_id for _, soldier_id, _ in assignments))
+        history = cls(
+            timetable_id,
+            start_date,
+            soldier_ids,
+            np.full((num_days, len(soldier_ids)), NO_ASSIGNMENT, dtype=np.int8),
+        )
+        for day_date, soldier_id, assignment in assignments:
+            history.set_assignment(day_date, soldier_id, utils.get_assignment(assignment))
+        return history
+
+    def to_model(self, model: Optional[TimetableHistory] = None) -> TimetableHistory:
+        model = model or TimetableHistory(timetable_id=self.timetable_id)
+        model.start_date = self.start_date
+        model.num_days = self.num_days
+        model.soldier_ids = SOLDIER_ID_SEPARATOR.join(self.soldier_ids)
+        model.codes = self.codes.tobytes()
+        return model
+
+    @property
+    def num_days(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def end_date(self) -> date:
+        return self.start_date + timedelta(days=self.num_days)
+
+    def get_row_index(self, day_date: date) -> Optional[int]:
+        row_index = (day_date - self.start_date).days
+        return row_index if 0 <= row_index < self.num_days else None
+
+    def get_codes_for_date(self, day_date: date) -> np.ndarray:
+        row_index = self.get_row_index(day_date)
+        if row_index is None:
+            return np.full(len(self.soldier_ids), NO_ASSIGNMENT, dtype=np.int8)
+        return self.codes[row_index]
+
+    def get_assignment(self, day_date: date, soldier_id: str) -> Optional[enums.Assignment]:
+        row_index = self.get_row_index(day_date)
+        soldier_index = self.soldier_indexes.get(soldier_id)
+        if row_index is None or soldier_index is None:
+            return None
+        code = self.codes[row_index, soldier_index]
+        return None if code == NO_ASSIGNMENT else ASSIGNMENTS[code]
+
+    def get_assignment_records(self, day: DayRecord) -> List[AssignmentRecord]:
+        codes = self.get_codes_for_date(day.date)
+        return [
+            AssignmentRecord(
+                soldier_id=self.soldier_ids[soldier_index],
+                day_id=day.id,
+                assignment=ASSIGNMENTS[codes[soldier_index]],
+            )
+            for soldier_index in np.flatnonzero(codes != NO_ASSIGNMENT)
+        ]
+
+    def set_assignment(
+        self, day_date: date, soldier_id: str, assignment: Optional[enums.Assignment]
+    ) -> None:
+        code = NO_ASSIGNMENT if assignment is None else ASSIGNMENT_CODES[assignment]
+        row_index = self.get_row_index(day_date)
+        soldier_index = self.soldier_indexes.get(soldier_id)
+        if row_index is None or soldier_index is None:
+            if code == NO_ASSIGNMENT:
+                return
+            self.include_date(day_date)
+            row_index = (day_date - self.start_date).days
+            if soldier_index is None:
+                soldier_index = self.add_soldier(soldier_id)
+        self.make_writeable()
+        self.codes[row_index, soldier_index] = code
+
+    def set_assignments_for_date(
+        self, day_date: date, assignments: List[Tuple[str, enums.Assignment]]
+    ) -> None:
+        """Replaces whatever is stored on `day_date` with `assignments`, as (soldier ID, assignment)."""
+        if assignments:
+            self.include_date(day_date)
+            for soldier_id, _ in assignments:
+                if soldier_id not in self.soldier_indexes:
+                    self.add_soldier(soldier_id)
+        row_index = self.get_row_index(day_date)
+        if row_index is None:
+            return
+        row = np.full(len(self.soldier_ids), NO_ASSIGNMENT, dtype=np.int8)
+        row[[self.soldier_indexes[soldier_id] for soldier_id, _ in assignments]] = [
+            ASSIGNMENT_CODES[assignment] for _, assignment in assignments
+        ]
+        self.make_writeable()
+        self.codes[row_index] = row
+
+    def make_writeable(self) -> None:
+        # Arrays read from a stored BLOB are read-only views of its bytes
+        if not self.codes.flags.writeable:
+            self.codes = self.codes.copy()
+
+    def include_date(self, day_date: date) -> None:
+        if not self.num_days:
+            self.start_date = day_date
+        rows_before = max((self.start_date - day_date).days, 0)
+        rows_after = max((day_date - self.end_date).days + 1, 0)
+        if rows_before or rows_after:
+            self.codes = np.pad(
+                self.codes, ((rows_before, rows_after), (0, 0)), constant_values=NO_ASSIGNMENT
+            )
+            self.start_date -= timedelta(days=rows_before)
+
+    def add_soldier(self, soldier_id: str) -> int:
+        self.soldier_indexes[soldier_id] = len(self.soldier_ids)
+        self.soldier_ids.append(soldier_id)
+        self.codes = np.pad(self.codes, ((0, 0), (0, 1)), constant_values=NO_ASSIGNMENT)
+        return self.soldier_indexes[soldier_id]
+
+    def get_cells(self) -> Dict[Tuple[date, str], enums.Assignment]:
+        """Every assignment held, by (date, soldier ID)."""
+        return {
+            (self.start_date + timedelta(days=int(row_index)), self.soldier_ids[soldier_index]): (
+                ASSIGNMENTS[self.codes[row_index, soldier_index]]
+            )
+            for row_index, soldier_index in np.argwhere(self.codes != NO_ASSIGNMENT)
+        }
+
+    def get_window(
+        self, start_date: date, end_date: date, soldier_ids: List[str]
+    ) -> "AssignmentHistory":
+        """
+        A writable copy of the days in [start_date, end_date) with the columns in the order
+        of `soldier_ids`; days and soldiers missing from the history are left unassigned.
+        """
+        window = np.full(
+            ((end_date - start_date).days, len(soldier_ids)), NO_ASSIGNMENT, dtype=np.int8
+        )
+        offset = (start_date - self.start_date).days
+        first_row = max(-offset, 0)
+        last_row = min(self.num_days - offset, window.shape[0])
+        columns = [
+            (window_index, self.soldier_indexes[soldier_id])
+            for window_index, soldier_id in enumerate(soldier_ids)
+            if soldier_id in self.soldier_indexes
+        ]
+        if first_row < last_row and columns:
+            window_indexes, soldier_indexes = zip(*columns)
+            window[first_row:last_row, list(window_indexes)] = self.codes[
+                offset + first_row : offset + last_row, list(soldier_indexes)
+            ]
+        return AssignmentHistory(self.timetable_id, start_date, list(soldier_ids), window)
+
+    def get_night_soldier_id(self, day_date: date, night_codes: np.ndarray) -> Optional[str]:
+        holders = np.flatnonzero(np.isin(self.get_codes_for_date(day_date), night_codes))
+        return self.soldier_ids[holders[0]] if len(holders) else None
+
+    def get_night_streak(
+        self, last_date: date, num_days: int, night_codes: np.ndarray
+    ) -> Tuple[Optional[str], int]:
+        """
+        The soldier holding the night on `last_date` and for how many consecutive days up to
+        it, looking back at most `num_days` days.
+        """
+        night_soldier_id = self.get_night_soldier_id(last_date, night_codes)
+        if not night_soldier_id:
+            return None, 0
+        streak = 1
+        while streak < num_days:
+            day_date = last_date - timedelta(days=streak)
+            if self.get_night_soldier_id(day_date, night_codes) != night_soldier_id:
+                break
+            streak += 1
+        return night_soldier_id, streak
+
+
+def to_codes(assignments: Iterable[enums.Assignment]) -> np.ndarray:
+    return np.array([ASSIGNMENT_CODES[assignment] for assignment in assignments], dtype=np.int8)
+
+
+def get_assignment_rows(
+    session: SessionType, timetable_id: str, day_dates: Optional[Iterable[date]] = None
+) -> List[Tuple[date, str, enums.Assignment]]:
+    """(date, soldier ID, assignment) of the timetable's rows, or of its rows on `day_dates`."""
+    query = (
+        session.query(Day.date, DaySoldierAssignment.soldier_id, DaySoldierAssignment.assignment)
+        .join(Day, DaySoldierAssignment.day_id == Day.id)
+        .filter(Day.timetable_id == timetable_id)
+    )
+    if day_dates is not None:
+        query = query.filter(Day.date.in_(list(day_dates)))
+    return [
+        (day_date, soldier_id, utils.get_assignment(assignment))
+        for day_date, soldier_id, assignment in query
+    ]
+
+
+def build_history(session: SessionType, timetable_id: str) -> AssignmentHistory:
+    return AssignmentHistory.from_assignments(
+        timetable_id, get_assignment_rows(session, timetable_id)
+    )
+
+
+def load_history(session: SessionType, timetable_id: str) -> AssignmentHistory:
+    """Reads the stored history of a timetable, building and storing it on first use."""
+    model = session.get(TimetableHistory, timetable_id)
+    if model:
+        return AssignmentHistory.from_model(model)
+    history = build_history(session, timetable_id)
+    session.add(history.to_model())
+    # Flushed now so callers that expunge the session before it commits still store it
+    session.flush()
+    return history
+
+
+def verify_history(session: SessionType, timetable_id: str) -> bool:
+    """Whether the stored history of a timetable, if any, holds exactly its rows' assignments."""
+    model = session.get(TimetableHistory, timetable_id)
+    if not model:
+        return True
+    return AssignmentHistory.from_model(model).get_cells() == (
+        build_history(session, timetable_id).get_cells()
+    )
+
+
+def rebuild_history(session: SessionType, timetable_id: str) -> AssignmentHistory:
+    """
+    Replaces the stored history of a timetable with one built from its rows, for rows written
+    without going through record_assignments.
+    """
+    session.flush()
+    history = build_history(session, timetable_id)
+    model = session.get(TimetableHistory, timetable_id)
+    if model:
+        history.to_model(model)
+    else:
+        session.add(history.to_model())
+    return history
+
+
+def record_assignments(session: SessionType, changes: Iterable[AssignmentChange]) -> None:
+    """
+    Brings the stored histories up to date with committed assignment changes, given as (day,
+    soldier ID, assignment or None for a removal). Every day changed is read back from its
+    rows, so the history matches them whatever else was written on that day. Call it in the
+    session making the changes so the history commits, or rolls back, with them.
+    """
+    changes_by_timetable: Dict[str, List[AssignmentChange]] = {}
+    for change in changes:
+        changes_by_timetable.setdefault(change[0].timetable_id, []).append(change)
+    session.flush()
+    for timetable_id, timetable_changes in changes_by_timetable.items():
+        model = session.get(TimetableHistory, timetable_id)
+        if not model:
+            session.add(build_history(session, timetable_id).to_model())
+            continue
+        history = AssignmentHistory.from_model(model)
+        day_dates = {day.date for day, _, _ in timetable_changes}
+        assignments_by_date: Dict[date, List[Tuple[str, enums.Assignment]]] = {
+            day_date: [] for day_date in day_dates
+        }
+        for day_date, soldier_id, assignment in get_assignment_rows(
+            session, timetable_id, day_dates
+        ):
+            assignments_by_date[day_date].append((soldier_id, assignment))
+        for day_date, assignments in assignments_by_date.items():
+            history.set_assignments_for_date(day_date, assignments)
+        history.to_model(model)
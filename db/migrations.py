@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field
+from typing import List, Set, Tuple
+
+from sqlalchemy.engine import Connection, Engine
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: List[str]
+    # (table, column, column definition), added before the statements unless already there
+    added_columns: List[Tuple[str, str, str]] = field(default_factory=list)
+
+
+# Append only, with increasing versions. Tables, columns and indexes declared in db.models
+# are created by create_all on new databases before the runner starts, so statements have to
+# be safe to run against a schema that already has them (IF NOT EXISTS and the like).
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Indexes for the team, timetable, date, day and soldier filters",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_scores_team_id ON scores (team_id)",
+            "CREATE INDEX IF NOT EXISTS ix_soldiers_team_id ON soldiers (team_id)",
+            "CREATE INDEX IF NOT EXISTS ix_timetables_team_id ON timetables (team_id)",
+            "CREATE INDEX IF NOT EXISTS ix_days_timetable_id_date ON days (timetable_id, date)",
+            "CREATE INDEX IF NOT EXISTS ix_days_date ON days (date)",
+            "CREATE INDEX IF NOT EXISTS ix_day_soldier_assignments_day_id "
+            "ON day_soldier_assignments (day_id)",
+            "CREATE INDEX IF NOT EXISTS ix_day_soldier_assignments_soldier_id "
+            "ON day_soldier_assignments (soldier_id)",
+            "CREATE INDEX IF NOT EXISTS ix_bcp_timetables_team_id ON bcp_timetables (team_id)",
+            "CREATE INDEX IF NOT EXISTS ix_bcp_days_timetable_id_date "
+            "ON bcp_days (timetable_id, date)",
+            "ANALYZE",
+        ],
+    ),
+    Migration(
+        2,
+        "Keep score overrides as an offset over the assignment weights",
+        [
+            # Whatever existing scores hold beyond their assignments' weights counts as an
+            # override, so recomputing them later keeps their current values. Drift from older
+            # code becomes an override too; clear_score_overrides_for_team drops it per team
+            "UPDATE scores SET override_offset = COALESCE(score, 0) - COALESCE(("
+            "SELECT SUM(assignment_scores.score) FROM soldiers "
+            "JOIN day_soldier_assignments "
+            "ON day_soldier_assignments.soldier_id = soldiers.id "
+            "JOIN assignment_scores "
+            "ON assignment_scores.assignment = day_soldier_assignments.assignment "
+            "WHERE soldiers.score_id = scores.id), 0)",
+        ],
+        added_columns=[("scores", "override_offset", "INTEGER DEFAULT 0")],
+    ),
+]
+
+
+def get_schema_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def get_column_names(connection: Connection, table: str) -> Set[str]:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def migrate(engine: Engine) -> int:
+    """
+    Brings the database up to the latest migration, recording progress in SQLite's
+    user_version, and returns the resulting version.
+    """
+    with engine.connect() as connection:
+        version = get_schema_version(connection)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with engine.begin() as connection:
+            for table, column, definition in migration.added_columns:
+                if column not in get_column_names(connection, table):
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                    )
+            for statement in migration.statements:
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+        version = migration.version
+    return version
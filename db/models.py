@@ -7,7 +7,9 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     MetaData,
     String,
     func,
@@ -32,13 +34,17 @@ class Base:
 
 class Score(Base):
     __tablename__ = "scores"
+    __table_args__ = (Index("ix_scores_team_id", "team_id"),)
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     team_id = Column(String(36), ForeignKey("teams.id"), nullable=False)
     score = Column(Integer, default=0)
+    # What manual overrides added on top of the assignment weights, kept through recomputes
+    override_offset = Column(Integer, default=0)
 
 
 class Soldier(Base):
     __tablename__ = "soldiers"
+    __table_args__ = (Index("ix_soldiers_team_id", "team_id"),)
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
@@ -89,13 +95,28 @@ class Team(Base):
 
 class Timetable(Base):
     __tablename__ = "timetables"
+    __table_args__ = (Index("ix_timetables_team_id", "team_id"),)
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     team_id = Column(String(36), ForeignKey("teams.id"), nullable=False)
     team = relationship("Team", back_populates="timetable", foreign_keys=[team_id])
+    history = relationship("TimetableHistory", uselist=False, cascade="all, delete-orphan")
+
+
+class TimetableHistory(Base):
+    __tablename__ = "timetable_histories"
+    timetable_id = Column(String(36), ForeignKey("timetables.id"), primary_key=True)
+    start_date = Column(Date, nullable=False)
+    num_days = Column(Integer, nullable=False, default=0)
+    soldier_ids = Column(String, nullable=False, default="")
+    codes = Column(LargeBinary, nullable=False, default=b"")
 
 
 class Day(Base):
     __tablename__ = "days"
+    __table_args__ = (
+        Index("ix_days_timetable_id_date", "timetable_id", "date"),
+        Index("ix_days_date", "date"),
+    )
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     date = Column(Date, nullable=False)
     timetable_id = Column(String(36), ForeignKey("timetables.id"), nullable=False)
@@ -104,6 +125,10 @@ class Day(Base):
 
 class DaySoldierAssignment(Base):
     __tablename__ = "day_soldier_assignments"
+    __table_args__ = (
+        Index("ix_day_soldier_assignments_day_id", "day_id"),
+        Index("ix_day_soldier_assignments_soldier_id", "soldier_id"),
+    )
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     soldier_id = Column(String(36), ForeignKey("soldiers.id"), nullable=False)
     soldier = relationship("Soldier")
@@ -116,6 +141,7 @@ class DaySoldierAssignment(Base):
 
 class BCPTimetable(Base):
     __tablename__ = "bcp_timetables"
+    __table_args__ = (Index("ix_bcp_timetables_team_id", "team_id"),)
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     team_id = Column(String(36), ForeignKey("teams.id"), nullable=False)
     team = relationship("Team", back_populates="bcp_timetable", foreign_keys=[team_id])
@@ -124,6 +150,7 @@ class BCPTimetable(Base):
 
 class BCPDay(Base):
     __tablename__ = "bcp_days"
+    __table_args__ = (Index("ix_bcp_days_timetable_id_date", "timetable_id", "date"),)
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     date = Column(Date, nullable=False)
     timetable_id = Column(String(36), ForeignKey("bcp_timetables.id"), nullable=False)
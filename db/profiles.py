@@ -0,0 +1,94 @@
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+PROFILE_ENV_VAR = "SHABZAK_DB_PROFILE"
+CONFIG_ENV_VAR = "SHABZAK_DB_CONFIG"
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.json")
+DEFAULT_PROFILE = "production"
+
+
+@dataclass(frozen=True)
+class DatabaseProfile:
+    """
+    Engine and SQLite settings applied to every connection. None leaves SQLite's own default
+    in place.
+    """
+
+    name: str
+    echo: bool = False
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = None
+    cache_size_kib: Optional[int] = None
+    mmap_size: Optional[int] = None
+    busy_timeout_ms: int = 5000
+    pool_size: int = 5
+    max_overflow: int = 10
+
+
+PROFILES: Dict[str, DatabaseProfile] = {
+    "dev": DatabaseProfile("dev", echo=True),
+    "production": DatabaseProfile(
+        "production",
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size_kib=64 * 1024,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout_ms=10000,
+        # One connection per worker thread plus the Eel greenlets, reused rather than reopened
+        pool_size=8,
+        max_overflow=4,
+    ),
+}
+
+
+def get_database_profile() -> DatabaseProfile:
+    """
+    The profile named by SHABZAK_DB_PROFILE, else by the "profile" key of the JSON config file
+    (SHABZAK_DB_CONFIG, or db/database.json), else production. Any other key of the config
+    file overrides the profile field of the same name.
+    """
+    config: Dict[str, Any] = {}
+    config_path = os.environ.get(CONFIG_ENV_VAR, DEFAULT_CONFIG_PATH)
+    if os.path.exists(config_path):
+        with open(config_path) as config_file:
+            config = json.load(config_file)
+    name = os.environ.get(PROFILE_ENV_VAR) or config.get("profile", DEFAULT_PROFILE)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database profile {name}, expected one of {list(PROFILES)}")
+    field_names = {field.name for field in fields(DatabaseProfile)} - {"name"}
+    return replace(
+        PROFILES[name], **{key: value for key, value in config.items() if key in field_names}
+    )
+
+
+def create_database_engine(db_path: str, profile: DatabaseProfile) -> Engine:
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        echo=profile.echo,
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        connect_args={"timeout": profile.busy_timeout_ms / 1000},
+    )
+    pragmas = {
+        "journal_mode": profile.journal_mode,
+        "synchronous": profile.synchronous,
+        # Negative sizes are in KiB rather than pages
+        "cache_size": -profile.cache_size_kib if profile.cache_size_kib else None,
+        "mmap_size": profile.mmap_size,
+        "busy_timeout": profile.busy_timeout_ms,
+    }
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            if value is not None:
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+        cursor.close()
+
+    return engine
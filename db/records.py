@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import utils
+from db.models import Day, DaySoldierAssignment, Soldier
+from utils import enums
+
+
+@dataclass(frozen=True, slots=True)
+class SoldierRecord:
+    id: str
+    first_name: str
+    last_name: str
+    team_id: str
+    score_id: Optional[str]
+    is_commander: bool = False
+    is_reserve: bool = False
+    is_close_to_base: bool = True
+    is_onboarding: bool = False
+
+    @classmethod
+    def from_model(cls, soldier: Soldier) -> "SoldierRecord":
+        return cls(
+            id=soldier.id,
+            first_name=soldier.first_name,
+            last_name=soldier.last_name,
+            team_id=soldier.team_id,
+            score_id=soldier.score_id,
+            is_commander=bool(soldier.is_commander),
+            is_reserve=bool(soldier.is_reserve),
+            is_close_to_base=bool(soldier.is_close_to_base),
+            is_onboarding=bool(soldier.is_onboarding),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DayRecord:
+    id: str
+    date: date
+    timetable_id: str
+
+    @classmethod
+    def from_model(cls, day: Day) -> "DayRecord":
+        return cls(id=day.id, date=day.date, timetable_id=day.timetable_id)
+
+    def to_model(self) -> Day:
+        return Day(id=self.id, date=self.date, timetable_id=self.timetable_id)
+
+
+@dataclass(frozen=True, slots=True)
+class AssignmentRecord:
+    soldier_id: str
+    day_id: str
+    assignment: enums.Assignment
+    id: Optional[str] = None  # None until the assignment is committed
+
+    @classmethod
+    def from_model(cls, assignment: DaySoldierAssignment) -> "AssignmentRecord":
+        return cls(
+            soldier_id=assignment.soldier_id,
+            day_id=assignment.day_id,
+            assignment=utils.get_assignment(assignment.assignment),
+            id=assignment.id,
+        )
+
+    def to_model(self) -> DaySoldierAssignment:
+        return DaySoldierAssignment(
+            id=self.id, soldier_id=self.soldier_id, day_id=self.day_id, assignment=self.assignment
+        )
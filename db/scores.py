@@ -0,0 +1,120 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session as SessionType
+
+import utils
+from db.models import AssignmentScore, DaySoldierAssignment, Score, Soldier
+from utils import enums
+
+# (soldier ID, assignment removed or None, assignment added or None)
+ScoreChange = Tuple[
+    str, Optional[Union[enums.Assignment, str]], Optional[Union[enums.Assignment, str]]
+]
+
+
+def get_assignment_weights(session: SessionType) -> Dict[enums.Assignment, int]:
+    return {
+        utils.get_assignment(assignment): score
+        for assignment, score in session.query(AssignmentScore.assignment, AssignmentScore.score)
+    }
+
+
+def add_to_scores(session: SessionType, score_deltas: Dict[str, int]) -> None:
+    """
+    Adds each soldier's delta to their Score with one executemany UPDATE. The increment is
+    done by the database, so concurrent edits of the same score add up instead of
+    overwriting each other.
+    """
+    scores = Score.__table__
+    soldiers = Soldier.__table__
+    rows = [
+        {"score_soldier_id": soldier_id, "delta": delta}
+        for soldier_id, delta in score_deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    session.execute(
+        update(scores)
+        .where(
+            scores.c.id
+            == select(soldiers.c.score_id)
+            .where(soldiers.c.id == bindparam("score_soldier_id"))
+            .scalar_subquery()
+        )
+        .values(score=func.coalesce(scores.c.score, 0) + bindparam("delta")),
+        rows,
+    )
+
+
+def apply_score_changes(session: SessionType, changes: Iterable[ScoreChange]) -> None:
+    """Moves soldiers' scores by the weights of the assignments they lost and gained."""
+    weights = get_assignment_weights(session)
+    score_deltas: Dict[str, int] = defaultdict(int)
+    for soldier_id, removed_assignment, added_assignment in changes:
+        if removed_assignment:
+            score_deltas[soldier_id] -= weights.get(utils.get_assignment(removed_assignment), 0)
+        if added_assignment:
+            score_deltas[soldier_id] += weights.get(utils.get_assignment(added_assignment), 0)
+    add_to_scores(session, score_deltas)
+
+
+def override_score(session: SessionType, soldier_id: str, new_score: int) -> Optional[Score]:
+    """
+    Sets a soldier's score to `new_score` and moves their override offset by the same
+    amount, so recompute_scores keeps the override. None if the soldier has no score.
+    """
+    score = session.query(Score).join(Soldier).filter(Soldier.id == soldier_id).first()
+    if not score:
+        return None
+    score.override_offset = (score.override_offset or 0) + new_score - (score.score or 0)
+    score.score = new_score
+    return score
+
+
+def recompute_scores(session: SessionType, team_id: Optional[str] = None) -> None:
+    """
+    Rebuilds every score, or those of one team, as the total weight of the soldier's
+    assignments plus their override offset: one GROUP BY join of the assignments against
+    AssignmentScore, written back with one executemany UPDATE. Soldiers without assignments
+    go back to their offset, so manual overrides survive a recompute.
+    """
+    totals_query = (
+        session.query(Soldier.score_id, func.sum(AssignmentScore.score))
+        .join(DaySoldierAssignment, DaySoldierAssignment.soldier_id == Soldier.id)
+        .join(AssignmentScore, AssignmentScore.assignment == DaySoldierAssignment.assignment)
+        .group_by(Soldier.score_id)
+    )
+    score_ids_query = session.query(Soldier.score_id).filter(Soldier.score_id.isnot(None))
+    if team_id:
+        totals_query = totals_query.filter(Soldier.team_id == team_id)
+        score_ids_query = score_ids_query.filter(Soldier.team_id == team_id)
+    totals: Dict[str, int] = dict(totals_query)
+    rows = [
+        {"score_id": score_id, "total": totals.get(score_id) or 0}
+        for (score_id,) in score_ids_query
+    ]
+    if not rows:
+        return
+    scores = Score.__table__
+    session.execute(
+        update(scores)
+        .where(scores.c.id == bindparam("score_id"))
+        .values(score=bindparam("total") + func.coalesce(scores.c.override_offset, 0)),
+        rows,
+    )
+
+
+def clear_overrides(session: SessionType, team_id: str) -> None:
+    """
+    Drops the override offsets of a team's scores, so the next recompute sets them to their
+    assignments' weights alone. Also undoes the offsets migration 2 backfilled from scores
+    that had drifted from their assignments before it ran.
+    """
+    session.execute(
+        update(Score)
+        .where(Score.id.in_(select(Soldier.score_id).where(Soldier.team_id == team_id)))
+        .values(override_offset=0)
+    )
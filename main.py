@@ -1,19 +1,26 @@
 import importlib
+import multiprocessing
 import os
 
 import eel
 
 from db import init_db
 
-eel.init("web")
 ROUTES_DIR = "routes"
 
 
-init_db.init_db()
-for filename in os.listdir(ROUTES_DIR):
-    if filename.endswith(".py") and filename != "__init__.py":
-        module_name = filename[:-3]  # Remove '.py' extension
-        module_path = f"{ROUTES_DIR}.{module_name}"
-        module = importlib.import_module(module_path)
+def main() -> None:
+    eel.init("web")
+    init_db.init_db()
+    for filename in os.listdir(ROUTES_DIR):
+        if filename.endswith(".py") and filename != "__init__.py":
+            module_name = filename[:-3]  # Remove '.py' extension
+            module_path = f"{ROUTES_DIR}.{module_name}"
+            module = importlib.import_module(module_path)
 
-eel.start("index.html", size=(800, 600))
+    eel.start("index.html", size=(800, 600))
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Planning worker processes in the frozen executable
+    main()
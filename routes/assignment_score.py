@@ -2,17 +2,20 @@ from typing import Dict
 
 from eel import expose
 
-from db import DBSession
+from db import DBSession, scores
 from db.models import AssignmentScore
-from utils.model_to_dict import model_to_dict
+from utils import enums
+from utils.model_to_dict import model_to_dict, models_to_dicts
+from utils.read_cache import read_cache
 
 
 @expose
+@read_cache.cached(enums.CachedEntity.AssignmentScores)
 def get_assignment_scores() -> Dict:
     try:
         with DBSession() as session:
             assignment_scores = session.query(AssignmentScore).all()
-            assignment_scores_data = [model_to_dict(score) for score in assignment_scores]
+            assignment_scores_data = models_to_dicts(assignment_scores)
             return {"status": "success", "data": assignment_scores_data}
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -34,6 +37,7 @@ def get_assignment_score(score_id: str) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.AssignmentScores, enums.CachedEntity.Scores)
 def update_assignment_score(score_id: str, score_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -45,6 +49,8 @@ def update_assignment_score(score_id: str, score_data: Dict) -> Dict:
             for key, value in score_data.items():
                 if hasattr(assignment_score, key):
                     setattr(assignment_score, key, value)
+            session.flush()
+            scores.recompute_scores(session)
             session.commit()
             updated_score_data = model_to_dict(assignment_score)
             return {"status": "success", "data": updated_score_data}
@@ -0,0 +1,73 @@
+from typing import Any, Callable, Dict, List
+
+from eel import expose
+
+from db import SharedReadSession
+from routes import (
+    assignment_score,
+    bcp,
+    day_soldier_assignment,
+    jobs,
+    profiling,
+    score,
+    soldier,
+    team,
+)
+
+MAX_BATCH_CALLS = 64
+
+# Read routes only: the batch runs in a read transaction that is rolled back at the end
+BATCH_ROUTES: Dict[str, Callable[..., Dict]] = {
+    route.__name__: route
+    for route in [
+        team.get_teams,
+        team.get_team,
+        soldier.get_soldiers_for_team,
+        soldier.get_soldier,
+        score.get_scores_for_team,
+        score.get_score_for_soldier,
+        assignment_score.get_assignment_scores,
+        assignment_score.get_assignment_score,
+        day_soldier_assignment.get_day_soldier_assignments,
+        day_soldier_assignment.get_day_soldier_assignment,
+        day_soldier_assignment.get_timetable_grid,
+        bcp.get_bcp_days,
+        bcp.get_bcp_day,
+        jobs.get_job_status,
+        jobs.get_jobs,
+        profiling.get_engine_profiles,
+        profiling.get_read_cache_stats,
+    ]
+}
+
+
+def run_call(call: List[Any]) -> Dict:
+    try:
+        route_name, args = call
+        route = BATCH_ROUTES.get(route_name)
+        if not route:
+            return {"status": "error", "error": f"Route {route_name} cannot be batched"}
+        return route(*args)
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def batch_calls(calls: List[List[Any]]) -> Dict:
+    """
+    Runs `calls`, each a [route name, [args]] pair naming one of BATCH_ROUTES, in order and
+    in one shared read session, so a screen loads in one round trip and reads one consistent
+    snapshot of the database. Every call gets its own entry in "results", in the order of
+    `calls`, with the route's own success or error response.
+    """
+    try:
+        if len(calls) > MAX_BATCH_CALLS:
+            return {
+                "status": "error",
+                "error": f"A batch takes at most {MAX_BATCH_CALLS} calls, got {len(calls)}",
+            }
+        with SharedReadSession():
+            results = [run_call(call) for call in calls]
+        return {"status": "success", "results": results}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
@@ -4,15 +4,18 @@ from eel import expose
 
 from db import DBSession
 from db.models import BCPDay, BCPTimetable
-from utils.model_to_dict import model_to_dict
+from utils import enums
+from utils.model_to_dict import model_to_dict, models_to_dicts
+from utils.read_cache import read_cache
 
 
 @expose
+@read_cache.cached(enums.CachedEntity.BCPDays)
 def get_bcp_days() -> Dict:
     try:
         with DBSession() as session:
             bcp_days = session.query(BCPDay).all()
-            bcp_days_data = [model_to_dict(bcp_day) for bcp_day in bcp_days]
+            bcp_days_data = models_to_dicts(bcp_days)
             return {"status": "success", "data": bcp_days_data}
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -32,6 +35,7 @@ def get_bcp_day(bcp_day_id: str) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.BCPDays)
 def add_bcp_day(bcp_day_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -56,6 +60,7 @@ def add_bcp_day(bcp_day_data: Dict) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.BCPDays)
 def update_bcp_day(bcp_day_id: str, bcp_day_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -75,6 +80,7 @@ def update_bcp_day(bcp_day_id: str, bcp_day_data: Dict) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.BCPDays)
 def delete_bcp_day(bcp_day_id: str) -> Dict:
     try:
         with DBSession() as session:
@@ -1,13 +1,16 @@
-from copy import deepcopy
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import dateutil.parser
 from eel import expose
+from sqlalchemy import and_, func, select
 
-from db import DBSession
-from db.models import Day, DaySoldierAssignment, Score
-from utils import model_actions
-from utils.model_to_dict import model_to_dict
+import utils
+from db import DBSession, history, scores
+from db.models import Day, DaySoldierAssignment, Soldier, Timetable
+from db.records import AssignmentRecord, DayRecord
+from utils import columnar, enums
+from utils.model_to_dict import model_to_dict, models_to_dicts
+from utils.read_cache import read_cache
 
 
 @expose
@@ -22,12 +25,105 @@ def get_day_soldier_assignments(day_id: str) -> Dict:
                 .filter(DaySoldierAssignment.day_id == day.id)
                 .all()
             )
-            assignments_data = [model_to_dict(assignment) for assignment in assignments]
+            assignments_data = models_to_dicts(assignments)
             return {"status": "success", "data": assignments_data}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
+@expose
+def get_timetable_grid(
+    team_id: str,
+    start_date_str: str,
+    end_date_str: str,
+    soldier_offset: int = 0,
+    soldier_limit: Optional[int] = None,
+    wire_format: str = enums.WireFormat.Dicts.value,
+) -> Dict:
+    """
+    The team's stored days in [start_date, end_date), each with the assignments of one window
+    of its soldiers, in the day format of the prospective plans. Soldiers are ordered by
+    creation; `soldier_offset` and `soldier_limit` pick the rows and the dates pick the
+    columns, so a large roster can be fetched one viewport at a time. Costs the same four
+    queries whatever the size of the window. Dates come as ISO strings, which place the
+    columns. With a columnar `wire_format` the days come encoded by utils.columnar, with the
+    soldier window as the soldier table.
+    """
+    try:
+        with DBSession() as session:
+            timetable = session.query(Timetable).filter(Timetable.team_id == team_id).first()
+            if not timetable:
+                return {"status": "error", "error": f"Timetable for team ID {team_id} not found"}
+            start_date = dateutil.parser.isoparse(start_date_str).date()
+            end_date = dateutil.parser.isoparse(end_date_str).date()
+            soldiers_window = (
+                select(Soldier)
+                .where(Soldier.team_id == team_id)
+                .order_by(Soldier.created_at, Soldier.id)
+                .offset(soldier_offset)
+                .limit(soldier_limit)
+            )
+            soldiers = session.scalars(soldiers_window).all()
+            total_soldiers = (
+                session.query(func.count(Soldier.id)).filter(Soldier.team_id == team_id).scalar()
+            )
+            rows = (
+                session.query(
+                    Day.id,
+                    Day.date,
+                    DaySoldierAssignment.id,
+                    DaySoldierAssignment.soldier_id,
+                    DaySoldierAssignment.assignment,
+                )
+                .outerjoin(
+                    DaySoldierAssignment,
+                    and_(
+                        DaySoldierAssignment.day_id == Day.id,
+                        DaySoldierAssignment.soldier_id.in_(
+                            soldiers_window.with_only_columns(Soldier.id)
+                        ),
+                    ),
+                )
+                .filter(
+                    Day.timetable_id == timetable.id,
+                    Day.date >= start_date,
+                    Day.date < end_date,
+                )
+                .order_by(Day.date)
+                .all()
+            )
+            days: Dict[str, DayRecord] = {}
+            assignments_by_day_id: Dict[str, List[AssignmentRecord]] = {}
+            for day_id, day_date, assignment_id, soldier_id, assignment in rows:
+                if day_id not in days:
+                    days[day_id] = DayRecord(id=day_id, date=day_date, timetable_id=timetable.id)
+                    assignments_by_day_id[day_id] = []
+                if assignment_id:
+                    assignments_by_day_id[day_id].append(
+                        AssignmentRecord(
+                            soldier_id=soldier_id,
+                            day_id=day_id,
+                            assignment=utils.get_assignment(assignment),
+                            id=assignment_id,
+                        )
+                    )
+            return {
+                "status": "success",
+                "data": {
+                    "total_soldiers": total_soldiers,
+                    "soldier_offset": soldier_offset,
+                    "soldiers": models_to_dicts(soldiers),
+                    "days": columnar.encode_days_as(
+                        enums.WireFormat(wire_format),
+                        [(day, assignments_by_day_id[day_id]) for day_id, day in days.items()],
+                        [soldier.id for soldier in soldiers],
+                    ),
+                },
+            }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
 @expose
 def get_day_soldier_assignment(assignment_id: str) -> Dict:
     try:
@@ -46,6 +142,7 @@ def get_day_soldier_assignment(assignment_id: str) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Scores)
 def add_day_soldier_assignment(assignment_data: Dict) -> Dict:
     """
     Req body:
@@ -70,12 +167,13 @@ def add_day_soldier_assignment(assignment_data: Dict) -> Dict:
                     timetable_id=assignment_data["timetable_id"],
                 )
             assignment = DaySoldierAssignment(**assignment_data["assignment"], day=day)
-            soldier_score: Score = model_actions.get_soldier_score_from_assignment(assignment)
-            new_score = model_actions.get_updated_score_after_assignment_update(
-                assignment, None, soldier_score, False
-            )
-            setattr(soldier_score, "score", new_score)
             session.add(assignment)
+            scores.apply_score_changes(
+                session, [(assignment.soldier_id, None, assignment.assignment)]
+            )
+            history.record_assignments(
+                session, [(day, assignment.soldier_id, assignment.assignment)]
+            )
             session.commit()
             added_assignment_data = model_to_dict(assignment)
             return {"status": "success", "data": added_assignment_data}
@@ -84,6 +182,7 @@ def add_day_soldier_assignment(assignment_data: Dict) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Scores)
 def update_day_soldier_assignment(assignment_id: str, assignment_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -94,15 +193,28 @@ def update_day_soldier_assignment(assignment_id: str, assignment_data: Dict) ->
             )
             if not assignment:
                 return {"status": "error", "error": f"Assignment with ID {assignment_id} not found"}
-            prev_assignment: DaySoldierAssignment = deepcopy(assignment)
+            prev_assignment = AssignmentRecord.from_model(assignment)
             for key, value in assignment_data.items():
                 if hasattr(assignment, key):
                     setattr(assignment, key, value)
-            soldier_score: Score = model_actions.get_soldier_score_from_assignment(assignment)
-            new_score = model_actions.get_updated_score_after_assignment_update(
-                assignment, prev_assignment, soldier_score, False
+            scores.apply_score_changes(
+                session,
+                [
+                    (prev_assignment.soldier_id, prev_assignment.assignment, None),
+                    (assignment.soldier_id, None, assignment.assignment),
+                ],
+            )
+            history.record_assignments(
+                session,
+                [
+                    (session.get(Day, prev_assignment.day_id), prev_assignment.soldier_id, None),
+                    (
+                        session.get(Day, assignment.day_id),
+                        assignment.soldier_id,
+                        assignment.assignment,
+                    ),
+                ],
             )
-            setattr(soldier_score, "score", new_score)
             session.commit()
             updated_assignment_data = model_to_dict(assignment)
             return {"status": "success", "data": updated_assignment_data}
@@ -111,6 +223,7 @@ def update_day_soldier_assignment(assignment_id: str, assignment_data: Dict) ->
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Scores)
 def delete_day_soldier_assignment(assignment_id: str) -> Dict:
     try:
         with DBSession() as session:
@@ -122,12 +235,33 @@ def delete_day_soldier_assignment(assignment_id: str) -> Dict:
             if not assignment:
                 return {"status": "error", "error": f"Assignment with ID {assignment_id} not found"}
             session.delete(assignment)
-            soldier_score: Score = model_actions.get_soldier_score_from_assignment(assignment)
-            new_score = model_actions.get_updated_score_after_assignment_update(
-                assignment, None, soldier_score, True
+            scores.apply_score_changes(
+                session, [(assignment.soldier_id, assignment.assignment, None)]
+            )
+            history.record_assignments(
+                session, [(session.get(Day, assignment.day_id), assignment.soldier_id, None)]
             )
-            setattr(soldier_score, "score", new_score)
             session.commit()
             return {"status": "success"}
     except Exception as e:
         return {"status": "error", "error": str(e)}
+
+
+@expose
+def rebuild_timetable_history(team_id: str) -> Dict:
+    """
+    Rebuilds the team's stored assignment history from its assignment rows, after rows were
+    written outside the app's routes. "was_in_sync" tells whether the stored history already
+    matched them.
+    """
+    try:
+        with DBSession() as session:
+            timetable = session.query(Timetable).filter(Timetable.team_id == team_id).first()
+            if not timetable:
+                return {"status": "error", "error": f"Timetable for team ID {team_id} not found"}
+            was_in_sync = history.verify_history(session, timetable.id)
+            history.rebuild_history(session, timetable.id)
+            session.commit()
+            return {"status": "success", "data": {"was_in_sync": was_in_sync}}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
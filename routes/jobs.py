@@ -0,0 +1,41 @@
+from typing import Dict
+
+from eel import expose
+
+from utils import enums
+from utils.jobs import job_runner
+
+
+@expose
+def get_job_status(job_id: str) -> Dict:
+    try:
+        return {"status": "success", "data": job_runner.get(job_id).to_dict()}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def get_jobs() -> Dict:
+    try:
+        return {"status": "success", "data": [job.to_dict() for job in job_runner.jobs.values()]}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def get_job_result(job_id: str) -> Dict:
+    try:
+        job = job_runner.get(job_id)
+        if job.status != enums.JobStatus.Succeeded:
+            return {"status": "error", "error": job.error or f"Job is {job.status.value}"}
+        return {"status": "success", "data": job.to_dict(), "result": job.result}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def cancel_job(job_id: str) -> Dict:
+    try:
+        return {"status": "success", "data": job_runner.cancel(job_id).to_dict()}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
@@ -0,0 +1,37 @@
+from typing import Dict
+
+from eel import expose
+
+from algorithm import profiling
+from utils.read_cache import read_cache
+
+
+@expose
+def get_engine_profiles(limit: int = 10) -> Dict:
+    """Returns the last `limit` engine run profiles, most recent first."""
+    try:
+        return {
+            "status": "success",
+            "enabled": profiling.profiling_enabled,
+            "data": profiling.get_profiles(limit),
+        }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def set_engine_profiling(enabled: bool) -> Dict:
+    try:
+        profiling.set_profiling_enabled(enabled)
+        return {"status": "success", "enabled": profiling.profiling_enabled}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def get_read_cache_stats() -> Dict:
+    """Hit, miss and eviction counts of the read route cache, with the entity versions."""
+    try:
+        return {"status": "success", "data": read_cache.get_stats()}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
@@ -2,17 +2,20 @@ from typing import Dict
 
 from eel import expose
 
-from db import DBSession
+from db import DBSession, scores
 from db.models import Score, Soldier
-from utils.model_to_dict import model_to_dict
+from utils import enums
+from utils.model_to_dict import model_to_dict, models_to_dicts
+from utils.read_cache import read_cache
 
 
 @expose
+@read_cache.cached(enums.CachedEntity.Scores, enums.CachedEntity.Soldiers)
 def get_scores_for_team(team_id: str) -> Dict:
     try:
         with DBSession() as session:
             scores = session.query(Score).join(Soldier).filter(Soldier.team_id == team_id).all()
-            scores_data = [model_to_dict(score) for score in scores]
+            scores_data = models_to_dicts(scores)
             return {"status": "success", "data": scores_data}
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -35,17 +38,51 @@ def get_score_for_soldier(soldier_id: str) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Scores)
 def override_score_for_soldier(soldier_id: str, new_score: int) -> Dict:
     try:
         with DBSession() as session:
-            score = session.query(Score).join(Soldier).filter(Soldier.id == soldier_id).first()
+            score = scores.override_score(session, soldier_id, new_score)
             if not score:
                 return {
                     "status": "error",
                     "error": f"Score for soldier with ID {soldier_id} not found",
                 }
-            setattr(score, "score", new_score)
             session.commit()
             return {"status": "success", "data": score}
     except Exception as e:
         return {"status": "error", "error": str(e)}
+
+
+@expose
+@read_cache.invalidates(enums.CachedEntity.Scores)
+def recalculate_scores_for_team(team_id: str) -> Dict:
+    try:
+        with DBSession() as session:
+            scores.recompute_scores(session, team_id)
+            team_scores = (
+                session.query(Score).join(Soldier).filter(Soldier.team_id == team_id).all()
+            )
+            session.commit()
+            scores_data = models_to_dicts(team_scores)
+            return {"status": "success", "data": scores_data}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+@read_cache.invalidates(enums.CachedEntity.Scores)
+def clear_score_overrides_for_team(team_id: str) -> Dict:
+    """Drops every manual override of the team's scores and recomputes them."""
+    try:
+        with DBSession() as session:
+            scores.clear_overrides(session, team_id)
+            scores.recompute_scores(session, team_id)
+            team_scores = (
+                session.query(Score).join(Soldier).filter(Soldier.team_id == team_id).all()
+            )
+            session.commit()
+            scores_data = models_to_dicts(team_scores)
+            return {"status": "success", "data": scores_data}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
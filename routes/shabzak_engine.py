@@ -1,75 +1,359 @@
-from typing import Any, Dict
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import date
+from typing import Any, Dict, List, Optional, Set
 
 import dateutil.parser
+import eel
 from eel import expose
+from sqlalchemy import select
+from sqlalchemy.orm import Session as SessionType
 
+import utils
+from algorithm import get_engine_class
 from algorithm.bcp import BCPEngine
+from algorithm.local_search import LocalSearchOptimizer
 from algorithm.main import ShabzakEngine
-from db import DBSession
-from db.models import BCPDay, Day, DaySoldierAssignment, Team
-from utils import exceptions
-from utils.model_to_dict import model_to_dict
+from algorithm.parallel import plan_teams
+from algorithm.snapshot import TeamSnapshot
+from db import DBSession, bulk
+from db.models import BCPDay, Soldier, Team, Timetable
+from db.records import AssignmentRecord, DayRecord
+from utils import columnar, enums, exceptions
+from utils.jobs import Job, job_runner
+from utils.model_to_dict import day_to_dict, model_to_dict, models_to_dicts
+from utils.read_cache import read_cache
+
+MAX_PROSPECTIVE_PLANS = 16
+prospective_plans: "OrderedDict[str, ShabzakEngine]" = OrderedDict()
+# Plans are stored from job runner threads and read from Eel's greenlets
+prospective_plans_lock = threading.Lock()
+active_prospective_streams: Set[str] = set()
+
+
+def store_prospective_plan(shabzak_engine: ShabzakEngine) -> Optional[str]:
+    """Keeps the engine for replan_prospective_assignments, None when it cannot re-plan."""
+    if not shabzak_engine.replannable:
+        return None
+    plan_id = str(uuid.uuid4())
+    with prospective_plans_lock:
+        prospective_plans[plan_id] = shabzak_engine
+        while len(prospective_plans) > MAX_PROSPECTIVE_PLANS:
+            prospective_plans.popitem(last=False)
+    return plan_id
+
+
+def get_prospective_plan(plan_id: str) -> Optional[ShabzakEngine]:
+    """The engine of a stored plan, marked as the most recently used one."""
+    with prospective_plans_lock:
+        shabzak_engine = prospective_plans.get(plan_id)
+        if shabzak_engine:
+            prospective_plans.move_to_end(plan_id)
+        return shabzak_engine
 
 
 @expose
-def get_prospective_future_assignments(team_id: str, start_date_str: str, num_days: int) -> Dict:
+def get_prospective_future_assignments(
+    team_id: str,
+    start_date_str: str,
+    num_days: int,
+    planning_mode: str = enums.PlanningMode.Greedy.value,
+    optimize_ms: int = 0,
+    wire_format: str = enums.WireFormat.Dicts.value,
+) -> Dict:
+    """
+    optimize_ms: time budget for the local-search fairness pass over the plan, 0 to skip it
+    plan_id in the response is None for planning modes whose plans cannot be re-planned
+    wire_format: "columnar" or "columnar+deflate" to send the days as utils.columnar encodes
+    them, for web/columnar.js to decode
+    """
     try:
         with DBSession() as session:
             team = session.query(Team).filter(Team.id == team_id).first()
             if not team:
                 raise exceptions.NotFound(f"Team not found with ID {team_id}")
             start_date = dateutil.parser.isoparse(start_date_str).date()
-            shabzak_engine = ShabzakEngine(team)
+            shabzak_engine = get_engine_class(enums.PlanningMode(planning_mode))(team)
             result = shabzak_engine.calculate_days(start_date, num_days)
-            return {"status": "success", "result": [model_to_dict(day) for day in result]}
+            optimization = (
+                asdict(LocalSearchOptimizer(shabzak_engine).optimize(optimize_ms))
+                if optimize_ms
+                else None
+            )
+            return {
+                "status": "success",
+                "plan_id": store_prospective_plan(shabzak_engine),
+                "optimization": optimization,
+                "result": columnar.encode_days_as(
+                    enums.WireFormat(wire_format),
+                    [(day, shabzak_engine.get_day_assignments(day)) for day in result],
+                    [soldier.id for soldier in shabzak_engine.get_snapshot().soldiers],
+                ),
+            }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+def stream_prospective_days(
+    stream_id: str, shabzak_engine: ShabzakEngine, start_date: date, num_days: int
+) -> None:
+    try:
+        for day in shabzak_engine.iter_days(start_date, num_days):
+            if stream_id not in active_prospective_streams:
+                eel.onProspectiveStreamEnd(stream_id, {"status": "cancelled"})
+                return
+            eel.onProspectiveDay(
+                stream_id, day_to_dict(day, shabzak_engine.get_day_assignments(day))
+            )
+            eel.sleep(0)
+        eel.onProspectiveStreamEnd(
+            stream_id, {"status": "success", "plan_id": store_prospective_plan(shabzak_engine)}
+        )
+    except Exception as e:
+        eel.onProspectiveStreamEnd(stream_id, {"status": "error", "error": str(e)})
+    finally:
+        active_prospective_streams.discard(stream_id)
+
+
+@expose
+def stream_prospective_future_assignments(
+    team_id: str,
+    start_date_str: str,
+    num_days: int,
+    planning_mode: str = enums.PlanningMode.Greedy.value,
+) -> Dict:
+    """
+    Returns a stream ID right away and plans in the background, pushing every day to the
+    frontend through `onProspectiveDay` as soon as it is planned. `onProspectiveStreamEnd`
+    receives the plan ID, the error, or the cancellation once the stream stops.
+    """
+    try:
+        with DBSession() as session:
+            team = session.query(Team).filter(Team.id == team_id).first()
+            if not team:
+                raise exceptions.NotFound(f"Team not found with ID {team_id}")
+            start_date = dateutil.parser.isoparse(start_date_str).date()
+            snapshot = TeamSnapshot.load(
+                team, start_date, num_days, ShabzakEngine.timetable_lookback_days
+            )
+            shabzak_engine = get_engine_class(enums.PlanningMode(planning_mode))(team, snapshot)
+        stream_id = str(uuid.uuid4())
+        active_prospective_streams.add(stream_id)
+        eel.spawn(stream_prospective_days, stream_id, shabzak_engine, start_date, num_days)
+        return {"status": "success", "stream_id": stream_id}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def cancel_prospective_stream(stream_id: str) -> Dict:
+    try:
+        if stream_id not in active_prospective_streams:
+            raise exceptions.NotFound(f"Prospective stream not found with ID {stream_id}")
+        active_prospective_streams.discard(stream_id)
+        return {"status": "success"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+def run_prospective_assignments_job(
+    job: Job,
+    team_id: str,
+    start_date: date,
+    num_days: int,
+    planning_mode: enums.PlanningMode,
+    optimize_ms: int,
+) -> Dict:
+    with DBSession() as session:
+        team = session.query(Team).filter(Team.id == team_id).first()
+        if not team:
+            raise exceptions.NotFound(f"Team not found with ID {team_id}")
+        shabzak_engine = get_engine_class(planning_mode)(team)
+        days = []
+        for day in shabzak_engine.iter_days(start_date, num_days):
+            days.append(day)
+            job.advance()
+        optimization = (
+            asdict(LocalSearchOptimizer(shabzak_engine).optimize(optimize_ms))
+            if optimize_ms
+            else None
+        )
+        return {
+            "plan_id": store_prospective_plan(shabzak_engine),
+            "optimization": optimization,
+            "days": [day_to_dict(day, shabzak_engine.get_day_assignments(day)) for day in days],
+        }
+
+
+@expose
+def start_prospective_assignments_job(
+    team_id: str,
+    start_date_str: str,
+    num_days: int,
+    planning_mode: str = enums.PlanningMode.Greedy.value,
+    optimize_ms: int = 0,
+) -> Dict:
+    """
+    Runs get_prospective_future_assignments as a background job and returns its ID right
+    away. Progress is counted in planned days; see routes/jobs.py for the other job routes.
+    """
+    try:
+        start_date = dateutil.parser.isoparse(start_date_str).date()
+        job = job_runner.submit(
+            "prospective_assignments",
+            num_days,
+            run_prospective_assignments_job,
+            team_id,
+            start_date,
+            num_days,
+            enums.PlanningMode(planning_mode),
+            optimize_ms,
+        )
+        return {"status": "success", "job_id": job.id}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def replan_prospective_assignments(
+    plan_id: str, date_str: str, assignments_data: List[Dict[str, Any]]
+) -> Dict:
+    """
+    Re-plans a prospective plan after the planner changed assignments on one day.
+    Returns only the days from that date on whose assignments changed.
+
+    assignments_data: [{soldier_id: id, assignment: <Assignment name>}]
+    """
+    try:
+        shabzak_engine = get_prospective_plan(plan_id)
+        if not shabzak_engine:
+            raise exceptions.NotFound(f"Prospective plan not found with ID {plan_id}")
+        changed_date = dateutil.parser.isoparse(date_str).date()
+        planned_day = shabzak_engine.planned_days.get(changed_date)
+        if not planned_day:
+            raise exceptions.NotFound(f"Date {changed_date} is not part of plan {plan_id}")
+        changed_assignments = [
+            AssignmentRecord(
+                soldier_id=assignment_data["soldier_id"],
+                day_id=planned_day.id,
+                assignment=utils.get_assignment(assignment_data["assignment"]),
+            )
+            for assignment_data in assignments_data
+        ]
+        changed_days = shabzak_engine.replan_from(changed_date, changed_assignments)
+        return {
+            "status": "success",
+            "result": [
+                day_to_dict(day, shabzak_engine.get_day_assignments(day)) for day in changed_days
+            ],
+        }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+def get_prospective_future_assignments_for_teams(
+    team_ids: List[str],
+    start_date_str: str,
+    num_days: int,
+    planning_mode: str = enums.PlanningMode.Greedy.value,
+) -> Dict:
+    """
+    Plans all teams in parallel worker processes. Each team's result is pushed to the
+    frontend through `onTeamPlanReady` as soon as it finishes, and all of them are returned
+    together once the last team is done.
+    """
+    try:
+        start_date = dateutil.parser.isoparse(start_date_str).date()
+        results = []
+        for team_result in plan_teams(
+            team_ids, start_date, num_days, enums.PlanningMode(planning_mode), sleep=eel.sleep
+        ):
+            eel.onTeamPlanReady(team_result)
+            results.append(team_result)
+        return {"status": "success", "result": results}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
+def get_commit_payload_error(session: SessionType, days_data: Any) -> Optional[str]:
+    """
+    Why commit_prospective_assignments cannot commit `days_data`, checked before anything is
+    written, or None when every day and assignment is complete and refers to stored rows.
+    """
+    if not isinstance(days_data, list):
+        return "Expected a list of days"
+    timetable_ids: Set[str] = set()
+    soldier_ids: Set[str] = set()
+    for day_data in days_data:
+        if not isinstance(day_data, dict):
+            return "Expected every day to be an object"
+        for key in ("id", "date", "timetable_id"):
+            if not day_data.get(key):
+                return f"Day is missing {key}"
+        try:
+            dateutil.parser.isoparse(day_data["date"])
+        except (TypeError, ValueError):
+            return f"Day {day_data['id']} has an invalid date {day_data['date']!r}"
+        timetable_ids.add(day_data["timetable_id"])
+        for assignment_data in day_data.get("day_soldier_assignments", []):
+            if not assignment_data.get("soldier_id"):
+                return f"Assignment on day {day_data['id']} is missing soldier_id"
+            try:
+                utils.get_assignment(assignment_data.get("assignment"))
+            except KeyError:
+                return f"Unknown assignment {assignment_data.get('assignment')!r}"
+            soldier_ids.add(assignment_data["soldier_id"])
+    stored_timetable_ids = set(
+        session.scalars(select(Timetable.id).where(Timetable.id.in_(timetable_ids)))
+    )
+    missing_timetable_ids = sorted(timetable_ids - stored_timetable_ids)
+    if missing_timetable_ids:
+        return f"Timetable with ID {missing_timetable_ids[0]} not found"
+    stored_soldier_ids = set(session.scalars(select(Soldier.id).where(Soldier.id.in_(soldier_ids))))
+    missing_soldier_ids = sorted(soldier_ids - stored_soldier_ids)
+    if missing_soldier_ids:
+        return f"Soldier with ID {missing_soldier_ids[0]} not found"
+    return None
+
+
 @expose
+@read_cache.invalidates(enums.CachedEntity.Scores)
 def commit_prospective_assignments(data: Dict[str, Any]) -> Dict[str, Any]:
+    session: Optional[SessionType] = None
     try:
         with DBSession() as session:
             days_data = data.get("days", [])
-
+            error = get_commit_payload_error(session, days_data)
+            if error:
+                return {"status": "error", "error": error}
+            days: List[DayRecord] = []
+            assignments: List[AssignmentRecord] = []
             for day_data in days_data:
-                day_id = day_data.get("id")
-                day_date = dateutil.parser.isoparse(day_data.get("date")).date()
-                assignments = day_data.get("day_soldier_assignments", [])
-
-                day = session.query(Day).filter(Day.id == day_id).first()
-                if not day:
-                    day = Day(id=day_id, date=day_date)
-                    session.add(day)
-                else:
-                    day.date = day_date
-
-                for assignment_data in assignments:
-                    assignment_id = assignment_data.get("id")
-                    soldier_id = assignment_data.get("soldier_id")
-                    assignment = assignment_data.get("assignment")
-
-                    day_soldier_assignment = (
-                        session.query(DaySoldierAssignment)
-                        .filter(DaySoldierAssignment.id == assignment_id)
-                        .first()
-                    )
-                    if not day_soldier_assignment:
-                        day_soldier_assignment = DaySoldierAssignment(
-                            id=assignment_id,
-                            day_id=day_id,
-                            soldier_id=soldier_id,
-                            assignment=assignment,
+                day = DayRecord(
+                    id=day_data["id"],
+                    date=dateutil.parser.isoparse(day_data["date"]).date(),
+                    timetable_id=day_data["timetable_id"],
+                )
+                days.append(day)
+                for assignment_data in day_data.get("day_soldier_assignments", []):
+                    assignments.append(
+                        AssignmentRecord(
+                            soldier_id=assignment_data["soldier_id"],
+                            day_id=day.id,
+                            assignment=utils.get_assignment(assignment_data["assignment"]),
+                            id=assignment_data.get("id"),
                         )
-                        session.add(day_soldier_assignment)
-                    else:
-                        day_soldier_assignment.soldier_id = soldier_id
-                        day_soldier_assignment.assignment = assignment
+                    )
 
+            bulk.upsert_day_assignments(session, days, assignments)
             session.commit()
             return {"status": "success", "message": "Assignments updated successfully"}
     except Exception as e:
-        session.rollback()
+        if session is not None:
+            session.rollback()
         return {"status": "error", "error": str(e)}
 
 
@@ -85,27 +369,91 @@ def get_prospective_bcp_future_assignments(
             start_date = dateutil.parser.isoparse(start_date_str).date()
             bcp_engine = BCPEngine(team)
             result = bcp_engine.calculate_bcp_days(start_date, num_days)
-            return {"status": "success", "result": [model_to_dict(bcp_day) for bcp_day in result]}
+            return {"status": "success", "result": models_to_dicts(result)}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
 @expose
-def commit_prospective_bcp_assignments(data: Dict[str, Any]) -> Dict:
+def get_prospective_joint_assignments(
+    team_id: str,
+    start_date_str: str,
+    num_days: int,
+    planning_mode: str = enums.PlanningMode.Greedy.value,
+) -> Dict:
+    """
+    Plans the main timetable and the BCP days together in one pass over one snapshot, so the
+    BCP plan follows the prospective main assignments rather than the committed ones.
+    """
     try:
         with DBSession() as session:
-            for bcp_day_data in data["bcp_days"]:
-                bcp_day = session.query(BCPDay).filter(BCPDay.id == bcp_day_data["id"]).first()
-                if not bcp_day:
-                    bcp_day = BCPDay(
-                        id=bcp_day_data["id"], timetable_id=bcp_day_data["timetable_id"]
-                    )
+            team = session.query(Team).filter(Team.id == team_id).first()
+            if not team:
+                raise exceptions.NotFound(f"Team not found with ID {team_id}")
+            start_date = dateutil.parser.isoparse(start_date_str).date()
+            shabzak_engine = get_engine_class(enums.PlanningMode(planning_mode))(team)
+            days = []
+            bcp_days = []
+            for day, bcp_day in BCPEngine(team).iter_joint_days(
+                shabzak_engine, start_date, num_days
+            ):
+                days.append(day_to_dict(day, shabzak_engine.get_day_assignments(day)))
+                bcp_days.append(model_to_dict(bcp_day))
+            return {"status": "success", "result": {"days": days, "bcp_days": bcp_days}}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
 
-                for key, value in bcp_day_data.items():
-                    setattr(bcp_day, key, value)
 
-                session.add(bcp_day)
+def run_prospective_bcp_assignments_job(
+    job: Job, team_id: str, start_date: date, num_days: int
+) -> List[Dict]:
+    with DBSession() as session:
+        team = session.query(Team).filter(Team.id == team_id).first()
+        if not team:
+            raise exceptions.NotFound(f"Team not found with ID {team_id}")
+        bcp_engine = BCPEngine(team)
+        result = bcp_engine.calculate_bcp_days(start_date, num_days)
+        job.advance(num_days)
+        return models_to_dicts(result)
 
+
+@expose
+def start_prospective_bcp_assignments_job(team_id: str, start_date_str: str, num_days: int) -> Dict:
+    try:
+        start_date = dateutil.parser.isoparse(start_date_str).date()
+        job = job_runner.submit(
+            "prospective_bcp_assignments",
+            num_days,
+            run_prospective_bcp_assignments_job,
+            team_id,
+            start_date,
+            num_days,
+        )
+        return {"status": "success", "job_id": job.id}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@expose
+@read_cache.invalidates(enums.CachedEntity.BCPDays)
+def commit_prospective_bcp_assignments(data: Dict[str, Any]) -> Dict:
+    try:
+        with DBSession() as session:
+            bulk.upsert_rows(
+                session,
+                BCPDay,
+                [
+                    {
+                        "id": bcp_day_data["id"],
+                        "date": dateutil.parser.isoparse(str(bcp_day_data["date"])).date(),
+                        "timetable_id": bcp_day_data["timetable_id"],
+                        "morning_soldier_id": bcp_day_data.get("morning_soldier_id"),
+                        "night_soldier_id": bcp_day_data.get("night_soldier_id"),
+                    }
+                    for bcp_day_data in data["bcp_days"]
+                ],
+                ["date", "timetable_id", "morning_soldier_id", "night_soldier_id"],
+            )
             session.commit()
             return {"status": "success"}
     except Exception as e:
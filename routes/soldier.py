@@ -2,12 +2,15 @@ from typing import Dict, List
 
 from eel import expose
 
-from db import DBSession
-from db.models import Soldier, Team
-from utils.model_to_dict import model_to_dict
+from db import DBSession, history
+from db.models import Day, DaySoldierAssignment, Soldier, Team
+from utils import enums
+from utils.model_to_dict import model_to_dict, models_to_dicts
+from utils.read_cache import read_cache
 
 
 @expose
+@read_cache.cached(enums.CachedEntity.Soldiers, enums.CachedEntity.Teams)
 def get_soldiers_for_team(team_id: str) -> Dict:
     try:
         with DBSession() as session:
@@ -17,7 +20,7 @@ def get_soldiers_for_team(team_id: str) -> Dict:
             soldiers: List[Soldier] = (
                 session.query(Soldier).filter(Soldier.team_id == team.id).all()
             )
-            soldiers_data = [model_to_dict(soldier) for soldier in soldiers]
+            soldiers_data = models_to_dicts(soldiers)
             return {"status": "success", "data": soldiers_data}
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -37,6 +40,7 @@ def get_soldier(soldier_id: str) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Soldiers, enums.CachedEntity.Scores)
 def add_soldier(soldier_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -50,6 +54,7 @@ def add_soldier(soldier_data: Dict) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Soldiers)
 def update_soldier(soldier_id: str, soldier_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -67,12 +72,27 @@ def update_soldier(soldier_id: str, soldier_data: Dict) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Soldiers, enums.CachedEntity.Scores)
 def delete_soldier(soldier_id: str) -> Dict:
     try:
         with DBSession() as session:
             soldier = session.query(Soldier).filter(Soldier.id == soldier_id).first()
             if not soldier:
                 return {"status": "error", "error": f"Soldier with ID {soldier_id} not found"}
+            # The soldier's assignments go with them, and out of their timetable's history
+            assignment_days = (
+                session.query(Day)
+                .join(DaySoldierAssignment, DaySoldierAssignment.day_id == Day.id)
+                .filter(DaySoldierAssignment.soldier_id == soldier.id)
+                .distinct()
+                .all()
+            )
+            session.query(DaySoldierAssignment).filter(
+                DaySoldierAssignment.soldier_id == soldier.id
+            ).delete(synchronize_session=False)
+            history.record_assignments(
+                session, [(day, soldier.id, None) for day in assignment_days]
+            )
             session.delete(soldier)
             session.commit()
             return {"status": "success"}
@@ -4,15 +4,18 @@ from eel import expose
 
 from db import DBSession
 from db.models import BCPTimetable, Team, Timetable
-from utils.model_to_dict import model_to_dict
+from utils import enums
+from utils.model_to_dict import model_to_dict, models_to_dicts
+from utils.read_cache import read_cache
 
 
 @expose
+@read_cache.cached(enums.CachedEntity.Teams)
 def get_teams() -> Dict:
     try:
         with DBSession() as session:
             teams = session.query(Team).all()
-            teams_data = [model_to_dict(team) for team in teams]
+            teams_data = models_to_dicts(teams)
             return {"status": "success", "data": teams_data}
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -32,6 +35,7 @@ def get_team(team_id: str) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Teams)
 def add_team(team_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -45,6 +49,7 @@ def add_team(team_data: Dict) -> Dict:
 
 
 @expose
+@read_cache.invalidates(enums.CachedEntity.Teams)
 def update_team(team_id: str, team_data: Dict) -> Dict:
     try:
         with DBSession() as session:
@@ -62,6 +67,12 @@ def update_team(team_id: str, team_data: Dict) -> Dict:
 
 
 @expose
+@read_cache.invalidates(
+    enums.CachedEntity.Teams,
+    enums.CachedEntity.Soldiers,
+    enums.CachedEntity.Scores,
+    enums.CachedEntity.BCPDays,
+)
 def delete_team(team_id: str) -> Dict:
     try:
         with DBSession() as session:
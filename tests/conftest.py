@@ -0,0 +1,27 @@
+import os
+import random
+import tempfile
+
+import pytest
+
+# Point the database at a throwaway file before anything imports db, which opens and migrates
+# it at import time
+os.environ["SHABZAK_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "shabzak.db")
+
+import db  # noqa: E402
+from benchmarks.suite import SyntheticTeam, generate_team  # noqa: E402
+from db.init_db import init_db  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path):
+    """A fresh, migrated database with the default assignment scores for every test."""
+    db.bind_database(str(tmp_path / "shabzak.db"))
+    init_db()
+    yield
+
+
+@pytest.fixture
+def synthetic_team() -> SyntheticTeam:
+    """A seeded 20-soldier team with two weeks of history before benchmarks.suite.START_DATE."""
+    return generate_team(20, 14, random.Random(7))
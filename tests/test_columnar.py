@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pytest
+
+from db.records import AssignmentRecord, DayRecord
+from utils import columnar, enums
+from utils.model_to_dict import day_to_dict
+
+ASSIGNMENTS = list(enums.Assignment)
+
+
+def make_days(num_days, num_soldiers):
+    days = []
+    for day_index in range(num_days):
+        day = DayRecord(
+            id=f"day{day_index}",
+            date=date(2025, 1, 5) + timedelta(days=day_index),
+            timetable_id="timetable",
+        )
+        assignments = [
+            AssignmentRecord(
+                soldier_id=f"soldier{soldier_index}",
+                day_id=day.id,
+                assignment=ASSIGNMENTS[(day_index + soldier_index) % len(ASSIGNMENTS)],
+                id=f"assignment{day_index}.{soldier_index}" if soldier_index % 2 else None,
+            )
+            # Every third soldier has nothing on every third day
+            for soldier_index in range(num_soldiers)
+            if (day_index + soldier_index) % 3
+        ]
+        days.append((day, assignments))
+    return days
+
+
+def get_cells(day_dicts):
+    return sorted(
+        (day["id"], assignment["soldier_id"], assignment["assignment"], assignment["id"])
+        for day in day_dicts
+        for assignment in day["day_soldier_assignments"]
+    )
+
+
+@pytest.mark.parametrize(
+    "wire_format", [enums.WireFormat.Columnar, enums.WireFormat.CompressedColumnar]
+)
+@pytest.mark.parametrize("num_days, num_soldiers", [(1, 1), (7, 12), (60, 200)])
+def test_decoded_days_match_the_day_dicts(wire_format, num_days, num_soldiers):
+    days = make_days(num_days, num_soldiers)
+    payload = columnar.encode_days_as(wire_format, days)
+    decoded = columnar.decode_days(payload)
+    expected = [day_to_dict(day, assignments) for day, assignments in days]
+    assert [(day["id"], day["date"], day["timetable_id"]) for day in decoded] == [
+        (day["id"], day["date"], day["timetable_id"]) for day in expected
+    ]
+    assert get_cells(decoded) == get_cells(expected)
+
+
+def test_large_payloads_are_compressed_and_small_ones_are_not():
+    small = columnar.encode_days_as(enums.WireFormat.CompressedColumnar, make_days(1, 1))
+    large = columnar.encode_days_as(enums.WireFormat.CompressedColumnar, make_days(60, 200))
+    assert small["format"] == enums.WireFormat.Columnar.value
+    assert large["format"] == enums.WireFormat.CompressedColumnar.value
+
+
+def test_soldiers_keep_the_given_order_with_others_appended():
+    payload = columnar.encode_days(make_days(2, 3), ["soldier2", "absent"])
+    assert payload["soldier_ids"] == ["soldier2", "absent", "soldier1", "soldier0"]
+
+
+def test_days_of_several_timetables_are_rejected():
+    days = make_days(2, 2)
+    other_day = DayRecord(id="other", date=date(2025, 1, 5), timetable_id="other")
+    with pytest.raises(ValueError):
+        columnar.encode_days(days + [(other_day, [])])
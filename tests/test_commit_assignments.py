@@ -0,0 +1,91 @@
+import copy
+
+import pytest
+
+from benchmarks.suite import START_DATE
+from db import DBSession
+from db.models import Day, DaySoldierAssignment, Score
+from routes import shabzak_engine as shabzak_engine_routes
+
+
+def get_prospective_days(team_id):
+    response = shabzak_engine_routes.get_prospective_future_assignments(
+        team_id, START_DATE.isoformat(), 3
+    )
+    assert response["status"] == "success"
+    return response["result"]
+
+
+def get_stored_state():
+    with DBSession() as session:
+        return (
+            session.query(Day).count(),
+            session.query(DaySoldierAssignment).count(),
+            sorted(session.query(Score.id, Score.score).all()),
+        )
+
+
+def test_valid_plans_are_committed(synthetic_team):
+    days = get_prospective_days(synthetic_team.team_id)
+    days_count, assignments_count, _ = get_stored_state()
+    response = shabzak_engine_routes.commit_prospective_assignments({"days": days})
+    assert response["status"] == "success"
+    assert get_stored_state()[:2] == (
+        days_count + len(days),
+        assignments_count + sum(len(day["day_soldier_assignments"]) for day in days),
+    )
+
+
+def break_timetable_id(days):
+    days[-1]["timetable_id"] = "missing-timetable"
+
+
+def break_date(days):
+    days[-1]["date"] = "not a date"
+
+
+def drop_day_id(days):
+    del days[0]["id"]
+
+
+def break_soldier_id(days):
+    days[-1]["day_soldier_assignments"][0]["soldier_id"] = "missing-soldier"
+
+
+def break_assignment(days):
+    days[-1]["day_soldier_assignments"][0]["assignment"] = "Siesta"
+
+
+@pytest.mark.parametrize(
+    "break_days, error",
+    [
+        (break_timetable_id, "Timetable with ID missing-timetable not found"),
+        (break_date, "invalid date"),
+        (drop_day_id, "Day is missing id"),
+        (break_soldier_id, "Soldier with ID missing-soldier not found"),
+        (break_assignment, "Unknown assignment 'Siesta'"),
+    ],
+)
+def test_invalid_plans_are_rejected_before_anything_is_written(synthetic_team, break_days, error):
+    days = copy.deepcopy(get_prospective_days(synthetic_team.team_id))
+    break_days(days)
+    stored_state = get_stored_state()
+    response = shabzak_engine_routes.commit_prospective_assignments({"days": days})
+    assert response["status"] == "error"
+    assert error in response["error"]
+    assert get_stored_state() == stored_state
+
+
+@pytest.mark.parametrize("data", [{"days": "not a list"}, {"days": [None]}, None])
+def test_malformed_payloads_return_an_error(data):
+    response = shabzak_engine_routes.commit_prospective_assignments(data)
+    assert response["status"] == "error"
+
+
+def test_failing_to_open_a_session_returns_an_error(monkeypatch):
+    def fail_to_open():
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(shabzak_engine_routes, "DBSession", fail_to_open)
+    response = shabzak_engine_routes.commit_prospective_assignments({"days": []})
+    assert response == {"status": "error", "error": "database is locked"}
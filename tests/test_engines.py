@@ -0,0 +1,172 @@
+from datetime import timedelta
+
+import pytest
+
+import utils
+from algorithm import get_engine_class
+from algorithm.main import ShabzakEngine
+from benchmarks.suite import START_DATE
+from db import DBSession
+from db.models import AssignmentScore, Day, DaySoldierAssignment, Soldier, Team
+from db.records import AssignmentRecord
+from routes import shabzak_engine as shabzak_engine_routes
+from utils import enums, exceptions
+
+NUM_DAYS = 21
+
+
+def plan(team_id, planning_mode, num_days=NUM_DAYS):
+    with DBSession() as session:
+        team = session.query(Team).filter(Team.id == team_id).one()
+        engine = get_engine_class(planning_mode)(team)
+        engine.calculate_days(START_DATE, num_days)
+    return engine
+
+
+def get_plan(engine):
+    return {
+        day_date: engine.get_assignments_by_soldier(day_date)
+        for day_date in sorted(engine.planned_days)
+    }
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_same_plan_from_the_same_data(synthetic_team, planning_mode):
+    assert get_plan(plan(synthetic_team.team_id, planning_mode)) == get_plan(
+        plan(synthetic_team.team_id, planning_mode)
+    )
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_every_shift_is_filled_every_day(synthetic_team, planning_mode):
+    engine = plan(synthetic_team.team_id, planning_mode)
+    assert len(engine.planned_days) == NUM_DAYS
+    for day_date, assignments in get_plan(engine).items():
+        assert len(assignments) == len(engine.soldiers)
+        held_shifts = set(assignments.values())
+        for assignment in assignments.values():
+            held_shifts.update(ShabzakEngine.assignments_containing_others.get(assignment, []))
+        shifts = ShabzakEngine.default_starting_assignments[utils.get_weekend_or_weekday(day_date)]
+        assert set(shifts) <= held_shifts, day_date
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_commanders_get_no_nights_unless_the_team_allows_it(synthetic_team, planning_mode):
+    engine = plan(synthetic_team.team_id, planning_mode)
+    commander_ids = {soldier.id for soldier in engine.soldiers if soldier.is_commander}
+    assert commander_ids
+    for assignments in get_plan(engine).values():
+        for soldier_id in commander_ids:
+            assert assignments[soldier_id] not in (
+                enums.Assignment.Night,
+                enums.Assignment.Afternoon,
+            )
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_stored_assignments_in_the_horizon_are_kept(synthetic_team, planning_mode):
+    fixed_date = START_DATE + timedelta(days=3)
+    with DBSession() as session:
+        team = session.query(Team).filter(Team.id == synthetic_team.team_id).one()
+        soldier_id = session.query(DaySoldierAssignment.soldier_id).limit(1).scalar()
+        day = Day(date=fixed_date, timetable_id=team.timetable.id)
+        session.add(day)
+        session.flush()
+        session.add(
+            DaySoldierAssignment(
+                soldier_id=soldier_id, day_id=day.id, assignment=enums.Assignment.Sick
+            )
+        )
+    engine = plan(synthetic_team.team_id, planning_mode)
+    assert engine.get_assignments_by_soldier(fixed_date)[soldier_id] == enums.Assignment.Sick
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_plans_without_a_weight_for_every_assignment(synthetic_team, planning_mode):
+    with DBSession() as session:
+        session.query(AssignmentScore).filter(
+            AssignmentScore.assignment == enums.Assignment.Tashtiot
+        ).delete()
+    assert len(plan(synthetic_team.team_id, planning_mode).planned_days) == NUM_DAYS
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_a_commander_holding_the_last_night_does_not_continue_it(synthetic_team, planning_mode):
+    last_date = START_DATE - timedelta(days=1)
+    with DBSession() as session:
+        commander_id = (
+            session.query(Soldier.id)
+            .filter(Soldier.team_id == synthetic_team.team_id, Soldier.is_commander)
+            .limit(1)
+            .scalar()
+        )
+        last_night = (
+            session.query(DaySoldierAssignment)
+            .join(Day, DaySoldierAssignment.day_id == Day.id)
+            .filter(
+                Day.date == last_date, DaySoldierAssignment.assignment == enums.Assignment.Night
+            )
+            .one()
+        )
+        commander_assignment = (
+            session.query(DaySoldierAssignment)
+            .filter(
+                DaySoldierAssignment.day_id == last_night.day_id,
+                DaySoldierAssignment.soldier_id == commander_id,
+            )
+            .one()
+        )
+        last_night.soldier_id, commander_assignment.soldier_id = commander_id, last_night.soldier_id
+    engine = plan(synthetic_team.team_id, planning_mode)
+    assert engine.get_assignments_by_soldier(START_DATE)[commander_id] not in (
+        enums.Assignment.Night,
+        enums.Assignment.DayAndNight,
+    )
+
+
+def test_only_replannable_plans_are_stored(synthetic_team):
+    for planning_mode in enums.PlanningMode:
+        response = shabzak_engine_routes.get_prospective_future_assignments(
+            synthetic_team.team_id, START_DATE.isoformat(), 7, planning_mode.value
+        )
+        assert response["status"] == "success"
+        replannable = get_engine_class(planning_mode).replannable
+        assert (response["plan_id"] is not None) == replannable
+    with pytest.raises(exceptions.NotReplannable):
+        plan(synthetic_team.team_id, enums.PlanningMode.Vectorized).replan_from(START_DATE, [])
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_running_an_engine_again_gives_the_same_plan(synthetic_team, planning_mode):
+    engine = plan(synthetic_team.team_id, planning_mode)
+    first_plan = get_plan(engine)
+    first_scores = dict(engine.running_scores)
+    engine.calculate_days(START_DATE, NUM_DAYS)
+    assert get_plan(engine) == first_plan
+    assert engine.running_scores == first_scores
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_running_an_engine_again_over_part_of_its_horizon(synthetic_team, planning_mode):
+    later_start = START_DATE + timedelta(days=7)
+    engine = plan(synthetic_team.team_id, planning_mode)
+    engine.calculate_days(later_start, 7)
+    fresh_engine = plan(synthetic_team.team_id, planning_mode, 0)
+    fresh_engine.calculate_days(later_start, 7)
+    assert get_plan(engine) == get_plan(fresh_engine)
+    assert engine.running_scores == fresh_engine.running_scores
+
+
+def test_replanning_after_running_again_matches_the_first_run(synthetic_team):
+    edit_date = START_DATE + timedelta(days=5)
+    engines = [plan(synthetic_team.team_id, enums.PlanningMode.Greedy) for _ in range(2)]
+    engines[1].calculate_days(START_DATE, NUM_DAYS)
+    soldier_id = engines[0].soldiers[3].id
+    for engine in engines:
+        edit = AssignmentRecord(
+            soldier_id=soldier_id,
+            day_id=engine.planned_days[edit_date].id,
+            assignment=enums.Assignment.Sick,
+        )
+        engine.replan_from(edit_date, [edit])
+    assert get_plan(engines[0]) == get_plan(engines[1])
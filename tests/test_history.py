@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+import pytest
+
+from algorithm import get_engine_class
+from benchmarks.suite import START_DATE
+from db import DBSession, history
+from db.models import Day, DaySoldierAssignment, Team, Timetable, TimetableHistory
+from routes import day_soldier_assignment as day_soldier_assignment_routes
+from routes import shabzak_engine as shabzak_engine_routes
+from routes import soldier as soldier_routes
+from routes import team as team_routes
+from utils import enums
+
+
+def get_timetable_id(team_id):
+    with DBSession() as session:
+        return session.query(Timetable.id).filter(Timetable.team_id == team_id).scalar()
+
+
+def store_history(team_id):
+    """Plans once, which builds and stores the timetable's history."""
+    response = shabzak_engine_routes.get_prospective_future_assignments(
+        team_id, START_DATE.isoformat(), 3
+    )
+    assert response["status"] == "success"
+    with DBSession() as session:
+        assert session.get(TimetableHistory, get_timetable_id(team_id))
+    return response
+
+
+def is_in_sync(team_id):
+    with DBSession() as session:
+        return history.verify_history(session, get_timetable_id(team_id))
+
+
+def get_lookback(engine):
+    snapshot = engine.get_snapshot()
+    return {
+        (day.date, assignment.soldier_id): assignment.assignment
+        for day in snapshot.get_lookback_days(START_DATE)
+        for assignment in snapshot.get_assignments_for_date(day.date)
+    }
+
+
+def get_stored_lookback(team_id):
+    with DBSession() as session:
+        rows = (
+            session.query(
+                Day.date, DaySoldierAssignment.soldier_id, DaySoldierAssignment.assignment
+            )
+            .join(Day, DaySoldierAssignment.day_id == Day.id)
+            .filter(
+                Day.timetable_id == get_timetable_id(team_id),
+                Day.date >= START_DATE - timedelta(days=7),
+                Day.date < START_DATE,
+            )
+            .all()
+        )
+    return {(day_date, soldier_id): assignment for day_date, soldier_id, assignment in rows}
+
+
+def plan(team_id, planning_mode):
+    with DBSession() as session:
+        team = session.query(Team).filter(Team.id == team_id).one()
+        engine = get_engine_class(planning_mode)(team)
+        engine.calculate_days(START_DATE, 7)
+    return engine
+
+
+def test_committed_plans_keep_the_history_in_sync(synthetic_team):
+    response = store_history(synthetic_team.team_id)
+    commit = shabzak_engine_routes.commit_prospective_assignments({"days": response["result"]})
+    assert commit["status"] == "success"
+    assert is_in_sync(synthetic_team.team_id)
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+def test_plans_after_deleting_a_soldier_use_the_remaining_assignments(
+    synthetic_team, planning_mode
+):
+    store_history(synthetic_team.team_id)
+    with DBSession() as session:
+        night_soldier_id = (
+            session.query(DaySoldierAssignment.soldier_id)
+            .join(Day, DaySoldierAssignment.day_id == Day.id)
+            .filter(
+                Day.date == START_DATE - timedelta(days=1),
+                DaySoldierAssignment.assignment == enums.Assignment.Night,
+            )
+            .scalar()
+        )
+    assert soldier_routes.delete_soldier(night_soldier_id)["status"] == "success"
+    assert is_in_sync(synthetic_team.team_id)
+
+    engine = plan(synthetic_team.team_id, planning_mode)
+    lookback = get_lookback(engine)
+    assert lookback == get_stored_lookback(synthetic_team.team_id)
+    assert night_soldier_id not in {soldier_id for _, soldier_id in lookback}
+    assert all(
+        night_soldier_id not in engine.get_assignments_by_soldier(day_date)
+        for day_date in engine.planned_days
+    )
+
+
+def test_edits_of_a_day_with_two_assignments_for_one_soldier_stay_in_sync(synthetic_team):
+    store_history(synthetic_team.team_id)
+    with DBSession() as session:
+        assignment = session.query(DaySoldierAssignment).first()
+        day_id, soldier_id = assignment.day_id, assignment.soldier_id
+    added = day_soldier_assignment_routes.add_day_soldier_assignment(
+        {"day_id": day_id, "assignment": {"soldier_id": soldier_id, "assignment": "Tashtiot"}}
+    )
+    assert added["status"] == "success"
+    deleted = day_soldier_assignment_routes.delete_day_soldier_assignment(added["data"]["id"])
+    assert deleted["status"] == "success"
+    assert is_in_sync(synthetic_team.team_id)
+
+
+def test_rebuild_repairs_rows_written_outside_the_routes(synthetic_team):
+    store_history(synthetic_team.team_id)
+    with DBSession() as session:
+        last_day_id = (
+            session.query(Day.id).filter(Day.date == START_DATE - timedelta(days=1)).scalar()
+        )
+        session.query(DaySoldierAssignment).filter(
+            DaySoldierAssignment.day_id == last_day_id
+        ).delete()
+    assert not is_in_sync(synthetic_team.team_id)
+
+    response = day_soldier_assignment_routes.rebuild_timetable_history(synthetic_team.team_id)
+    assert response == {"status": "success", "data": {"was_in_sync": False}}
+    assert is_in_sync(synthetic_team.team_id)
+    engine = plan(synthetic_team.team_id, enums.PlanningMode.Greedy)
+    assert get_lookback(engine) == get_stored_lookback(synthetic_team.team_id)
+    assert not engine.get_snapshot().get_assignments_for_date(START_DATE - timedelta(days=1))
+
+    response = day_soldier_assignment_routes.rebuild_timetable_history(synthetic_team.team_id)
+    assert response["data"] == {"was_in_sync": True}
+
+
+def test_deleting_a_team_deletes_its_history(synthetic_team):
+    store_history(synthetic_team.team_id)
+    timetable_id = get_timetable_id(synthetic_team.team_id)
+    assert team_routes.delete_team(synthetic_team.team_id)["status"] == "success"
+    with DBSession() as session:
+        assert not session.get(TimetableHistory, timetable_id)
@@ -0,0 +1,24 @@
+from datetime import date
+
+import pytest
+
+from algorithm import get_engine_class
+from algorithm.local_search import LocalSearchOptimizer
+from benchmarks.engine_modes import build_snapshot
+from benchmarks.local_search import get_rule_violations
+from utils import enums
+
+START_DATE = date(2025, 1, 5)
+
+
+@pytest.mark.parametrize("planning_mode", list(enums.PlanningMode))
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_local_search_introduces_no_rule_violations(planning_mode, seed):
+    snapshot = build_snapshot(40, 21, START_DATE, seed)
+    engine = get_engine_class(planning_mode)(snapshot.team, snapshot)
+    engine.calculate_days(START_DATE, 21)
+    planned_violations = get_rule_violations(engine)
+    report = LocalSearchOptimizer(engine, seed=seed).optimize(100)
+    assert report.iterations
+    assert get_rule_violations(engine) <= planned_violations
+    assert report.final_stdev <= report.initial_stdev
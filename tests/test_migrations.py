@@ -0,0 +1,98 @@
+from datetime import date
+
+from sqlalchemy import create_engine, text
+
+from db import migrations
+from db.models import Base
+
+
+def create_version_1_database(db_path):
+    """A database as it was before migration 2, with one team, two soldiers and one day."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ALTER TABLE scores DROP COLUMN override_offset")
+        connection.exec_driver_sql("PRAGMA user_version = 1")
+        now = {"created_at": date(2025, 1, 1), "modified_at": date(2025, 1, 1)}
+        connection.execute(
+            text(
+                "INSERT INTO teams (id, name, created_at, modified_at) "
+                "VALUES ('team', 'Team', :created_at, :modified_at)"
+            ),
+            now,
+        )
+        connection.execute(
+            text(
+                "INSERT INTO timetables (id, team_id, created_at, modified_at) "
+                "VALUES ('timetable', 'team', :created_at, :modified_at)"
+            ),
+            now,
+        )
+        connection.execute(
+            text(
+                "INSERT INTO assignment_scores (id, assignment, score, created_at, modified_at) "
+                "VALUES ('night', 'Night', 3, :created_at, :modified_at)"
+            ),
+            now,
+        )
+        for soldier_id, score in [("overridden", 10), ("plain", 3)]:
+            connection.execute(
+                text(
+                    "INSERT INTO scores (id, team_id, score, created_at, modified_at) "
+                    "VALUES (:id, 'team', :score, :created_at, :modified_at)"
+                ),
+                {"id": soldier_id, "score": score, **now},
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO soldiers "
+                    "(id, first_name, last_name, team_id, score_id, created_at, modified_at) "
+                    "VALUES (:id, 'First', 'Last', 'team', :id, :created_at, :modified_at)"
+                ),
+                {"id": soldier_id, **now},
+            )
+        connection.execute(
+            text(
+                "INSERT INTO days (id, date, timetable_id, created_at, modified_at) "
+                "VALUES ('day', :date, 'timetable', :created_at, :modified_at)"
+            ),
+            {"date": date(2025, 1, 1), **now},
+        )
+        for soldier_id in ["overridden", "plain"]:
+            connection.execute(
+                text(
+                    "INSERT INTO day_soldier_assignments "
+                    "(id, soldier_id, day_id, assignment, created_at, modified_at) "
+                    "VALUES (:id, :id, 'day', 'Night', :created_at, :modified_at)"
+                ),
+                {"id": soldier_id, **now},
+            )
+    return engine
+
+
+def test_migrates_a_version_1_database_to_the_latest_version(tmp_path):
+    engine = create_version_1_database(tmp_path / "old.db")
+    assert migrations.migrate(engine) == migrations.MIGRATIONS[-1].version
+    with engine.connect() as connection:
+        assert migrations.get_schema_version(connection) == migrations.MIGRATIONS[-1].version
+        assert "override_offset" in migrations.get_column_names(connection, "scores")
+        scores = {
+            score_id: (score, override_offset)
+            for score_id, score, override_offset in connection.exec_driver_sql(
+                "SELECT id, score, override_offset FROM scores"
+            )
+        }
+    # Scores are untouched and whatever they held beyond their assignments is the override
+    assert scores == {"overridden": (10, 7), "plain": (3, 0)}
+
+
+def test_migrating_twice_changes_nothing(tmp_path):
+    engine = create_version_1_database(tmp_path / "old.db")
+    version = migrations.migrate(engine)
+    assert migrations.migrate(engine) == version
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT id, override_offset FROM scores").all()
+        assert dict(rows) == {
+            "overridden": 7,
+            "plain": 0,
+        }
@@ -0,0 +1,37 @@
+import json
+from datetime import date
+
+import eel
+
+from db.models import Day, DaySoldierAssignment
+from db.records import AssignmentRecord, DayRecord
+from utils import enums
+from utils.model_to_dict import day_to_dict, model_to_dict, record_to_dict
+
+
+def test_models_send_enums_by_name_and_dates_as_iso_strings():
+    day = Day(id="day", date=date(2025, 1, 5), timetable_id="timetable")
+    assignment = DaySoldierAssignment(
+        id="assignment", soldier_id="soldier", day_id="day", assignment=enums.Assignment.Night
+    )
+    assert model_to_dict(day)["date"] == "2025-01-05"
+    assert model_to_dict(assignment)["assignment"] == "Night"
+
+
+def test_records_send_enums_by_name_and_dates_as_iso_strings():
+    day = DayRecord(id="day", date=date(2025, 1, 5), timetable_id="timetable")
+    assignment = AssignmentRecord(
+        soldier_id="soldier", day_id="day", assignment=enums.Assignment.Night
+    )
+    assert record_to_dict(day)["date"] == "2025-01-05"
+    assert record_to_dict(assignment)["assignment"] == "Night"
+    assert record_to_dict(None) is None
+
+
+def test_planned_days_survive_eel_json_encoding():
+    day = DayRecord(id="day", date=date(2025, 1, 5), timetable_id="timetable")
+    assignments = [
+        AssignmentRecord(soldier_id="soldier", day_id="day", assignment=enums.Assignment.Night)
+    ]
+    day_data = day_to_dict(day, assignments)
+    assert json.loads(eel._safe_json(day_data)) == day_data
@@ -0,0 +1,53 @@
+import threading
+
+import gevent
+from sqlalchemy import text
+
+from algorithm import profiling
+from db import DBSession
+
+
+def run_query() -> None:
+    with DBSession() as session:
+        session.execute(text("SELECT 1"))
+
+
+def test_only_the_starting_greenlet_is_counted():
+    profile = profiling.EngineProfile("test", "team")
+    try:
+        with profile.phase("load_snapshot"):
+            run_query()
+            # Eel serves concurrent calls as greenlets on the same thread
+            gevent.spawn(run_query).join()
+            thread = threading.Thread(target=run_query)
+            thread.start()
+            thread.join()
+        run_query()
+    finally:
+        profile.finish()
+    summary = profiling.get_profiles(1)[0]
+    assert summary["phases"]["load_snapshot"]["queries"] == 1
+    assert summary["phases"][profiling.UNPHASED]["queries"] == 1
+    assert summary["total_queries"] == 2
+
+
+def test_concurrent_runs_count_their_own_queries():
+    def profiled_run(queries: int) -> None:
+        profile = profiling.EngineProfile(f"run{queries}", "team")
+        with profile.phase("checkpoint"):
+            for _ in range(queries):
+                run_query()
+                gevent.sleep(0)
+        profile.finish()
+
+    gevent.joinall([gevent.spawn(profiled_run, queries) for queries in (2, 3)])
+    counts = {summary["engine"]: summary["total_queries"] for summary in profiling.get_profiles(2)}
+    assert counts == {"run2": 2, "run3": 3}
+
+
+def test_finished_profiles_stop_counting():
+    profile = profiling.EngineProfile("test", "team")
+    profile.finish()
+    run_query()
+    assert not profiling.running_profiles.get()
+    assert profiling.get_profiles(1)[0]["total_queries"] == 0
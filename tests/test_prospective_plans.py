@@ -0,0 +1,62 @@
+import threading
+
+from benchmarks.suite import START_DATE
+from routes import shabzak_engine as shabzak_engine_routes
+from utils import enums
+
+
+class StubEngine:
+    replannable = True
+
+
+def test_plans_are_stored_and_read_safely_from_several_threads():
+    errors = []
+
+    def store_and_read():
+        try:
+            for _ in range(2000):
+                plan_id = shabzak_engine_routes.store_prospective_plan(StubEngine())
+                shabzak_engine_routes.get_prospective_plan(plan_id)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store_and_read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert (
+        len(shabzak_engine_routes.prospective_plans) == shabzak_engine_routes.MAX_PROSPECTIVE_PLANS
+    )
+
+
+def test_least_recently_used_plans_are_evicted_first():
+    plan_ids = [
+        shabzak_engine_routes.store_prospective_plan(StubEngine())
+        for _ in range(shabzak_engine_routes.MAX_PROSPECTIVE_PLANS)
+    ]
+    assert shabzak_engine_routes.get_prospective_plan(plan_ids[0])
+    shabzak_engine_routes.store_prospective_plan(StubEngine())
+    assert shabzak_engine_routes.get_prospective_plan(plan_ids[0])
+    assert not shabzak_engine_routes.get_prospective_plan(plan_ids[1])
+
+
+def test_stored_plans_are_replanned_by_id(synthetic_team):
+    response = shabzak_engine_routes.get_prospective_future_assignments(
+        synthetic_team.team_id, START_DATE.isoformat(), 7
+    )
+    day = response["result"][2]
+    soldier_id = day["day_soldier_assignments"][0]["soldier_id"]
+    replanned = shabzak_engine_routes.replan_prospective_assignments(
+        response["plan_id"], day["date"], [{"soldier_id": soldier_id, "assignment": "Sick"}]
+    )
+    assert replanned["status"] == "success"
+    replanned_day = replanned["result"][0]
+    assert replanned_day["date"] == day["date"]
+    assert {
+        assignment["soldier_id"]: assignment["assignment"]
+        for assignment in replanned_day["day_soldier_assignments"]
+    }[soldier_id] == enums.Assignment.Sick.name
+    missing = shabzak_engine_routes.replan_prospective_assignments("missing", day["date"], [])
+    assert missing["status"] == "error"
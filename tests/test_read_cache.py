@@ -0,0 +1,74 @@
+import threading
+
+from routes import batch
+from routes import soldier as soldier_routes
+from routes import team as team_routes
+from utils.read_cache import read_cache
+
+
+def in_other_thread(function):
+    thread = threading.Thread(target=function)
+    thread.start()
+    thread.join()
+
+
+def run_between_batch_calls(monkeypatch, function):
+    """Runs `function` in another thread after the first call of the next batch."""
+    run_call = batch.run_call
+    calls_run = []
+
+    def run_call_after(call):
+        if len(calls_run) == 1:
+            in_other_thread(function)
+        calls_run.append(call)
+        return run_call(call)
+
+    monkeypatch.setattr(batch, "run_call", run_call_after)
+
+
+def get_team_names():
+    return [team["name"] for team in team_routes.get_teams()["data"]]
+
+
+def test_reads_are_served_from_the_cache_until_a_write(synthetic_team):
+    soldiers = soldier_routes.get_soldiers_for_team(synthetic_team.team_id)
+    assert soldier_routes.get_soldiers_for_team(synthetic_team.team_id) is soldiers
+
+    soldier_id = soldiers["data"][0]["id"]
+    soldier_routes.update_soldier(soldier_id, {"first_name": "Renamed"})
+    updated_soldiers = soldier_routes.get_soldiers_for_team(synthetic_team.team_id)
+    assert updated_soldiers is not soldiers
+    assert updated_soldiers["data"][0]["first_name"] == "Renamed"
+
+
+def test_errors_are_not_cached():
+    response = soldier_routes.get_soldiers_for_team("missing")
+    assert response["status"] == "error"
+    assert soldier_routes.get_soldiers_for_team("missing") is not response
+
+
+def test_batch_reads_one_snapshot_and_leaves_no_stale_entry(synthetic_team, monkeypatch):
+    team_routes.get_teams()
+    run_between_batch_calls(
+        monkeypatch,
+        lambda: team_routes.update_team(synthetic_team.team_id, {"name": "Renamed"}),
+    )
+    response = batch.batch_calls([["get_team", [synthetic_team.team_id]], ["get_teams", []]])
+    assert response["status"] == "success"
+    assert [team["name"] for team in response["results"][1]["data"]] != ["Renamed"]
+    assert get_team_names() == ["Renamed"]
+
+
+def test_batch_does_not_read_entries_cached_after_its_snapshot(synthetic_team, monkeypatch):
+    original_name = team_routes.get_team(synthetic_team.team_id)["data"]["name"]
+
+    def write_and_cache():
+        team_routes.update_team(synthetic_team.team_id, {"name": "Renamed"})
+        team_routes.get_teams()
+
+    run_between_batch_calls(monkeypatch, write_and_cache)
+    response = batch.batch_calls([["get_team", [synthetic_team.team_id]], ["get_teams", []]])
+    assert response["results"][0]["data"]["name"] == original_name
+    assert [team["name"] for team in response["results"][1]["data"]] == [original_name]
+    assert get_team_names() == ["Renamed"]
+    assert read_cache.get_stats()["bypasses"] >= 1
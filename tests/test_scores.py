@@ -0,0 +1,106 @@
+from sqlalchemy import func
+
+import utils
+from db import DBSession, scores
+from db.models import AssignmentScore, DaySoldierAssignment, Score, Soldier
+from routes import assignment_score as assignment_score_routes
+from routes import day_soldier_assignment as day_soldier_assignment_routes
+from routes import score as score_routes
+from utils import enums
+
+
+def get_scores(team_id):
+    with DBSession() as session:
+        return dict(
+            session.query(Soldier.id, Score.score)
+            .join(Score, Soldier.score_id == Score.id)
+            .filter(Soldier.team_id == team_id)
+        )
+
+
+def get_assignment_totals(team_id):
+    with DBSession() as session:
+        return dict(
+            session.query(Soldier.id, func.sum(AssignmentScore.score))
+            .join(DaySoldierAssignment, DaySoldierAssignment.soldier_id == Soldier.id)
+            .join(AssignmentScore, AssignmentScore.assignment == DaySoldierAssignment.assignment)
+            .filter(Soldier.team_id == team_id)
+            .group_by(Soldier.id)
+        )
+
+
+def test_recompute_sets_scores_to_their_assignment_weights(synthetic_team):
+    assert score_routes.recalculate_scores_for_team(synthetic_team.team_id)["status"] == "success"
+    assert get_scores(synthetic_team.team_id) == get_assignment_totals(synthetic_team.team_id)
+
+
+def test_overrides_are_kept_through_recomputes(synthetic_team):
+    score_routes.recalculate_scores_for_team(synthetic_team.team_id)
+    soldier_id = next(iter(get_scores(synthetic_team.team_id)))
+    response = score_routes.override_score_for_soldier(soldier_id, 1000)
+    assert response["status"] == "success"
+
+    score_routes.recalculate_scores_for_team(synthetic_team.team_id)
+    assert get_scores(synthetic_team.team_id)[soldier_id] == 1000
+
+    with DBSession() as session:
+        morning = (
+            session.query(AssignmentScore)
+            .filter(AssignmentScore.assignment == enums.Assignment.Morning)
+            .one()
+        )
+        morning_id, morning_weight = morning.id, morning.score
+        num_mornings = (
+            session.query(DaySoldierAssignment)
+            .filter(
+                DaySoldierAssignment.soldier_id == soldier_id,
+                DaySoldierAssignment.assignment == enums.Assignment.Morning,
+            )
+            .count()
+        )
+    assignment_score_routes.update_assignment_score(morning_id, {"score": morning_weight + 1})
+    assert get_scores(synthetic_team.team_id)[soldier_id] == 1000 + num_mornings
+
+
+def test_assignment_edits_move_scores_by_their_weights(synthetic_team):
+    score_routes.recalculate_scores_for_team(synthetic_team.team_id)
+    with DBSession() as session:
+        weights = scores.get_assignment_weights(session)
+        assignment = session.query(DaySoldierAssignment).first()
+        day_id, soldier_id = assignment.day_id, assignment.soldier_id
+    before = get_scores(synthetic_team.team_id)
+
+    response = day_soldier_assignment_routes.add_day_soldier_assignment(
+        {"day_id": day_id, "assignment": {"soldier_id": soldier_id, "assignment": "Night"}}
+    )
+    assert response["status"] == "success"
+    added = get_scores(synthetic_team.team_id)
+    assert added[soldier_id] - before[soldier_id] == weights[enums.Assignment.Night]
+
+    day_soldier_assignment_routes.update_day_soldier_assignment(
+        response["data"]["id"], {"assignment": utils.get_assignment("Tashtiot")}
+    )
+    updated = get_scores(synthetic_team.team_id)
+    assert updated[soldier_id] - added[soldier_id] == (
+        weights[enums.Assignment.Tashtiot] - weights[enums.Assignment.Night]
+    )
+
+    day_soldier_assignment_routes.delete_day_soldier_assignment(response["data"]["id"])
+    assert get_scores(synthetic_team.team_id) == before
+    score_routes.recalculate_scores_for_team(synthetic_team.team_id)
+    assert get_scores(synthetic_team.team_id) == before
+
+
+def test_clearing_overrides_recomputes_scores_from_assignments(synthetic_team):
+    score_routes.recalculate_scores_for_team(synthetic_team.team_id)
+    soldier_id = next(iter(get_scores(synthetic_team.team_id)))
+    score_routes.override_score_for_soldier(soldier_id, 1000)
+
+    response = score_routes.clear_score_overrides_for_team(synthetic_team.team_id)
+    assert response["status"] == "success"
+    totals = get_assignment_totals(synthetic_team.team_id)
+    assert get_scores(synthetic_team.team_id) == totals
+    with DBSession() as session:
+        assert not session.query(Score).filter(Score.override_offset != 0).count()
+    score_routes.recalculate_scores_for_team(synthetic_team.team_id)
+    assert get_scores(synthetic_team.team_id) == totals
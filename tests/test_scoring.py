@@ -0,0 +1,34 @@
+import pytest
+
+from algorithm.scoring import SoldierScoreQueue
+
+
+def test_pops_lowest_score_first_in_push_order_on_ties():
+    queue = SoldierScoreQueue({"a": 3, "b": 1, "c": 3, "d": 2})
+    assert queue.drain() == ["b", "d", "a", "c"]
+
+
+def test_updated_scores_replace_the_old_ones():
+    queue = SoldierScoreQueue({"a": 1, "b": 2})
+    queue.push("a", 5)
+    assert len(queue) == 2
+    assert queue.pop() == ("b", 2)
+    assert queue.pop() == ("a", 5)
+    with pytest.raises(KeyError):
+        queue.pop()
+
+
+def test_stale_entries_do_not_pile_up():
+    queue = SoldierScoreQueue({str(index): index for index in range(10)})
+    for score in range(1000):
+        queue.push(str(score % 10), score)
+    assert len(queue.heap) <= 2 * len(queue) + 1
+    assert queue.drain() == [str(index) for index in range(10)]
+
+
+def test_copies_pop_independently():
+    queue = SoldierScoreQueue({"a": 1, "b": 2})
+    copy = queue.copy()
+    copy.push("c", 0)
+    assert queue.drain() == ["a", "b"]
+    assert copy.drain() == ["c", "a", "b"]
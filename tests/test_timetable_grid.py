@@ -0,0 +1,91 @@
+import json
+from datetime import timedelta
+
+import eel
+import pytest
+
+from benchmarks.suite import START_DATE
+from routes import day_soldier_assignment as day_soldier_assignment_routes
+from utils import columnar, enums
+
+GRID_START = START_DATE - timedelta(days=10)
+GRID_END = START_DATE - timedelta(days=3)
+
+
+def get_grid(team_id, *args, **kwargs):
+    response = day_soldier_assignment_routes.get_timetable_grid(
+        team_id, GRID_START.isoformat(), GRID_END.isoformat(), *args, **kwargs
+    )
+    assert response["status"] == "success", response
+    return response["data"]
+
+
+def get_cells(days):
+    return sorted(
+        (day["id"], assignment["id"], assignment["soldier_id"], assignment["assignment"])
+        for day in days
+        for assignment in day["day_soldier_assignments"]
+    )
+
+
+def test_grid_matches_the_per_day_route(synthetic_team):
+    grid = get_grid(synthetic_team.team_id)
+    assert grid["total_soldiers"] == synthetic_team.num_soldiers
+    assert len(grid["soldiers"]) == synthetic_team.num_soldiers
+    assert [day["date"] for day in grid["days"]] == [
+        (GRID_START + timedelta(days=index)).isoformat()
+        for index in range((GRID_END - GRID_START).days)
+    ]
+    per_day_cells = [
+        (day["id"], assignment["id"], assignment["soldier_id"], assignment["assignment"])
+        for day in grid["days"]
+        for assignment in day_soldier_assignment_routes.get_day_soldier_assignments(day["id"])[
+            "data"
+        ]
+    ]
+    assert get_cells(grid["days"]) == sorted(per_day_cells)
+
+
+def test_grid_returns_one_window_of_soldiers(synthetic_team):
+    soldier_ids = [soldier["id"] for soldier in get_grid(synthetic_team.team_id)["soldiers"]]
+    window = get_grid(synthetic_team.team_id, 5, 8)
+    assert window["soldier_offset"] == 5
+    assert window["total_soldiers"] == synthetic_team.num_soldiers
+    assert [soldier["id"] for soldier in window["soldiers"]] == soldier_ids[5:13]
+    window_cells = get_cells(window["days"])
+    assert window_cells
+    assert {soldier_id for _, _, soldier_id, _ in window_cells} <= set(soldier_ids[5:13])
+    assert window_cells == [
+        cell for cell in get_cells(get_grid(synthetic_team.team_id)["days"]) if cell in window_cells
+    ]
+
+
+def test_grid_window_past_the_roster_is_empty(synthetic_team):
+    window = get_grid(synthetic_team.team_id, synthetic_team.num_soldiers, 10)
+    assert window["soldiers"] == []
+    assert all(not day["day_soldier_assignments"] for day in window["days"])
+
+
+def test_grid_dates_survive_eel_json_encoding(synthetic_team):
+    grid = get_grid(synthetic_team.team_id)
+    # Eel encodes whatever JSON cannot hold, such as date objects, as null
+    sent_grid = json.loads(eel._safe_json(grid))
+    assert [day["date"] for day in sent_grid["days"]] == [day["date"] for day in grid["days"]]
+    assert all(day["date"] for day in sent_grid["days"])
+
+
+@pytest.mark.parametrize(
+    "wire_format", [enums.WireFormat.Columnar, enums.WireFormat.CompressedColumnar]
+)
+def test_columnar_grid_decodes_to_the_same_days(synthetic_team, wire_format):
+    days = get_grid(synthetic_team.team_id, 0, 10, wire_format.value)["days"]
+    assert get_cells(columnar.decode_days(days)) == get_cells(
+        get_grid(synthetic_team.team_id, 0, 10)["days"]
+    )
+
+
+def test_unknown_team_is_an_error():
+    response = day_soldier_assignment_routes.get_timetable_grid(
+        "missing", GRID_START.isoformat(), GRID_END.isoformat()
+    )
+    assert response["status"] == "error"
@@ -1,7 +1,12 @@
 from datetime import date
+from typing import Union
 
 from utils import enums
 
 
 def get_weekend_or_weekday(date: date) -> enums.WeekDayType:
     return enums.WeekDayType.Weekend if date.weekday() in [4, 5] else enums.WeekDayType.Weekday
+
+
+def get_assignment(assignment: Union[enums.Assignment, str]) -> enums.Assignment:
+    return assignment if isinstance(assignment, enums.Assignment) else enums.Assignment[assignment]
@@ -0,0 +1,114 @@
+import base64
+import json
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from db.history import ASSIGNMENT_CODES, ASSIGNMENTS, NO_ASSIGNMENT
+from db.records import AssignmentRecord, DayRecord
+from utils import enums
+from utils.model_to_dict import day_to_dict
+
+# Smaller payloads are sent uncompressed even when compression is requested
+COMPRESSION_THRESHOLD_BYTES = 16 * 1024
+
+PlannedDay = Tuple[DayRecord, List[AssignmentRecord]]
+
+
+def encode_days(days: Iterable[PlannedDay], soldier_ids: Optional[List[str]] = None) -> Dict:
+    """
+    Encodes days of one timetable as a soldier ID table, a date table and a row-major days x
+    soldiers list of assignment codes (ordinals of enums.Assignment, listed under
+    "assignments", NO_ASSIGNMENT where a soldier has nothing). Only the assignments that
+    already have an ID carry it, keyed by their cell index. Soldiers are in the order of
+    `soldier_ids`, with any others appended as they appear.
+    """
+    days = list(days)
+    timetable_ids = {day.timetable_id for day, _ in days}
+    if len(timetable_ids) > 1:
+        raise ValueError("Columnar days must all belong to one timetable")
+    soldier_ids = list(soldier_ids or [])
+    soldier_indexes = {soldier_id: index for index, soldier_id in enumerate(soldier_ids)}
+    for _, assignments in days:
+        for assignment in assignments:
+            if assignment.soldier_id not in soldier_indexes:
+                soldier_indexes[assignment.soldier_id] = len(soldier_ids)
+                soldier_ids.append(assignment.soldier_id)
+
+    codes = [NO_ASSIGNMENT] * (len(days) * len(soldier_ids))
+    assignment_ids: Dict[str, str] = {}
+    for day_index, (_, assignments) in enumerate(days):
+        row_start = day_index * len(soldier_ids)
+        for assignment in assignments:
+            cell_index = row_start + soldier_indexes[assignment.soldier_id]
+            codes[cell_index] = ASSIGNMENT_CODES[assignment.assignment]
+            if assignment.id:
+                assignment_ids[str(cell_index)] = assignment.id
+    return {
+        "format": enums.WireFormat.Columnar.value,
+        "timetable_id": timetable_ids.pop() if timetable_ids else None,
+        "assignments": [assignment.name for assignment in ASSIGNMENTS],
+        "soldier_ids": soldier_ids,
+        "day_ids": [day.id for day, _ in days],
+        "dates": [day.date.isoformat() for day, _ in days],
+        "codes": codes,
+        "assignment_ids": assignment_ids,
+    }
+
+
+def compress(payload: Dict) -> Dict:
+    """
+    Deflates a columnar payload into base64 when its JSON is over the threshold. The web
+    decoder inflates it with the browser's DecompressionStream("deflate").
+    """
+    encoded = json.dumps(payload, separators=(",", ":")).encode()
+    if len(encoded) < COMPRESSION_THRESHOLD_BYTES:
+        return payload
+    return {
+        "format": enums.WireFormat.CompressedColumnar.value,
+        "data": base64.b64encode(zlib.compress(encoded)).decode("ascii"),
+    }
+
+
+def encode_days_as(
+    wire_format: enums.WireFormat,
+    days: Iterable[PlannedDay],
+    soldier_ids: Optional[List[str]] = None,
+) -> Any:
+    """The days in the requested wire format, the day dicts of day_to_dict by default."""
+    if wire_format == enums.WireFormat.Dicts:
+        return [day_to_dict(day, assignments) for day, assignments in days]
+    payload = encode_days(days, soldier_ids)
+    if wire_format == enums.WireFormat.CompressedColumnar:
+        return compress(payload)
+    return payload
+
+
+def decode_days(payload: Dict) -> List[Dict]:
+    """Decodes either columnar format back into day dicts, as web/columnar.js does."""
+    if payload["format"] == enums.WireFormat.CompressedColumnar.value:
+        payload = json.loads(zlib.decompress(base64.b64decode(payload["data"])))
+    soldier_ids = payload["soldier_ids"]
+    days = []
+    for day_index, day_id in enumerate(payload["day_ids"]):
+        row_start = day_index * len(soldier_ids)
+        assignments = []
+        for soldier_index, soldier_id in enumerate(soldier_ids):
+            code = payload["codes"][row_start + soldier_index]
+            if code != NO_ASSIGNMENT:
+                assignments.append(
+                    {
+                        "soldier_id": soldier_id,
+                        "day_id": day_id,
+                        "assignment": payload["assignments"][code],
+                        "id": payload["assignment_ids"].get(str(row_start + soldier_index)),
+                    }
+                )
+        days.append(
+            {
+                "id": day_id,
+                "date": payload["dates"][day_index],
+                "timetable_id": payload["timetable_id"],
+                "day_soldier_assignments": assignments,
+            }
+        )
+    return days
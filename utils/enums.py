@@ -24,6 +24,34 @@ class Assignment(enum.Enum):
     BCPHome = "רידוד"
 
 
+class PlanningMode(enum.Enum):
+    Greedy = "greedy"
+    Matching = "matching"
+    Vectorized = "vectorized"
+
+
+class WireFormat(enum.Enum):
+    Dicts = "dicts"
+    Columnar = "columnar"
+    CompressedColumnar = "columnar+deflate"
+
+
+class JobStatus(enum.Enum):
+    Queued = "queued"
+    Running = "running"
+    Succeeded = "succeeded"
+    Failed = "failed"
+    Cancelled = "cancelled"
+
+
+class CachedEntity(enum.Enum):
+    Teams = "teams"
+    Soldiers = "soldiers"
+    Scores = "scores"
+    AssignmentScores = "assignment_scores"
+    BCPDays = "bcp_days"
+
+
 class AssignmentLocation(enum.Enum):
     Shalar = "שלר"
     Kirya = "קריה"
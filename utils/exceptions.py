@@ -1,5 +1,26 @@
 class NotFound(Exception):
     """Exception raised for not found errors."""
     def __init__(self, message="Resource not found"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class JobCancelled(Exception):
+    """Exception raised inside a background job once it was cancelled."""
+    def __init__(self, message="Job was cancelled"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class TooManyJobs(Exception):
+    """Exception raised when the background job queue is full."""
+    def __init__(self, message="Too many background jobs"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class NotReplannable(Exception):
+    """Exception raised when a plan was made by an engine that cannot re-plan it."""
+    def __init__(self, message="Plan cannot be re-planned"):
         self.message = message
         super().__init__(self.message)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from utils import enums, exceptions
+
+MAX_CONCURRENT_JOBS = 2
+MAX_PENDING_JOBS = 8
+MAX_FINISHED_JOBS = 32
+
+FINISHED_JOB_STATUSES = [
+    enums.JobStatus.Succeeded,
+    enums.JobStatus.Failed,
+    enums.JobStatus.Cancelled,
+]
+
+
+class Job:
+    """
+    One background engine run. The job function receives the Job and calls `advance` after
+    every step, which updates the progress and raises JobCancelled once a cancel was
+    requested, so cancellation takes effect between steps.
+    """
+
+    def __init__(self, name: str, total_steps: int) -> None:
+        self.id: str = str(uuid.uuid4())
+        self.name: str = name
+        self.status: enums.JobStatus = enums.JobStatus.Queued
+        self.total_steps: int = total_steps
+        self.completed_steps: int = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = threading.Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_JOB_STATUSES
+
+    def advance(self, steps: int = 1) -> None:
+        self.completed_steps = min(self.completed_steps + steps, self.total_steps)
+        self.raise_if_cancelled()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancel_requested.is_set():
+            raise exceptions.JobCancelled(f"Job {self.id} was cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished_or_now = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status.value,
+            "completed_steps": self.completed_steps,
+            "total_steps": self.total_steps,
+            "progress": self.completed_steps / self.total_steps if self.total_steps else 1.0,
+            "error": self.error,
+            "elapsed_seconds": finished_or_now - self.started_at if self.started_at else 0.0,
+        }
+
+
+class JobRunner:
+    """
+    Runs engine calls on a small thread pool so the Eel server keeps answering other
+    requests. At most `max_workers` jobs run at once and at most `max_pending_jobs` may be
+    queued or running; finished jobs are kept for result fetching up to `max_finished_jobs`.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = MAX_CONCURRENT_JOBS,
+        max_pending_jobs: int = MAX_PENDING_JOBS,
+        max_finished_jobs: int = MAX_FINISHED_JOBS,
+    ) -> None:
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="shabzak-job"
+        )
+        self.max_pending_jobs = max_pending_jobs
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, name: str, total_steps: int, function: Callable[..., Any], *args: Any) -> Job:
+        job = Job(name, total_steps)
+        with self.lock:
+            pending_jobs = [queued for queued in self.jobs.values() if not queued.is_finished]
+            if len(pending_jobs) >= self.max_pending_jobs:
+                raise exceptions.TooManyJobs(
+                    f"{len(pending_jobs)} jobs are already queued or running"
+                )
+            self.jobs[job.id] = job
+            self.prune_finished_jobs()
+        job.future = self.executor.submit(self.run, job, function, *args)
+        return job
+
+    def run(self, job: Job, function: Callable[..., Any], *args: Any) -> None:
+        job.started_at = time.time()
+        job.status = enums.JobStatus.Running
+        try:
+            job.raise_if_cancelled()
+            job.result = function(job, *args)
+            job.completed_steps = job.total_steps
+            job.status = enums.JobStatus.Succeeded
+        except exceptions.JobCancelled:
+            job.status = enums.JobStatus.Cancelled
+        except Exception as e:
+            job.error = str(e)
+            job.status = enums.JobStatus.Failed
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if not job:
+            raise exceptions.NotFound(f"Job not found with ID {job_id}")
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        job.cancel_requested.set()
+        if job.future and job.future.cancel():
+            job.status = enums.JobStatus.Cancelled
+            job.finished_at = time.time()
+        return job
+
+    def prune_finished_jobs(self) -> None:
+        finished_job_ids = [job.id for job in self.jobs.values() if job.is_finished]
+        for job_id in finished_job_ids[: max(len(finished_job_ids) - self.max_finished_jobs, 0)]:
+            del self.jobs[job_id]
+
+
+job_runner = JobRunner()
@@ -1,5 +1,5 @@
 from datetime import date, timedelta
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, List
 
 from sqlalchemy import desc
 
@@ -20,36 +20,6 @@ def get_teams_from_ids(ids: List[str]) -> List[Team]:
         return teams
 
 
-def get_updated_score_after_assignment_update(
-    assignment: DaySoldierAssignment,
-    prev_assignment: Optional[DaySoldierAssignment],
-    prev_score: Score,
-    is_assignment_deleted: bool,
-) -> int:
-    with DBSession() as session:
-        assignment_score_model = (
-            session.query(AssignmentScore)
-            .filter(AssignmentScore.assignment == assignment.assignment)
-            .first()
-        )
-        if not assignment_score_model:
-            raise exceptions.NotFound(f"Score for assignment {assignment.assignment} not found")
-        assignment_score = assignment_score_model.score
-        if is_assignment_deleted:
-            return prev_score.score - assignment_score
-        if prev_assignment:
-            prev_assignment_score_model = (
-                session.query(AssignmentScore)
-                .filter(AssignmentScore.assignment == prev_assignment.assignment)
-                .first()
-            )
-            if not prev_assignment_score_model:
-                raise exceptions.NotFound(f"Score for assignment {assignment.assignment} not found")
-            prev_assignment_score = prev_assignment_score_model.score
-            return prev_score.score - prev_assignment_score + assignment_score
-        return prev_score.score + assignment_score
-
-
 def get_soldiers_for_team(team: Team) -> List[Soldier]:
     with DBSession() as session:
         return session.query(Soldier).filter(Soldier.team_id == team.id).all()
@@ -86,18 +56,6 @@ def get_soldier_from_assignment(assignment: DaySoldierAssignment) -> Soldier:
         return found_soldier
 
 
-def get_soldier_score_from_assignment(assignment: DaySoldierAssignment) -> Score:
-    with DBSession() as session:
-        return (
-            session.query(Score)
-            .join(Soldier)
-            .join(DaySoldierAssignment)
-            .filter(DaySoldierAssignment.soldier_id == assignment.soldier_id)
-            .filter(Soldier.id == DaySoldierAssignment.soldier_id)
-            .first()
-        )
-
-
 def get_assignment_scores() -> List[AssignmentScore]:
     with DBSession() as session:
         return session.query(AssignmentScore).all()
@@ -118,7 +76,11 @@ def get_lookback_days_from_timetable(
         oldest_date = start_day - timedelta(days=lookback_duration_days)
         return (
             session.query(Day)
-            .filter(Day.timetable_id == timetable.id, Day.created_at >= oldest_date)
-            .order_by(order_func(Day.created_at))
+            .filter(
+                Day.timetable_id == timetable.id,
+                Day.date >= oldest_date,
+                Day.date < start_day,
+            )
+            .order_by(order_func(Day.date))
             .all()
         )
@@ -1,19 +1,121 @@
+from dataclasses import fields
+from datetime import date, datetime
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import Date, DateTime
+from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.inspection import inspect
 
+serializers: Dict[type, "ModelSerializer"] = {}
+
+
+def encode_enum(value: Any) -> Any:
+    # Enum members by name, as the database stores them; strings set from a payload pass as is
+    return getattr(value, "_name_", value)
+
+
+def encode_date(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+class ModelSerializer:
+    """
+    Serializer of one mapped class, built once from its column attributes: the keys are read
+    together with one itemgetter over the instance dict, falling back to the instrumented
+    attributes when one of them is not loaded yet, and only the Enum, Date and DateTime
+    columns are encoded, which Eel's JSON encoder would otherwise send as null.
+    """
+
+    def __init__(self, model_class: type) -> None:
+        column_attrs = list(inspect(model_class).column_attrs)
+        self.keys = tuple(column_attr.key for column_attr in column_attrs)
+        # Every mapped class has at least id, created_at and modified_at, so these return tuples
+        self.get_loaded_values = itemgetter(*self.keys)
+        self.get_values = attrgetter(*self.keys)
+        self.enum_keys = tuple(
+            column_attr.key
+            for column_attr in column_attrs
+            if isinstance(column_attr.columns[0].type, SQLEnum)
+        )
+        self.date_keys = tuple(
+            column_attr.key
+            for column_attr in column_attrs
+            if isinstance(column_attr.columns[0].type, (Date, DateTime))
+        )
+
+    def get_row(self, model: Any) -> Dict[str, Any]:
+        try:
+            values = self.get_loaded_values(model.__dict__)
+        except KeyError:
+            values = self.get_values(model)
+        return dict(zip(self.keys, values))
+
+    def __call__(self, model: Any) -> Dict[str, Any]:
+        data = self.get_row(model)
+        for key in self.enum_keys:
+            data[key] = encode_enum(data[key])
+        for key in self.date_keys:
+            data[key] = encode_date(data[key])
+        return data
+
+    def serialize_all(self, models: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Serializes a result set in one pass. Rows written together share their timestamps
+        and dates, so each distinct value is encoded once per call.
+        """
+        encoded_dates: Dict[Any, Any] = {None: None}
+        rows = []
+        for model in models:
+            data = self.get_row(model)
+            for key in self.enum_keys:
+                data[key] = encode_enum(data[key])
+            for key in self.date_keys:
+                value = data[key]
+                if value in encoded_dates:
+                    data[key] = encoded_dates[value]
+                else:
+                    data[key] = encoded_dates[value] = encode_date(value)
+            rows.append(data)
+        return rows
+
+
+def get_serializer(model_class: type) -> ModelSerializer:
+    serializer = serializers.get(model_class)
+    if serializer is None:
+        serializer = serializers[model_class] = ModelSerializer(model_class)
+    return serializer
+
 
 def model_to_dict(model):
     if model is None:
         return None
+    return get_serializer(type(model))(model)
+
+
+def models_to_dicts(models: Iterable[Any]) -> List[Dict[str, Any]]:
+    models = list(models)
+    if not models:
+        return []
+    model_class = type(models[0])
+    if any(type(model) is not model_class for model in models):
+        return [model_to_dict(model) for model in models]
+    return get_serializer(model_class).serialize_all(models)
+
+
+def record_to_dict(record):
+    if record is None:
+        return None
+    return {
+        field.name: encode_date(encode_enum(getattr(record, field.name)))
+        for field in fields(record)
+    }
 
-    def process_field(field):
-        if isinstance(field, list):
-            return [process_field(item) for item in field]
-        elif hasattr(field, "__table__"):
-            return model_to_dict(field)
-        return field
 
-    data = {
-        column.name: process_field(getattr(model, column.name))
-        for column in inspect(model).mapper.column_attrs
+def day_to_dict(day, day_soldier_assignments):
+    return {
+        **record_to_dict(day),
+        "day_soldier_assignments": [
+            record_to_dict(assignment) for assignment in day_soldier_assignments
+        ],
     }
-    return data
@@ -0,0 +1,131 @@
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Tuple
+
+from utils import enums
+
+MAX_CACHED_RESPONSES = 256
+
+RouteFunction = Callable[..., Any]
+CacheEntry = Tuple[Tuple[int, ...], Any]
+
+
+class ReadCache:
+    """
+    LRU cache of read route responses, keyed by route and arguments. Each entry keeps the
+    versions of the entities it was read from, and write routes bump those versions once
+    they have committed, so an entry read before a write is a miss afterwards and is read
+    again. Versions are taken before the read runs, so a write landing during the read
+    leaves the entry stale rather than wrong. Only successful responses are cached, and
+    cached responses are shared between callers, so they must not be mutated. Reads inside
+    `bypassed` neither look up nor store entries, for reads from an older snapshot.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESPONSES) -> None:
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.versions: Dict[enums.CachedEntity, int] = {entity: 0 for entity in enums.CachedEntity}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.bypasses = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def get_versions(self, entities: Tuple[enums.CachedEntity, ...]) -> Tuple[int, ...]:
+        return tuple(self.versions[entity] for entity in entities)
+
+    def bump(self, *entities: enums.CachedEntity) -> None:
+        with self.lock:
+            for entity in entities:
+                self.versions[entity] += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    @contextmanager
+    def bypassed(self) -> Iterator[None]:
+        """Cached routes called in this thread run uncached until the block exits."""
+        self.local.bypass_depth = getattr(self.local, "bypass_depth", 0) + 1
+        try:
+            yield
+        finally:
+            self.local.bypass_depth -= 1
+
+    def cached(self, *entities: enums.CachedEntity) -> Callable[[RouteFunction], RouteFunction]:
+        """Caches a read route whose response depends only on `entities` and its arguments."""
+
+        def decorator(function: RouteFunction) -> RouteFunction:
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if getattr(self.local, "bypass_depth", 0):
+                    with self.lock:
+                        self.bypasses += 1
+                    return function(*args, **kwargs)
+                key = (function.__module__, function.__name__, args, tuple(sorted(kwargs.items())))
+                try:
+                    hash(key)
+                except TypeError:
+                    return function(*args, **kwargs)
+                with self.lock:
+                    versions = self.get_versions(entities)
+                    entry = self.entries.get(key)
+                    if entry and entry[0] == versions:
+                        self.entries.move_to_end(key)
+                        self.hits += 1
+                        return entry[1]
+                    self.misses += 1
+                    if entry:
+                        self.stale += 1
+                response = function(*args, **kwargs)
+                if isinstance(response, dict) and response.get("status") == "success":
+                    with self.lock:
+                        self.entries[key] = (versions, response)
+                        self.entries.move_to_end(key)
+                        while len(self.entries) > self.max_entries:
+                            self.entries.popitem(last=False)
+                            self.evictions += 1
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def invalidates(
+        self, *entities: enums.CachedEntity
+    ) -> Callable[[RouteFunction], RouteFunction]:
+        """Bumps `entities` after a write route returns, whether or not it succeeded."""
+
+        def decorator(function: RouteFunction) -> RouteFunction:
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.bump(*entities)
+
+            return wrapper
+
+        return decorator
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "bypasses": self.bypasses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "versions": {entity.value: version for entity, version in self.versions.items()},
+            }
+
+
+read_cache = ReadCache()
@@ -0,0 +1,42 @@
+// Decodes the columnar day payloads of utils/columnar.py, as requested with the wire_format
+// argument of the plan and timetable grid routes, back into the usual day objects.
+
+const NO_ASSIGNMENT = -1;
+
+async function inflateColumnarDays(data) {
+    const bytes = Uint8Array.from(atob(data), (char) => char.charCodeAt(0));
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+    return JSON.parse(await new Response(stream).text());
+}
+
+async function decodeColumnarDays(payload) {
+    if (Array.isArray(payload)) {
+        return payload; // Already day objects
+    }
+    if (payload.format === "columnar+deflate") {
+        payload = await inflateColumnarDays(payload.data);
+    }
+    const soldierCount = payload.soldier_ids.length;
+    return payload.day_ids.map((dayId, dayIndex) => {
+        const rowStart = dayIndex * soldierCount;
+        const assignments = [];
+        for (let soldierIndex = 0; soldierIndex < soldierCount; soldierIndex++) {
+            const code = payload.codes[rowStart + soldierIndex];
+            if (code === NO_ASSIGNMENT) {
+                continue;
+            }
+            assignments.push({
+                soldier_id: payload.soldier_ids[soldierIndex],
+                day_id: dayId,
+                assignment: payload.assignments[code],
+                id: payload.assignment_ids[rowStart + soldierIndex] ?? null,
+            });
+        }
+        return {
+            id: dayId,
+            date: payload.dates[dayIndex],
+            timetable_id: payload.timetable_id,
+            day_soldier_assignments: assignments,
+        };
+    });
+}
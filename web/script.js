@@ -0,0 +1,18 @@
+// Callbacks the Python side pushes results through while long-running routes are working.
+
+function onTeamPlanReady(teamResult) {
+    document.dispatchEvent(new CustomEvent("teamPlanReady", { detail: teamResult }));
+}
+eel.expose(onTeamPlanReady);
+
+function onProspectiveDay(streamId, day) {
+    document.dispatchEvent(new CustomEvent("prospectiveDay", { detail: { streamId, day } }));
+}
+eel.expose(onProspectiveDay);
+
+function onProspectiveStreamEnd(streamId, result) {
+    document.dispatchEvent(
+        new CustomEvent("prospectiveStreamEnd", { detail: { streamId, ...result } })
+    );
+}
+eel.expose(onProspectiveStreamEnd);